@@ -0,0 +1,142 @@
+# Small engine that executes a declarative action graph
+# See data/collection_flow.py for the graph format.
+
+import threading
+import time
+
+END = "end"
+
+
+class ActionGraph:
+    def __init__(self, definition):
+        """Validate and wrap a graph definition ({"start": ..., "nodes": {...}})"""
+        self.start = definition.get("start")
+        self.nodes = definition.get("nodes", {})
+
+        if self.start not in self.nodes:
+            raise ValueError(f"Start node '{self.start}' is not defined")
+        for name, node in self.nodes.items():
+            if "action" not in node:
+                raise ValueError(f"Node '{name}' has no action")
+            for outcome, target in node.get("next", {}).items():
+                if target != END and target not in self.nodes:
+                    raise ValueError(f"Node '{name}' outcome '{outcome}' leads to unknown node '{target}'")
+
+    def check_handler(self, handler):
+        """Raise ValueError if the handler lacks an action or condition used by the graph"""
+        for name, node in self.nodes.items():
+            if not hasattr(handler, "action_" + node["action"]):
+                raise ValueError(f"Node '{name}' uses unknown action '{node['action']}'")
+            if "until" in node and not hasattr(handler, "condition_" + node["until"]):
+                raise ValueError(f"Node '{name}' uses unknown condition '{node['until']}'")
+
+
+class ActionGraphEngine:
+    # Poll interval for `until` conditions
+    POLL_INTERVAL_S = 0.01
+
+    def __init__(self, graph, handler, delay_func, is_running, stop_event=None, pause_func=None):
+        """Initialize the engine
+
+        Args:
+            graph: ActionGraph to execute
+            handler: Object implementing action_<name> and condition_<name> methods
+            delay_func: Called once per user delay requested by a node's wait
+            is_running: Returns False when execution should stop
+            stop_event: Optional threading.Event set on stop; wakes condition polling
+            pause_func: Optional pause_func(node_name) run before each node that
+                allows pausing; blocks while paused and may return the name of
+                a node to continue from instead
+        """
+        self.graph = graph
+        self.handler = handler
+        self.delay_func = delay_func
+        self.is_running = is_running
+        self.stop_event = stop_event
+        self.pause_func = pause_func
+        self.current_node = None
+
+        # Node name -> [visits, seconds spent in action, wait condition and delays];
+        # the lock lets report() read it from other threads while the graph runs
+        self.timings = {}
+        self.timings_lock = threading.Lock()
+
+    def run(self):
+        """Execute from the start node until "end" or until stopped"""
+        graph = self.graph
+        graph.check_handler(self.handler)
+        node_name = graph.start
+
+        while node_name != END and self.is_running():
+            node = graph.nodes[node_name]
+            if self.pause_func is not None and node.get("pause", True):
+                redirect = self.pause_func(node_name)
+                if not self.is_running():
+                    break
+                if redirect is not None:
+                    if redirect == END:
+                        break
+                    if redirect not in graph.nodes:
+                        raise ValueError(f"Resume node '{redirect}' is not defined")
+                    node_name = redirect
+                    node = graph.nodes[node_name]
+            self.current_node = node_name
+            started = time.perf_counter()
+
+            action = getattr(self.handler, "action_" + node["action"])
+            outcome = action(**node.get("args", {}))
+
+            if "until" in node and self.is_running():
+                if not self.wait_until(node):
+                    outcome = "timeout"
+
+            for _ in range(self.wait_count(node, outcome)):
+                if not self.is_running():
+                    break
+                self.delay_func()
+
+            elapsed = time.perf_counter() - started
+            with self.timings_lock:
+                timing = self.timings.setdefault(node_name, [0, 0.0])
+                timing[0] += 1
+                timing[1] += elapsed
+
+            transitions = node.get("next", {})
+            next_node = transitions.get(outcome, transitions.get("*"))
+            if next_node is None:
+                raise ValueError(f"Node '{node_name}' has no transition for outcome '{outcome}'")
+            node_name = next_node
+
+        self.current_node = None
+
+    def wait_until(self, node):
+        """Poll the node's condition; returns False on timeout"""
+        condition = getattr(self.handler, "condition_" + node["until"])
+        args = node.get("until_args", {})
+        timeout_ms = node.get("timeout_ms")
+        deadline = time.monotonic() + timeout_ms / 1000.0 if timeout_ms is not None else None
+
+        while self.is_running():
+            if condition(**args):
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            if self.stop_event is not None:
+                self.stop_event.wait(self.POLL_INTERVAL_S)
+            else:
+                time.sleep(self.POLL_INTERVAL_S)
+        return True
+
+    @staticmethod
+    def wait_count(node, outcome):
+        """Number of user delays to apply after a node for the given outcome"""
+        wait = node.get("wait", 0)
+        if isinstance(wait, dict):
+            wait = wait.get(outcome, wait.get("*", 0))
+        return int(wait)
+
+    def report(self):
+        """Per-node visits and time, slowest first: [(node, visits, seconds), ...]"""
+        with self.timings_lock:
+            timings = [(name, visits, seconds) for name, (visits, seconds) in self.timings.items()]
+        return sorted(timings, key=lambda entry: entry[2], reverse=True)
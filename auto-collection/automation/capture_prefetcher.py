@@ -0,0 +1,116 @@
+# Background capture worker that overlaps region capture with input delays
+# The automation thread requests a frame of a region for the moment its delay
+# ends; the worker sleeps until just before that moment, captures, and
+# publishes the frame. Publishing swaps one tuple reference (atomic under the
+# GIL), so the consumer never sees a half-written frame and no lock is held
+# while capturing. If the requested capture is still in flight when the delay
+# ends, the consumer waits for it rather than starting a second capture.
+
+import threading
+import time
+from core.run_log import log_exception
+
+
+class CapturePrefetcher:
+    # Weight of the newest sample in the running capture time estimate
+    CAPTURE_TIME_SMOOTHING = 0.2
+
+    # Longest time take() waits for an in-flight capture
+    IN_FLIGHT_TIMEOUT_S = 0.5
+
+    def __init__(self, capture_func):
+        """Initialize with capture_func(area) -> BGR frame or None"""
+        self.capture_func = capture_func
+        self.capture_time = 0.0
+        self.request_sequence = 0
+        self.pending = None     # (sequence, area, ready_at)
+        self.published = None   # (sequence, area, frame, captured_at)
+        self.in_flight = None   # Sequence currently being captured
+        self.frame_ready = threading.Event()
+        self.wake = threading.Event()
+        self.stopping = False
+        self.thread = None
+
+        # Counters for tuning
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        """Start the worker thread"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stopping = False
+        self.pending = None
+        self.published = None
+        self.thread = threading.Thread(target=self._worker_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the worker thread"""
+        self.stopping = True
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def request(self, area, ready_at):
+        """Ask for a frame of area captured as close as possible to ready_at
+
+        Returns the request sequence number to pass to take()
+        """
+        self.request_sequence += 1
+        self.pending = (self.request_sequence, area, ready_at)
+        self.wake.set()
+        return self.request_sequence
+
+    def take(self, sequence, not_before):
+        """Return (area, frame) for request sequence if captured after not_before"""
+        if self.in_flight == sequence:
+            self.frame_ready.wait(self.IN_FLIGHT_TIMEOUT_S)
+        published = self.published
+        if published is not None:
+            published_sequence, area, frame, captured_at = published
+            if published_sequence == sequence and captured_at >= not_before:
+                self.hits += 1
+                return area, frame
+        self.misses += 1
+        return None
+
+    def _worker_loop(self):
+        """Serve capture requests until stopped"""
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+            if self.stopping:
+                break
+
+            pending = self.pending
+            if pending is None:
+                continue
+            sequence, area, ready_at = pending
+
+            # Start early by the expected capture time so the frame is ready when the delay ends
+            wait_s = ready_at - self.capture_time - time.monotonic()
+            if wait_s > 0 and self.wake.wait(wait_s):
+                continue  # Superseded by a newer request or stopping
+            if self.pending is not pending:
+                continue
+
+            self.frame_ready.clear()
+            self.in_flight = sequence
+            captured_at = time.monotonic()
+            try:
+                frame = self.capture_func(area)
+            except Exception as e:
+                log_exception("prefetch_failed", e, area=area)
+                frame = None
+            elapsed = time.monotonic() - captured_at
+
+            if self.capture_time == 0.0:
+                self.capture_time = elapsed
+            else:
+                self.capture_time += (elapsed - self.capture_time) * self.CAPTURE_TIME_SMOOTHING
+            if frame is not None:
+                self.published = (sequence, area, frame, captured_at)
+            self.in_flight = None
+            self.frame_ready.set()
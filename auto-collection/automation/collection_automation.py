@@ -6,11 +6,72 @@ import os
 import sys
 import cv2
 import numpy as np
-import win32api
-import win32con
-import win32gui
+from automation.red_dot_detector import RedDotDetector, NO_DOTS
+from automation.runtime_model import ScreenArea, ScreenButton, dot_tuple, without_near, any_near
+from automation.session_recorder import SessionRecorder
+from automation.frame_ring import FrameRingBuffer
+from automation.capture_prefetcher import CapturePrefetcher
+from automation.action_graph import ActionGraph, ActionGraphEngine
+from automation.dungeon_index import DungeonIndex
+from automation.item_panel_tracker import ItemPanelTracker
+from automation.tab_planner import TabPlanner
+from automation.frame_clock import FrameClock
+from automation.run_stats import RunStats
+from core.capture_backend import CAPTURE_BACKENDS
+from core.coordinates import LEGACY_SPACE
+from core.run_log import log_event, log_exception
+from data.collection_flow import COLLECTION_FLOW_FILE, get_collection_flow
+
+# Outcomes reported through CollectionAutomation.result once a run ends
+RESULT_COMPLETE = "complete"
+RESULT_STUCK = "stuck"
+RESULT_WINDOW_LOST = "window_lost"
+RESULT_STOPPED = "stopped"
+RESULT_ERROR = "error"
 
 class CollectionAutomation:
+    # Full tab passes in a row without registering anything before giving up
+    STUCK_PASS_LIMIT = 3
+    
+    # Max distance in pixels between a tab dot and the remembered tab position
+    TAB_DOT_TOLERANCE = 20
+    
+    # Max drift in pixels when re-verifying a remembered dot during incremental scans
+    CANDIDATE_TOLERANCE = 4
+    
+    # Size (width, height) of the patch sampled around a button to probe its state
+    BUTTON_PROBE_SIZE = (24, 12)
+    # Max mean absolute pixel difference for a probe to count as matching its reference
+    BUTTON_PROBE_MAX_DIFF = 20.0
+    
+    # Max mean absolute pixel difference between the pause snapshot and the view on resume
+    SNAPSHOT_MAX_DIFF = 8.0
+    
+    # Buttons whose clicks use the heavy input budget of the rate limiter
+    HEAVY_BUTTONS = ("register", "yes")
+    
+    # Button clicks of a register sequence, in order (see RunStats)
+    SEQUENCE_BUTTONS = ("auto_refill", "register", "yes")
+    
+    # Side of the square sampled at the client center when no frame probe area is set
+    FRAME_PROBE_SIZE = 32
+    
+    # Calibration a run needs, with the names used in setup messages
+    REQUIRED_AREAS = {
+        "collection_tabs": "Collection tabs area",
+        "dungeon_list": "Dungeon list area",
+        "collection_items": "Collection items area"
+    }
+    REQUIRED_BUTTONS = {
+        "auto_refill": "Auto Refill button",
+        "register": "Register button",
+        "yes": "Yes button",
+        "page_2": "Page 2 button",
+        "page_3": "Page 3 button",
+        "page_4": "Page 4 button",
+        "arrow_right": "Arrow Right button"
+    }
+
     def __init__(self, game_connector, status_callback=None):
         """Initialize collection automation"""
         self.game_connector = game_connector
@@ -18,22 +79,50 @@ class CollectionAutomation:
 
         # Automation state
         self.running = False
+        self.thread = None
+        self.result = None
+        
+        # Set by cancel(); every wait of a run sleeps on it so a stop takes effect at once
+        self.stop_event = threading.Event()
+        self.stop_requested_at = None   # time.perf_counter() of the last stop()/emergency_stop()
+        self.stop_latency_ms = None     # Time from that request until the run thread ended
+        
+        # Pause between action graph nodes (see pause/resume); resume_event is set while not paused
+        self.paused = False
+        self.resume_event = threading.Event()
+        self.resume_event.set()
+        self.pause_snapshot = None      # Position captured when the run actually paused
+        
+        # Throughput counters of the current run (see get_metrics)
+        self.counters = {}
+        self.started_at = None
+        
+        # Per-tab and per-dungeon cost report (see automation/run_stats.py)
+        self.run_stats = RunStats()
+        self.report_dir = None          # Directory for JSON/CSV reports (None = not written)
+        self.report_callback = None     # Called with (report, files) from the run thread at the end
+        self.last_report = None
+        self.last_report_files = []
         
         # Speed settings
         self.delay_ms = 1000  # Default 1000ms (1 second)
         
-        # Action button coordinates for calibration
-        self.auto_refill_coords = None
-        self.register_coords = None
-        self.yes_coords = None
+        # Optional wall-clock limit for a run (None = unlimited)
+        self.time_budget_s = None
+        self.deadline = None
+        
+        # Calibration as stored in the settings, in coordinate_space (see core/coordinates.py)
+        self.coordinate_space = "client"
+        self.area_calibration = {}        # Area name -> (left, top, width, height)
+        self.button_calibration = {}      # Button name -> (x, y)
         
-        # Pagination button coordinates
-        self.page_2_coords = None
-        self.page_3_coords = None
-        self.page_4_coords = None
-        self.arrow_right_coords = None
+        # Calibration resolved to screen pixels for the window geometry in transform
+        # (see resolve_coordinates and automation/runtime_model.py)
+        self.transform = None
+        self.areas = {}                   # Area name -> ScreenArea
+        self.buttons = {}                 # Button name -> ScreenButton
         
-        # Detection areas for red dots
+        # Detection areas for red dots (ScreenArea, or None until resolved)
         self.collection_tabs_area = None  # Area containing all collection tabs (Dungeon, World, Special, Boss)
         self.dungeon_list_area = None     # Area containing the dungeon/world/special/boss list entries
         self.collection_items_area = None # Area containing the collection items/materials panel
@@ -41,22 +130,254 @@ class CollectionAutomation:
         # Red dot template path and cached template
         self.red_dot_template_path = None
         self.red_dot_template = None
+        self.detector_settings = {"mode": "color", "confidence": 0.9, "min_distance": 10, "workers": 1}
+        self.detector = None
+        self.dot_extent = (0, 0, 0, 0)    # Template extent (left, top, right, bottom) around a dot center
         self.load_red_dot_template_path()
+        
+        # (tab position, capture rectangle) used by tab_still_has_red_dot
+        self.tab_check_cache = (None, None)
+        
+        # Remaining dots from the last full scan, per area name (see next_red_dot)
+        self.scan_candidates = {}
+        
+        # Dots skipped as futile, per area name; cleared when the area's content moves
+        self.skipped_dots = {}
+        
+        # Reference patches of button states (see capture_button_reference)
+        self.button_references = {}
+        
+        # Optional perceptual-hash index of dungeon list rows (see action_index_page)
+        self.dungeon_list_rows = 0
+        self.dungeon_index = None
+        
+        # Scroll offset and visited items of the item panel (see action_track_items)
+        self.item_tracker = ItemPanelTracker()
+        
+        # Order of tabs within one tab strip scan, and where their history is saved
+        self.tab_planner = TabPlanner(tolerance=self.TAB_DOT_TOLERANCE)
+        self.save_tab_history = None
+        
+        # Collection traversal (see data/collection_flow.py)
+        self.collection_flow = self.load_collection_flow()
+        self.flow_state = {}
+        self.flow_engine = None
+        
+        # Optional capture prefetch during delays (see set_prefetch_enabled)
+        self.prefetch_enabled = False
+        self.prefetcher = None
+        self.prefetch_sequence = None
+        self.active_area = None       # ScreenArea the next scan is expected to look at
+        self.last_input_time = 0.0    # time.monotonic() of the last click/scroll
+        
+        # Optional capture timing to the game's frame cadence (see set_frame_sync)
+        self.frame_sync_enabled = False
+        self.frame_probe_calibration = None   # Probe area in the calibration space (None = client center)
+        self.frame_probe_area = None          # Probe area in screen pixels
+        self.frame_sync_calibrate_s = 0.5
+        self.frame_clock = FrameClock()
+        
+        # Optional session recorder (see start_recording)
+        self.recorder = None
+        
+        # Optional ring buffer of recent frames, dumped on emergency stop or error
+        self.frame_ring_size = 0
+        self.frame_ring_path = None
+        self.frame_ring = None
+        # Dumps requested from other threads while a run writes to the ring are made by
+        # the run thread once the run has ended (see request_frame_dump)
+        self.frame_dump_lock = threading.Lock()
+        self.run_thread_active = False
+        self.frame_dump_reason = None
 
     def update_status(self, message):
         """Update status via callback if available"""
+        log_event("status", message=message)
         if self.status_callback:
             self.status_callback(message)
 
+    def load_collection_flow(self):
+        """Collection action graph; a broken override file falls back to the built-in graph"""
+        try:
+            flow = get_collection_flow()
+            ActionGraph(flow).check_handler(self)
+            return flow
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            # TypeError/AttributeError: valid JSON of the wrong shape
+            self.update_status(f"⚠ Ignoring {COLLECTION_FLOW_FILE} ({e}) - using the built-in collection flow")
+            return get_collection_flow(None)
+
     def set_delay_ms(self, delay_ms):
         """Set the delay in milliseconds"""
         self.delay_ms = max(0, delay_ms)  # Ensure non-negative
 
+    def set_time_budget(self, seconds):
+        """Limit how long a run may take (None = unlimited)"""
+        self.time_budget_s = seconds if seconds and seconds > 0 else None
+
+    def set_detector_mode(self, mode):
+        """Select the red dot detector mode (see DETECTOR_MODES)"""
+        self.configure_detector(mode=mode)
+
+    def configure_detector(self, **detector_settings):
+        """Update detector settings (mode, confidence, min_distance, workers)"""
+        self.detector_settings.update(
+            (key, value) for key, value in detector_settings.items() if value is not None)
+        self.build_detector()
+
+    def build_detector(self):
+        """(Re)create the detector from the cached template and current settings"""
+        if self.detector is not None:
+            self.detector.close()
+        if self.red_dot_template is None:
+            self.detector = None
+            return
+        self.detector = RedDotDetector(self.red_dot_template, **self.detector_settings)
+        width, height = self.detector.template_width, self.detector.template_height
+        self.dot_extent = (width // 2, height // 2, width - width // 2, height - height // 2)
+
+    def set_dungeon_list_rows(self, rows):
+        """Set the number of entries per dungeon list page (0 = no row index)"""
+        self.dungeon_list_rows = max(0, int(rows or 0))
+
+    def set_tab_policy(self, policy, history=None, save_history=None):
+        """Set the tab order policy, its history and an optional save_history(history) callback"""
+        self.tab_planner = TabPlanner(policy, history, self.TAB_DOT_TOLERANCE)
+        self.save_tab_history = save_history
+
+    def set_prefetch_enabled(self, enabled):
+        """Capture the active region in the background while delays run"""
+        self.prefetch_enabled = bool(enabled)
+
     def delay(self, custom_ms=None):
         """Apply delay (0 = no delay)"""
         delay_to_use = custom_ms if custom_ms is not None else self.delay_ms
         if delay_to_use > 0:
-            time.sleep(delay_to_use / 1000.0)  # Convert ms to seconds
+            if self.prefetcher is not None and self.active_area is not None:
+                # Have the active region captured just as the delay ends, but not before
+                # the game has presented the last input
+                wait_s = delay_to_use / 1000.0
+                if self.frame_sync_enabled:
+                    wait_s = max(wait_s, self.frame_clock.wait_needed())
+                ready_at = time.monotonic() + wait_s
+                self.prefetch_sequence = self.prefetcher.request(self.active_area.rect, ready_at)
+            # Wakes immediately when the run is cancelled
+            sleep_start = time.perf_counter()
+            self.stop_event.wait(delay_to_use / 1000.0)  # Convert ms to seconds
+            self.run_stats.add_time("sleep", time.perf_counter() - sleep_start)
+        self.check_time_budget()
+
+    def check_time_budget(self):
+        """Stop the run as stuck once the time budget is used up"""
+        if self.running and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.result = RESULT_STUCK
+            self.cancel()
+            self.update_status(f"⏱ Time budget of {self.time_budget_s:g}s exhausted")
+
+    def cancel(self):
+        """End the run: clears running and wakes every wait"""
+        self.running = False
+        self.paused = False
+        self.stop_event.set()
+        self.resume_event.set()
+
+    def pause(self):
+        """Hold the run before its next action graph node"""
+        if not self.running or self.paused:
+            return False
+        self.paused = True
+        self.resume_event.clear()
+        self.update_status("⏸ Pausing...")
+        return True
+
+    def resume(self):
+        """Continue a paused run"""
+        if not self.paused:
+            return False
+        self.paused = False
+        self.resume_event.set()
+        self.update_status("▶ Resumed")
+        return True
+
+    def wait_while_paused(self, node_name):
+        """Block the run thread while paused; called by the engine before pausable nodes
+        
+        Returns the node to continue from, or None to run node_name as planned
+        """
+        if not self.paused:
+            return None
+        self.pause_snapshot = self.take_snapshot(node_name)
+        self.update_status("⏸ Paused")
+        paused_at = time.monotonic()
+        self.resume_event.wait()
+        
+        # Time spent paused does not count against the time budget
+        if self.deadline is not None:
+            self.deadline += time.monotonic() - paused_at
+        if not self.running:
+            return None
+        
+        # Remembered tab and dot positions are stale if the window moved or resized
+        if self.resolve_coordinates():
+            self.pause_snapshot = None
+            self.update_status("↻ Game window moved while paused - rescanning tabs")
+            return "scan_tabs"
+        return self.verify_snapshot()
+
+    def take_snapshot(self, node_name):
+        """Position of the run plus reference captures of the list and item panel"""
+        state = self.flow_state
+        return {
+            "node": node_name,
+            "tab_position": state.get("tab_position"),
+            "tab_plan": list(state.get("tab_plan", ())),
+            "page": state.get("page"),
+            "page_group": state.get("page_group"),
+            "visible_page": state.get("visible_page"),
+            "scroll_offset": self.item_tracker.offset,
+            "remaining_dots": {region: dots.tolist() for region, dots in self.scan_candidates.items()},
+            "skipped_dots": {region: list(dots) for region, dots in self.skipped_dots.items()},
+            "frames": {name: self.grab_area(self.area_by_name(name).rect)
+                       for name in ("dungeon_list", "collection_items")}
+        }
+
+    def snapshot_summary(self):
+        """JSON-friendly view of the pause snapshot (without frames), or None"""
+        snapshot = self.pause_snapshot
+        if snapshot is None:
+            return None
+        summary = {key: value for key, value in snapshot.items() if key != "frames"}
+        summary["remaining_dots"] = {region: len(dots)
+                                     for region, dots in snapshot["remaining_dots"].items()}
+        summary["skipped_dots"] = {region: len(dots)
+                                   for region, dots in snapshot["skipped_dots"].items()}
+        return summary
+
+    def verify_snapshot(self):
+        """Quick verification scan on resume
+        
+        Continues where the run paused if the dungeon list and item panel
+        look as they did; otherwise restores the tab and page first.
+        """
+        snapshot = self.pause_snapshot
+        self.pause_snapshot = None
+        if snapshot is None:
+            return None
+        
+        for name, reference in snapshot["frames"].items():
+            current = self.grab_area(self.area_by_name(name).rect)
+            if (reference is None or current is None or current.shape != reference.shape or
+                    float(np.mean(cv2.absdiff(current, reference))) > self.SNAPSHOT_MAX_DIFF):
+                self.update_status("↻ View changed while paused - restoring tab and page")
+                self.flow_state["restore_skipped"] = snapshot["skipped_dots"].get("dungeon_list", [])
+                return "restore_position"
+        
+        self.update_status("✓ Resumed where paused")
+        return None
+
+    def is_cancelled(self):
+        """Check the cancellation token before sending input"""
+        return self.stop_event.is_set()
 
     def load_red_dot_template_path(self):
         """Load the path to the red dot template image"""
@@ -78,193 +399,536 @@ class CollectionAutomation:
             else:
                 # Load and cache the template
                 self.red_dot_template = cv2.imread(self.red_dot_template_path, cv2.IMREAD_COLOR)
+                self.build_detector()
         except Exception as e:
+            log_exception("template_load_failed", e)
             self.red_dot_template_path = None
             self.red_dot_template = None
+            self.detector = None
+
+    def load_settings(self, settings):
+        """Apply areas, buttons and delay from a SettingsManager
+        
+        Calibration saved in legacy screen/window coordinates is converted to
+        client coordinates first if the game window is available.
+        """
+        self.set_delay_ms(settings.get_delay_ms())
+        
+        if settings.get_coordinate_space() == LEGACY_SPACE:
+            transform = self.game_connector.get_client_transform()
+            if transform is not None and settings.migrate_coordinates(transform):
+                self.update_status("✓ Calibration converted to game window coordinates")
+        self.set_coordinate_space(settings.get_coordinate_space())
+
+        area_setters = {
+            "collection_tabs": self.set_collection_tabs_area,
+            "dungeon_list": self.set_dungeon_list_area,
+            "collection_items": self.set_collection_items_area
+        }
+        for area_name, coords in settings.get_all_areas().items():
+            if coords and area_name in area_setters:
+                area_setters[area_name](coords)
+
+        button_setters = {
+            "auto_refill": self.set_auto_refill_button,
+            "register": self.set_register_button,
+            "yes": self.set_yes_button,
+            "page_2": self.set_page_2_button,
+            "page_3": self.set_page_3_button,
+            "page_4": self.set_page_4_button,
+            "arrow_right": self.set_arrow_right_button
+        }
+        for button_name, coords in settings.get_all_buttons().items():
+            if coords and button_name in button_setters:
+                button_setters[button_name](coords)
+
+        self.set_frame_ring(*settings.get_frame_ring_settings())
+        self.set_prefetch_enabled(settings.get_prefetch_enabled())
+        self.set_frame_sync(**settings.get_frame_sync_settings())
+        self.set_report_dir(settings.get_report_dir())
+        capture_backend = settings.get_capture_backend()
+        if capture_backend not in CAPTURE_BACKENDS:
+            self.update_status(f"⚠ Unknown capture backend '{capture_backend}' - using bitblt")
+            capture_backend = "bitblt"
+        self.game_connector.set_capture_backend(capture_backend)
+        self.set_dungeon_list_rows(settings.get_dungeon_list_rows())
+        self.game_connector.configure_input_limits(settings.get_input_limits())
+        self.set_tab_policy(settings.get_tab_policy(), settings.get_tab_history(),
+                            settings.set_tab_history)
+        self.configure_detector(**settings.get_detector_settings())
+        for button_name, path in settings.get_button_reference_paths().items():
+            self.load_button_reference(button_name, path)
+
+    def set_frame_ring(self, size, path=None):
+        """Keep the last `size` captured frames for debugging (0 = disabled)"""
+        self.frame_ring_size = max(0, int(size or 0))
+        self.frame_ring_path = path or None
+        self.frame_ring = None
+
+    def prepare_frame_ring(self):
+        """Allocate the frame ring once, sized for the largest detection area"""
+        if not self.frame_ring_size:
+            self.frame_ring = None
+            return
+
+        areas = [self.collection_tabs_area, self.dungeon_list_area, self.collection_items_area]
+        max_height = max(area.height for area in areas)
+        max_width = max(area.width for area in areas)
+
+        ring = self.frame_ring
+        if (ring is None or ring.capacity != self.frame_ring_size or
+                ring.max_height != max_height or ring.max_width != max_width):
+            if ring is None and self.frame_ring_path:
+                self.recover_frame_ring()
+            self.frame_ring = None
+            ring = FrameRingBuffer.create(self.frame_ring_size, max_height, max_width,
+                                          self.frame_ring_path)
+        ring.begin()
+        self.frame_ring = ring
+
+    def recover_frame_ring(self):
+        """Dump the ring file left in use by a run that did not end (crash or kill)"""
+        try:
+            previous = FrameRingBuffer.open_file(self.frame_ring_path)
+        except (OSError, ValueError):
+            return
+        if previous.interrupted:
+            self.frame_ring = previous
+            self.dump_frame_ring("interrupted_run")
+            previous.close()
+        self.frame_ring = None
 
-    def find_red_dots_in_area(self, area, confidence=0.9, first_only=False):
-        """Find red dots in the specified area using OpenCV template matching
+    def request_frame_dump(self, reason):
+        """Dump the frame ring, on the run thread if a run is writing to it"""
+        with self.frame_dump_lock:
+            if self.run_thread_active:
+                self.frame_dump_reason = reason
+                return
+        self.dump_frame_ring(reason)
+
+    def dump_frame_ring(self, reason):
+        """Write the buffered frames to debug_frames/<timestamp>_<reason>/"""
+        ring = self.frame_ring
+        if ring is None or len(ring) == 0:
+            return
+        try:
+            directory = os.path.join("debug_frames", f"{time.strftime('%Y%m%d_%H%M%S')}_{reason}")
+            count = ring.dump(directory)
+            self.update_status(f"Saved {count} debug frames to {directory}")
+        except Exception as e:
+            log_exception("frame_dump_failed", e, reason=reason)
+            self.update_status(f"❌ Failed to save debug frames: {str(e)}")
+
+    def find_red_dots_in_area(self, area, confidence=None, first_only=False):
+        """Find red dots in a detection area using OpenCV template matching
         
         Args:
-            area: Tuple of (left, top, width, height)
-            confidence: Matching confidence threshold (0.0-1.0)
+            area: ScreenArea to scan; it becomes the active area for capture prefetch
+            confidence: Matching confidence threshold (0.0-1.0), defaults to the detector's
             first_only: If True, only return the first match (faster)
+        Returns:
+            (N, 2) int32 array of dot screen positions
         """
-        if not self.red_dot_template_path or self.red_dot_template is None:
-            return []
+        self.active_area = area
+        return self.scan(area.rect, area.name, confidence, first_only)
+
+    def scan(self, rect, region="custom", confidence=None, first_only=False):
+        """Capture a screen (left, top, width, height) rectangle and find red dots in it
+        
+        Returns an (N, 2) int32 array of dot screen positions (empty on failure)
+        """
+        if not self.red_dot_template_path or self.detector is None:
+            return NO_DOTS
         
         try:
-            # Area format: (left, top, width, height)
-            left, top, width, height = area
-            
-            # Capture screenshot of the specific area using game connector
-            screenshot_pil = self.game_connector.capture_area_bitblt(area)
-            if screenshot_pil is None:
-                return []
-            
-            # Convert PIL image to OpenCV format
-            screenshot_cv = cv2.cvtColor(np.array(screenshot_pil), cv2.COLOR_RGB2BGR)
-            
-            # Use cached template
-            template = self.red_dot_template
-            
-            # Perform template matching
-            result = cv2.matchTemplate(screenshot_cv, template, cv2.TM_CCOEFF_NORMED)
-            
-            # If we only need the first match, find the single best match point (much faster)
-            if first_only:
-                min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-                if max_val >= confidence:
-                    template_height, template_width = template.shape[:2]
-                    center_x = left + max_loc[0] + template_width // 2
-                    center_y = top + max_loc[1] + template_height // 2
-                    return [(center_x, center_y)]
-                return []
-            
-            # Otherwise, find all matches above the confidence threshold
-            locations = np.where(result >= confidence)
-            
-            # Convert matches to center coordinates (absolute screen coordinates)
-            red_dot_positions = []
-            template_height, template_width = template.shape[:2]
-            
-            for pt in zip(*locations[::-1]):  # Switch x and y coordinates
-                # Calculate center of the template match
-                center_x = left + pt[0] + template_width // 2
-                center_y = top + pt[1] + template_height // 2
-                red_dot_positions.append((center_x, center_y))
-            
-            # Remove duplicate detections
-            if not red_dot_positions:
-                return []
+            capture_start = time.perf_counter()
+            screenshot_cv = self.capture_area(rect)
+            capture_ms = (time.perf_counter() - capture_start) * 1000
+            if screenshot_cv is None:
+                log_event("scan_failed", region=region, area=rect, reason="no_capture",
+                          capture_ms=round(capture_ms, 2))
+                return NO_DOTS
             
-            filtered_positions = [red_dot_positions[0]]
-            for pos in red_dot_positions[1:]:
-                if all((pos[0] - existing[0])**2 + (pos[1] - existing[1])**2 >= 100 
-                       for existing in filtered_positions):
-                    filtered_positions.append(pos)
-            
-            return filtered_positions
+            return self.detect_in_frame(rect, region, screenshot_cv, confidence, first_only, capture_ms)
             
         except Exception as e:
-            return []
+            log_exception("scan_failed", e, area=rect)
+            return NO_DOTS
+
+    def detect_in_frame(self, rect, region, frame, confidence=None, first_only=False, capture_ms=None):
+        """Match red dots in a frame captured for a screen rectangle
+        
+        Returns an (N, 2) int32 array of dot screen positions
+        """
+        if self.frame_ring is not None:
+            self.frame_ring.write(frame, region)
+        
+        recorder = self.recorder
+        if recorder:
+            frame_id = recorder.record_capture(region, rect, frame)
+        
+        # Match and convert to absolute screen coordinates
+        detect_start = time.perf_counter()
+        dots = self.detector.detect_array(frame, confidence, first_only)
+        detect_seconds = time.perf_counter() - detect_start
+        
+        if recorder:
+            recorder.record_detection(region, frame_id, dots.tolist(), detect_seconds,
+                                      confidence, first_only)
+        self.run_stats.add_time("match", detect_seconds)
+        log_event("scan", region=region, dots=len(dots), first_only=first_only,
+                  capture_ms=round(capture_ms, 2) if capture_ms is not None else None,
+                  detect_ms=round(detect_seconds * 1000, 2))
+        if len(dots):
+            # detect_array returns a new array whenever it found dots
+            dots[:, 0] += rect[0]
+            dots[:, 1] += rect[1]
+        return dots
+
+    def grab_area(self, area):
+        """Capture an area right now and return it as a BGR NumPy array (or None)"""
+        frame, _ = self.game_connector.capture_frame(area)
+        return frame
+
+    def capture_area(self, area):
+        """Capture an area, reusing the prefetched frame if it is still fresh
+        
+        A prefetched frame is only used if it was captured after the last
+        input and contains the requested area. With frame sync the capture
+        waits for the first frame that can show the last input. Returns None
+        if the run is cancelled during that wait.
+        """
+        if not self.wait_for_fresh_frame():
+            return None
+        capture_start = time.perf_counter()
+        frame = None
+        if self.prefetcher is not None and self.prefetch_sequence is not None:
+            prefetched = self.prefetcher.take(self.prefetch_sequence, self.last_input_time)
+            # A prefetched frame serves one capture; later scans capture anew
+            self.prefetch_sequence = None
+            if prefetched is not None:
+                frame_area, prefetched_frame = prefetched
+                frame = self.crop_frame(prefetched_frame, frame_area, area)
+        if frame is None:
+            frame = self.grab_area(area)
+        self.run_stats.add_time("capture", time.perf_counter() - capture_start)
+        return frame
+
+    def set_frame_sync(self, enabled, probe_area=None, calibrate_ms=500):
+        """Time captures after input to the game's frame cadence
+        
+        Args:
+            enabled: Measure the cadence at the start of a run and wait for fresh frames
+            probe_area: Region that changes every frame, in the calibration coordinate
+                space (None = a small square at the center of the client area)
+            calibrate_ms: Sampling time of one cadence measurement
+        """
+        self.frame_sync_enabled = bool(enabled)
+        self.frame_probe_calibration = tuple(probe_area) if probe_area else None
+        self.frame_sync_calibrate_s = max(50, int(calibrate_ms or 500)) / 1000.0
+        self.transform = None
+
+    def calibrate_frame_clock(self, announce=True):
+        """Measure the game's frame cadence on the probe region; returns True if calibrated"""
+        if self.frame_probe_area is None:
+            return False
+        if self.frame_clock.calibrate(self.grab_area, self.frame_probe_area,
+                                      self.frame_sync_calibrate_s, self.stop_event):
+            stats = self.frame_clock.stats()
+            log_event("frame_clock", area=self.frame_probe_area, **stats)
+            if announce:
+                self.update_status(f"✓ Frame sync: game presents {stats['fps']:g} fps")
+            return True
+        log_event("frame_clock", area=self.frame_probe_area, calibrated=False)
+        if announce and not self.is_cancelled():
+            self.update_status("⚠ Frame sync: probe region does not change every frame - using delays only")
+        return False
+
+    def wait_for_fresh_frame(self):
+        """Hold a capture until the game has presented a frame that can show the last input
+        
+        Returns False if the run was cancelled during the wait.
+        """
+        if not self.frame_sync_enabled:
+            return True
+        wait_s = self.frame_clock.wait_needed()
+        if wait_s <= 0:
+            return True
+        self.frame_clock.record_wait(wait_s)
+        # Wakes immediately when the run is cancelled
+        sleep_start = time.perf_counter()
+        cancelled = self.stop_event.wait(wait_s)
+        self.run_stats.add_time("sleep", time.perf_counter() - sleep_start)
+        return not cancelled
 
-    def click_at_screen_position(self, x, y):
-        """Click at absolute screen coordinates"""
+    @staticmethod
+    def crop_frame(frame, frame_area, area):
+        """View of area inside a frame captured for frame_area, or None if not contained"""
+        offset_x = area[0] - frame_area[0]
+        offset_y = area[1] - frame_area[1]
+        if (offset_x < 0 or offset_y < 0 or
+                offset_x + area[2] > frame_area[2] or offset_y + area[3] > frame_area[3]):
+            return None
+        return frame[offset_y:offset_y + area[3], offset_x:offset_x + area[2]]
+
+    def start_recording(self, path):
+        """Record captures, detections and inputs of the next run to an .npz trace
+        
+        Returns False if the frames file next to the trace cannot be created.
+        """
         try:
-            win32api.SetCursorPos((int(x), int(y)))
-            # Removed delay here - not needed before coordinate conversion
+            self.recorder = SessionRecorder(path)
+        except OSError as e:
+            log_exception("record_failed", e, path=path)
+            self.update_status(f"❌ Failed to start session trace: {str(e)}")
+            return False
+        self.recorder.set_template(self.red_dot_template)
+        if self.detector is not None:
+            self.recorder.set_metadata(detector_mode=self.detector.mode,
+                                       confidence=self.detector.confidence,
+                                       min_distance=self.detector.min_distance,
+                                       delay_ms=self.delay_ms)
+        return True
+
+    def save_recording(self):
+        """Write and detach the current recording, if any"""
+        recorder = self.recorder
+        self.recorder = None
+        if recorder:
+            try:
+                recorder.save()
+                self.update_status(f"Session trace saved to {recorder.path}")
+            except Exception as e:
+                self.update_status(f"❌ Failed to save session trace: {str(e)}")
+
+    def click_at_screen_position(self, x, y, heavy=False):
+        """Click at absolute screen coordinates (no-op once the run is cancelled)
+        
+        heavy selects the rate limiter budget for clicks the client is slow to process
+        """
+        if self.is_cancelled():
+            return False
+        if self.recorder:
+            self.recorder.record_input("click", x=int(x), y=int(y))
+        click_start = time.perf_counter()
+        try:
+            if self.transform is None and not self.resolve_coordinates():
+                return False
+            if not self.game_connector.move_cursor(x, y):
+                return False
             
-            rel_x, rel_y, success = self.game_connector.convert_to_window_coords(x, y)
-            if success:
-                self.game_connector.click_at_position((rel_x, rel_y))
+            # Window messages take client coordinates
+            client_position = self.transform.to_client(x, y)
+            if (not self.is_cancelled() and
+                    self.game_connector.click_at_position(client_position, adjust_for_client_area=False,
+                                                          heavy=heavy)):
+                self.last_input_time = time.monotonic()
+                self.frame_clock.mark_input()
+                log_event("click", x=x, y=y, heavy=heavy)
                 return True
+            log_event("click_dropped", x=x, y=y, heavy=heavy, cancelled=self.is_cancelled())
             return False
         except Exception as e:
+            log_exception("click_failed", e, x=x, y=y)
             return False
+        finally:
+            self.run_stats.add_time("click", time.perf_counter() - click_start)
+
+    def set_coordinate_space(self, space):
+        """Set the space calibration values are given in (see core/coordinates.py)"""
+        self.coordinate_space = space
+        self.transform = None
+
+    def set_area_calibration(self, area_name, area):
+        """Set a detection area in the calibration coordinate space"""
+        self.area_calibration[area_name] = tuple(area)
+        self.transform = None
+
+    def set_button_calibration(self, button_name, coords):
+        """Set a button position in the calibration coordinate space"""
+        self.button_calibration[button_name] = tuple(coords)
+        self.transform = None
 
     def set_collection_tabs_area(self, area):
-        self.collection_tabs_area = area
+        self.set_area_calibration("collection_tabs", area)
 
     def set_dungeon_list_area(self, area):
-        self.dungeon_list_area = area
+        self.set_area_calibration("dungeon_list", area)
 
     def set_collection_items_area(self, area):
-        self.collection_items_area = area
+        self.set_area_calibration("collection_items", area)
 
     def set_auto_refill_button(self, coords):
-        self.auto_refill_coords = coords
+        self.set_button_calibration("auto_refill", coords)
 
     def set_register_button(self, coords):
-        self.register_coords = coords
+        self.set_button_calibration("register", coords)
 
     def set_yes_button(self, coords):
-        self.yes_coords = coords
+        self.set_button_calibration("yes", coords)
 
     def set_page_2_button(self, coords):
-        self.page_2_coords = coords
+        self.set_button_calibration("page_2", coords)
 
     def set_page_3_button(self, coords):
-        self.page_3_coords = coords
+        self.set_button_calibration("page_3", coords)
 
     def set_page_4_button(self, coords):
-        self.page_4_coords = coords
+        self.set_button_calibration("page_4", coords)
 
     def set_arrow_right_button(self, coords):
-        self.arrow_right_coords = coords
+        self.set_button_calibration("arrow_right", coords)
+
+    def resolve_coordinates(self):
+        """Resolve the calibration to screen pixels for the current window geometry
+        
+        Returns True if the areas and buttons were (re)computed, False if the
+        geometry is unchanged or the window could not be read.
+        """
+        transform = self.game_connector.get_client_transform()
+        if transform is None or transform.same_geometry(self.transform):
+            return False
+        
+        space = self.coordinate_space
+        self.areas = {name: ScreenArea(name, transform.area_to_screen(area, space))
+                      for name, area in self.area_calibration.items()}
+        self.collection_tabs_area = self.areas.get("collection_tabs")
+        self.dungeon_list_area = self.areas.get("dungeon_list")
+        self.collection_items_area = self.areas.get("collection_items")
+        self.buttons = {name: ScreenButton(name, transform.point_to_screen(coords, space),
+                                           self.BUTTON_PROBE_SIZE, name in self.HEAVY_BUTTONS)
+                        for name, coords in self.button_calibration.items()}
+        self.active_area = None
+        if self.frame_probe_calibration is not None:
+            self.frame_probe_area = transform.area_to_screen(self.frame_probe_calibration, space)
+        else:
+            size = self.FRAME_PROBE_SIZE
+            self.frame_probe_area = (transform.left + (transform.width - size) // 2,
+                                     transform.top + (transform.height - size) // 2, size, size)
+        self.transform = transform
+        
+        # Cached positions are screen pixels of the old geometry
+        self.scan_candidates = {}
+        self.skipped_dots = {}
+        self.tab_check_cache = (None, None)
+        return True
+
+    def get_button(self, button_type):
+        """ScreenButton for a calibrated button, or None"""
+        if self.transform is None and not self.resolve_coordinates():
+            return None
+        return self.buttons.get(button_type)
 
     def get_button_screen_coords(self, button_type):
         """Get screen coordinates for any button"""
-        coords_map = {
-            "auto_refill": self.auto_refill_coords,
-            "register": self.register_coords,
-            "yes": self.yes_coords,
-            "page_2": self.page_2_coords,
-            "page_3": self.page_3_coords,
-            "page_4": self.page_4_coords,
-            "arrow_right": self.arrow_right_coords
-        }
+        button = self.get_button(button_type)
+        return button.position if button is not None else None
+
+    def button_probe_area(self, button_type):
+        """Screen rectangle sampled around a button when probing its state"""
+        button = self.get_button(button_type)
+        return button.probe_rect if button is not None else None
+
+    def capture_button_reference(self, button_type, path):
+        """Capture the current look of a button as its reference patch and save it
         
-        coords = coords_map.get(button_type)
-        if coords and self.game_connector.is_connected():
-            window_rect = self.game_connector.get_window_rect()
-            if window_rect:
-                return (window_rect.left + coords[0], window_rect.top + coords[1])
-        return None
+        Take the Register reference while Register is enabled and the Yes
+        reference while the confirmation dialog is shown.
+        """
+        self.resolve_coordinates()
+        area = self.button_probe_area(button_type)
+        if area is None:
+            return False
+        patch = self.grab_area(area)
+        if patch is None:
+            return False
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not cv2.imwrite(path, patch):
+            return False
+        self.button_references[button_type] = patch
+        return True
+
+    def load_button_reference(self, button_type, path):
+        """Load a reference patch saved by capture_button_reference"""
+        patch = cv2.imread(path, cv2.IMREAD_COLOR) if path and os.path.exists(path) else None
+        if patch is None:
+            self.button_references.pop(button_type, None)
+            return False
+        self.button_references[button_type] = patch
+        return True
+
+    def probe_button(self, button_type):
+        """Compare a button's current pixels with its reference patch
+        
+        Returns "match", "differs", or "unknown" (no reference or capture failed)
+        """
+        reference = self.button_references.get(button_type)
+        area = self.button_probe_area(button_type)
+        if reference is None or area is None:
+            return "unknown"
+        
+        patch = self.capture_area(area)
+        if patch is None or patch.shape != reference.shape:
+            return "unknown"
+        
+        difference = float(np.mean(cv2.absdiff(patch, reference)))
+        return "match" if difference <= self.BUTTON_PROBE_MAX_DIFF else "differs"
 
     def scroll_in_item_area(self, direction="down", scroll_amount=5):
-        """Scroll in the item area using mouse wheel"""
+        """Scroll in the item area using mouse wheel (no-op once the run is cancelled)"""
         if not self.collection_items_area or not self.game_connector.is_connected():
             return False
+        if self.is_cancelled():
+            return False
             
+        if self.recorder:
+            self.recorder.record_input("scroll", direction=direction, amount=scroll_amount)
+        self.invalidate_scan(self.collection_items_area)
         try:
-            area_left, area_top, area_width, area_height = self.collection_items_area
-            center_x = area_left + area_width // 2
-            center_y = area_top + area_height // 2
+            screen_x, screen_y = self.collection_items_area.center
             
-            window_rect = self.game_connector.get_window_rect()
-            if window_rect:
-                screen_x = window_rect.left + center_x
-                screen_y = window_rect.top + center_y
-                
-                win32api.SetCursorPos((int(screen_x), int(screen_y)))
-                self.delay()
-                
-                wheel_dist = -scroll_amount if direction == "down" else scroll_amount
-                win32api.mouse_event(win32con.MOUSEEVENTF_WHEEL, int(screen_x), int(screen_y), wheel_dist * 120, 0)
-                self.delay()
-                return True
+            input_start = time.perf_counter()
+            moved = self.game_connector.move_cursor(screen_x, screen_y)
+            self.run_stats.add_time("click", time.perf_counter() - input_start)
+            if not moved:
+                return False
+            self.delay()
+            if self.is_cancelled():
+                return False
+            
+            wheel_dist = -scroll_amount if direction == "down" else scroll_amount
+            input_start = time.perf_counter()
+            scrolled = self.game_connector.scroll_wheel(screen_x, screen_y, wheel_dist)
+            self.run_stats.add_time("click", time.perf_counter() - input_start)
+            if not scrolled:
+                return False
+            self.last_input_time = time.monotonic()
+            self.frame_clock.mark_input()
+            self.run_stats.count("scrolls")
+            log_event("scroll", direction=direction, amount=scroll_amount)
+            self.delay()
+            return True
                 
         except Exception as e:
-            pass
+            log_exception("scroll_failed", e, direction=direction, amount=scroll_amount)
             
         return False
 
     def start(self):
         """Start the collection automation"""
+        # A stopped run may still be unwinding; two run threads would both send input
+        if self.thread is not None and self.thread.is_alive():
+            self.update_status("⚠ The previous run is still stopping - try again in a moment")
+            return False
+
         # Check if required areas and coordinates are set
-        missing_items = []
-        
-        if not self.collection_tabs_area:
-            missing_items.append("Collection tabs area")
-        if not self.dungeon_list_area:
-            missing_items.append("Dungeon list area")
-        if not self.collection_items_area:
-            missing_items.append("Collection items area")
-        if not self.auto_refill_coords:
-            missing_items.append("Auto Refill button")
-        if not self.register_coords:
-            missing_items.append("Register button") 
-        if not self.yes_coords:
-            missing_items.append("Yes button")
-        if not self.page_2_coords:
-            missing_items.append("Page 2 button")
-        if not self.page_3_coords:
-            missing_items.append("Page 3 button")
-        if not self.page_4_coords:
-            missing_items.append("Page 4 button")
-        if not self.arrow_right_coords:
-            missing_items.append("Arrow Right button")
+        missing_items = [label for name, label in self.REQUIRED_AREAS.items()
+                         if not self.area_calibration.get(name)]
+        missing_items += [label for name, label in self.REQUIRED_BUTTONS.items()
+                          if not self.button_calibration.get(name)]
             
         if missing_items:
             self.update_status(f"❌ Missing setup: {', '.join(missing_items)}")
@@ -273,168 +937,647 @@ class CollectionAutomation:
         if not self.game_connector.is_connected():
             self.update_status("❌ Not connected to game window")
             return False
+        
+        # Resolve the calibration once for this run's window geometry
+        self.transform = None
+        if not self.resolve_coordinates():
+            self.update_status("❌ Could not read the game window position")
+            return False
+
+        self.prepare_frame_ring()
+        
+        if self.prefetch_enabled:
+            self.prefetcher = CapturePrefetcher(self.grab_area)
+            self.prefetcher.start()
+        self.prefetch_sequence = None
+        self.active_area = None
+        
+        self.dungeon_index = DungeonIndex(self.dungeon_list_rows) if self.dungeon_list_rows else None
 
         # Start automation in separate thread
         self.running = True
-        threading.Thread(target=self._automation_loop, daemon=True).start()
+        self.result = None
+        self.stop_event.clear()
+        self.game_connector.set_input_cancel_event(self.stop_event)
+        self.game_connector.input_scheduler.reset_stats()
+        self.stop_requested_at = None
+        self.stop_latency_ms = None
+        self.paused = False
+        self.resume_event.set()
+        self.pause_snapshot = None
+        self.counters = {"registered": 0, "skipped_items": 0, "dungeons": 0, "tabs": 0}
+        self.started_at = time.monotonic()
+        self.deadline = time.monotonic() + self.time_budget_s if self.time_budget_s else None
+        self.frame_dump_reason = None
+        self.run_thread_active = True
+        self.thread = threading.Thread(target=self._automation_loop, daemon=True)
+        self.thread.start()
         return True
 
     def _automation_loop(self):
-        """Main automation loop"""
+        """Main automation loop - runs the collection action graph"""
         try:
             self.update_status("Automation started")
-            
-            while self.running:
-                if self.delay_ms > 0:
-                    self.update_status("🔍 Scanning collection tabs for red dots...")
-                tab_red_dots = self.find_red_dots_in_area(self.collection_tabs_area)
-                
-                if not tab_red_dots:
-                    self.update_status("✓ All collections complete!")
-                    break
-                
-                tab_dot_pos = tab_red_dots[0]
-                self.click_at_screen_position(tab_dot_pos[0], tab_dot_pos[1])
-                self.delay()
-                
-                self.process_dungeon_list(tab_dot_pos)
-                self.delay()
+            log_event("run_start", delay_ms=self.delay_ms, detector=dict(self.detector_settings),
+                      tab_policy=self.tab_planner.policy, coordinate_space=self.coordinate_space,
+                      areas={name: self.area_by_name(name).rect for name in self.REQUIRED_AREAS},
+                      time_budget_s=self.time_budget_s)
+            self.run_stats = RunStats()
+            self.run_stats.begin()
+            self.frame_clock = FrameClock()
+            if self.frame_sync_enabled:
+                self.calibrate_frame_clock()
+            self.flow_state = {"passes_without_progress": 0}
+            self.flow_engine = ActionGraphEngine(ActionGraph(self.collection_flow), self,
+                                                 self.delay, lambda: self.running,
+                                                 self.stop_event, self.wait_while_paused)
+            self.flow_engine.run()
+            self.report_input_stats()
                 
         except Exception as e:
+            self.result = RESULT_ERROR
+            log_exception("run_error", e,
+                          node=self.flow_engine.current_node if self.flow_engine is not None else None)
             self.update_status(f"❌ Automation error: {str(e)}")
+            self.dump_frame_ring("error")
         finally:
             self.running = False
-            self.update_status("Automation stopped")
+            if self.result is None:
+                self.result = RESULT_STOPPED
+            self.save_recording()
+            if self.save_tab_history is not None and self.flow_state.get("tabs_recorded"):
+                self.save_tab_history(self.tab_planner.history)
+            if self.prefetcher is not None:
+                self.prefetcher.stop()
+                self.prefetcher = None
+            if self.stop_requested_at is not None:
+                self.stop_latency_ms = (time.perf_counter() - self.stop_requested_at) * 1000
+            log_event("run_end", result=self.result,
+                      dungeons=self.dungeon_index.report() if self.dungeon_index is not None else None,
+                      **self.get_metrics())
+            self.finish_run_report()
+            if self.stop_requested_at is not None:
+                self.update_status(f"Automation stopped ({self.stop_latency_ms:.1f} ms after stop request)")
+            else:
+                self.update_status("Automation stopped")
+            with self.frame_dump_lock:
+                self.run_thread_active = False
+                dump_reason = self.frame_dump_reason
+                self.frame_dump_reason = None
+            if dump_reason is not None:
+                self.dump_frame_ring(dump_reason)
+            if self.frame_ring is not None:
+                self.frame_ring.close()
+
+    def finish_run_report(self):
+        """Close the cost report of the run, write it to report_dir and pass it to report_callback"""
+        self.run_stats.finish()
+        report = self.run_stats.report()
+        report["result"] = self.result
+        self.last_report = report
+        self.last_report_files = self.write_run_report(report)
+        log_event("run_report", files=self.last_report_files, **report)
+        if self.report_callback is not None:
+            try:
+                self.report_callback(report, self.last_report_files)
+            except Exception as e:
+                log_exception("report_callback_failed", e)
+
+    def write_run_report(self, report):
+        """Write a report as timestamped JSON and CSV files in report_dir; returns the paths"""
+        if not self.report_dir:
+            return []
+        base = os.path.join(self.report_dir, time.strftime("run_%Y%m%d_%H%M%S"))
+        try:
+            os.makedirs(self.report_dir, exist_ok=True)
+            RunStats.write_json(report, base + ".json")
+            RunStats.write_csv(report, base + ".csv")
+        except OSError as e:
+            log_exception("report_failed", e, path=base)
+            self.update_status(f"❌ Failed to write run report: {str(e)}")
+            return []
+        return [base + ".json", base + ".csv"]
+
+    def set_report_dir(self, directory):
+        """Write the cost report of each run to this directory (None = don't write)"""
+        self.report_dir = directory or None
+
+    def get_state(self):
+        """Current position of the run as a JSON-friendly dict"""
+        state = self.flow_state
+        engine = self.flow_engine
+        return {
+            "running": self.running,
+            "paused": self.paused,
+            "result": self.result,
+            "node": engine.current_node if engine is not None else None,
+            "tab": state.get("tab_key"),
+            "tab_position": state.get("tab_position"),
+            "tabs_planned": len(state.get("tab_plan", ())),
+            "page_group": state.get("page_group"),
+            "page": state.get("visible_page"),
+            "dungeon": state.get("dungeon_list_dot"),
+            "scroll_offset": self.item_tracker.offset,
+            "delay_ms": self.delay_ms,
+            "snapshot": self.snapshot_summary()
+        }
+
+    def get_metrics(self):
+        """Throughput counters, input stats and per-step timings of the current run"""
+        elapsed = time.monotonic() - self.started_at if self.started_at is not None else 0.0
+        registered = self.counters.get("registered", 0)
+        engine = self.flow_engine
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "counters": dict(self.counters),
+            "items_per_minute": round(registered * 60.0 / elapsed, 2) if elapsed > 0 else 0.0,
+            "input": self.game_connector.input_stats(),
+            "nodes": [{"node": name, "visits": visits, "seconds": round(seconds, 3)}
+                      for name, visits, seconds in (engine.report() if engine is not None else [])],
+            "frame_clock": self.frame_clock.stats() if self.frame_sync_enabled else None,
+            "cost": self.run_stats.run.to_dict(time.perf_counter()),
+            "stop_latency_ms": self.stop_latency_ms
+        }
+
+    def report_input_stats(self):
+        """Show rate limiter counters per input kind in the status output"""
+        stats = self.game_connector.input_stats()
+        per_kind = self.format_per_kind
+        self.update_status(f"Inputs: {per_kind(stats['sent'])} sent, {per_kind(stats['throttled'])} throttled "
+                           f"({per_kind(stats['throttle_seconds'], ' s')}), "
+                           f"max queue depth {stats['max_queue_depth']}")
+
+    @staticmethod
+    def format_per_kind(counts, unit=""):
+        """Input counters per kind, e.g. light 58 / heavy 12"""
+        return " / ".join(f"{kind} {value}{unit}" for kind, value in counts.items()) or "0"
 
-    def process_dungeon_list(self, original_tab_position):
-        """Process all dungeons/entries with red dots in the current tab"""
-        current_page = 1
+    def area_by_name(self, area_name):
+        """Configured detection area (ScreenArea) for a name used in the action graph"""
+        return self.areas[area_name]
+
+    # Actions of the collection action graph (see data/collection_flow.py).
+    # Each returns an outcome string used to pick the next node.
+
+    def action_scan_tabs(self):
+        """Scan the tab strip once and plan the order of all tabs with a red dot"""
+        moved = self.resolve_coordinates()
+        if moved:
+            self.update_status("↻ Game window moved - calibration re-applied")
+        if (self.frame_sync_enabled and self.frame_clock.calibrated and
+                (moved or self.frame_clock.needs_refresh(time.perf_counter()))):
+            self.calibrate_frame_clock(announce=False)
+        if self.delay_ms > 0:
+            self.update_status("🔍 Scanning collection tabs for red dots...")
+        tab_red_dots = self.find_red_dots_in_area(self.collection_tabs_area)
         
-        while self.running and self.tab_still_has_red_dot(original_tab_position):
-            found_dungeons = self.process_dungeons_on_current_page()
-            
-            if found_dungeons:
-                current_page = 1
+        if not len(tab_red_dots):
+            # An empty scan of a vanished/minimized window is not a finished collection
+            if not self.game_connector.is_window_available():
+                self.result = RESULT_WINDOW_LOST
+                self.update_status("❌ Game window lost")
             else:
-                current_page += 1
-                
-                if current_page <= 4:
-                    coords = self.get_button_screen_coords(f"page_{current_page}")
-                    if coords:
-                        self.click_at_screen_position(coords[0], coords[1])
-                        self.delay()
-                else:
-                    coords = self.get_button_screen_coords("arrow_right")
-                    if coords and self.click_at_screen_position(coords[0], coords[1]):
-                        self.delay()
-                        current_page = 1
-                    else:
-                        break
-
-    def process_dungeons_on_current_page(self):
-        """Process all dungeons with red dots on the current page"""
-        items_processed = False
-        
-        while self.running:
-            # Use the optimized version that only finds the first red dot (much faster)
-            dungeon_red_dots = self.find_red_dots_in_area(self.dungeon_list_area, first_only=True)
-            if not dungeon_red_dots:
-                break
-            
-            dungeon_dot_pos = dungeon_red_dots[0]
-            self.click_at_screen_position(dungeon_dot_pos[0], dungeon_dot_pos[1])
-            self.delay()
-            
-            if self.process_collection_items():
-                items_processed = True
-            self.delay()
-                
-        return items_processed
+                self.result = RESULT_COMPLETE
+                self.update_status("✓ All collections complete!")
+            return "empty"
+        
+        self.flow_state["tab_plan"] = self.tab_planner.plan(
+            [(x, y) for x, y in tab_red_dots.tolist()], self.collection_tabs_area.left)
+        self.flow_state["round_progress"] = False
+        return "found"
 
-    def tab_still_has_red_dot(self, original_tab_position):
-        """Check if the specific tab we clicked still has a red dot"""
-        tab_red_dots = self.find_red_dots_in_area(self.collection_tabs_area)
+    def action_click_tab(self):
+        """Open the next tab of the plan and reset the per-tab state"""
+        tab_dot_pos = self.flow_state["tab_plan"].pop(0)
+        self.click_at_screen_position(tab_dot_pos[0], tab_dot_pos[1])
+        self.invalidate_scan()
+        self.flow_state.update(tab_position=tab_dot_pos, page=1, page_group=0, visible_page=1,
+                               tab_progress=False, page_progress=False, page_signature=None,
+                               last_paging=None, tab_key=self.tab_key(tab_dot_pos),
+                               tab_registered=0, tab_started=time.perf_counter())
+        self.run_stats.begin_tab(self.flow_state["tab_key"], f"tab {self.flow_state['tab_key']}")
+        return "ok"
+
+    def tab_key(self, tab_position):
+        """Stable number for a tab position, matching earlier positions within TAB_DOT_TOLERANCE"""
+        tabs = self.flow_state.setdefault("tabs", [])
+        tolerance_sq = self.TAB_DOT_TOLERANCE * self.TAB_DOT_TOLERANCE
+        for key, position in enumerate(tabs):
+            if (position[0] - tab_position[0])**2 + (position[1] - tab_position[1])**2 <= tolerance_sq:
+                return key
+        tabs.append(tab_position)
+        return len(tabs) - 1
+
+    def action_check_tab(self):
+        """Check whether the open tab still has a red dot"""
+        return "yes" if self.tab_still_has_red_dot(self.flow_state["tab_position"]) else "no"
+
+    def action_finish_tab(self):
+        """End a tab pass
         
-        # Check if any red dot is close to our original tab position (within 20 pixels)
-        tolerance = 20
-        for red_dot_pos in tab_red_dots:
-            distance = ((red_dot_pos[0] - original_tab_position[0])**2 + 
-                       (red_dot_pos[1] - original_tab_position[1])**2)**0.5
-            if distance <= tolerance:
-                return True
+        Returns "next" while the plan has tabs left, then "continue" to
+        confirm with a new tab strip scan. Gives up as "stuck" after
+        STUCK_PASS_LIMIT whole plans without progress.
+        """
+        state = self.flow_state
+        self.tab_planner.record(state["tab_position"][0] - self.collection_tabs_area.left,
+                                state["tab_registered"], time.perf_counter() - state["tab_started"])
+        state["tabs_recorded"] = True
+        self.counters["tabs"] += 1
+        self.run_stats.end_tab()
+        if state.get("tab_progress"):
+            state["round_progress"] = True
+        if state["tab_plan"]:
+            return "next"
         
-        return False
+        if state["round_progress"]:
+            state["passes_without_progress"] = 0
+            return "continue"
+        
+        state["passes_without_progress"] += 1
+        if state["passes_without_progress"] >= self.STUCK_PASS_LIMIT:
+            self.result = RESULT_STUCK
+            self.update_status("❌ Stuck - tab red dot does not clear")
+            return "stuck"
+        return "continue"
 
-    def process_collection_items(self):
-        """Process all collection items with red dots"""
-        items_processed = False
+    def action_index_page(self):
+        """Hash the rows of the visible dungeon list page and remember its dots
         
-        self.scroll_in_item_area(direction="up", scroll_amount=20)
-        self.delay()
+        Returns "clear" if no row has a red dot, "unchanged" if the arrow
+        button did not change the list (end of the list), otherwise "scan".
+        Without a row index every page is scanned.
+        """
+        index = self.dungeon_index
+        if index is None or self.detector is None:
+            return "scan"
         
-        for position in range(4):
-            if not self.running:
-                break
-            
-            if self.process_all_items_at_current_position():
-                items_processed = True
-            
-            if position < 3:
-                self.scroll_in_item_area(direction="down", scroll_amount=8)
-                self.delay()
-                
-        return items_processed
+        area = self.dungeon_list_area
+        frame = self.capture_area(area.rect)
+        if frame is None:
+            return "scan"
+        
+        state = self.flow_state
+        signature = index.signature(frame)
+        if state.get("last_paging") == "arrow" and index.same_signature(
+                signature, state.get("previous_signature")):
+            # The arrow click did not move the list: undo the group change
+            state["page_group"] -= 1
+            state["visible_page"] = state["previous_page"]
+            state["last_paging"] = None
+            return "unchanged"
+        state["page_signature"] = signature
+        state["last_paging"] = None
+        
+        # Skipped dungeons still count as dots, so their page is not marked clear
+        all_dots = self.detect_in_frame(area.rect, area.name, frame)
+        dot_rows = {index.row_of(frame.shape[0], y) for y in (all_dots[:, 1] - area.top).tolist()}
+        index.index_page(self.dungeon_page_key(), signature, dot_rows)
+        
+        # The full scan seeds next_red_dot so scan_dungeon only re-verifies
+        dots = without_near(all_dots, self.skipped_dots.get("dungeon_list", ()), self.CANDIDATE_TOLERANCE)
+        
+        if not len(dots):
+            self.scan_candidates.pop("dungeon_list", None)
+            return "clear"
+        self.scan_candidates["dungeon_list"] = dots
+        return "scan"
+
+    def dungeon_page_key(self, page=None):
+        """Row index key (tab, page group, page) of a page of the open tab"""
+        state = self.flow_state
+        return (state.get("tab_key", 0), state.get("page_group", 0),
+                page if page is not None else state.get("visible_page", 1))
 
-    def process_all_items_at_current_position(self):
-        """Process items with red dots at the current scroll position"""
-        items_processed = False
+    def current_dungeon(self):
+        """Row index entry of the dungeon being visited, or None"""
+        dot = self.flow_state.get("dungeon_list_dot")
+        if self.dungeon_index is None or dot is None:
+            return None
+        area = self.dungeon_list_area
+        return self.dungeon_index.entry_at(self.dungeon_page_key(), area.height, dot[1] - area.top)
+
+    def action_restore_position(self):
+        """Reopen the tab, page group and page the run was on before a pause"""
+        state = self.flow_state
+        tab_position = state.get("tab_position")
+        if tab_position is None:
+            return "rescan"
         
-        while self.running:
-            item_red_dots = self.find_red_dots_in_area(self.collection_items_area)
-            if not item_red_dots:
-                break
-            
-            item_dot_pos = item_red_dots[0]
-            self.click_at_screen_position(item_dot_pos[0], item_dot_pos[1])
-            self.delay()
-            
-            if self.execute_button_sequence():
-                items_processed = True
+        self.click_at_screen_position(tab_position[0], tab_position[1])
+        self.invalidate_scan()
+        self.delay()
+        for _ in range(state.get("page_group", 0)):
+            coords = self.get_button_screen_coords("arrow_right")
+            if not coords or not self.click_at_screen_position(coords[0], coords[1]):
+                return "rescan"
             self.delay()
-                
-        return items_processed
+        page = state.get("visible_page", 1)
+        if page > 1:
+            coords = self.get_button_screen_coords(f"page_{page}")
+            if not coords or not self.click_at_screen_position(coords[0], coords[1]):
+                return "rescan"
+        
+        # Same page as before the pause: dungeons found futile there stay skipped
+        self.skipped_dots["dungeon_list"] = list(state.pop("restore_skipped", []))
+        state.update(page=page, page_progress=False, page_signature=None, last_paging=None)
+        return "restored"
 
-    def execute_button_sequence(self):
-        """Execute the button sequence: Auto Refill -> Register -> Yes"""
-        if not self.running:
-            return False
+    def action_find_dot(self, area):
+        """Find the next red dot in a named area"""
+        dot = self.next_red_dot(self.area_by_name(area))
+        if not dot:
+            return "empty"
+        self.flow_state["dot"] = dot
+        self.flow_state["dot_area"] = area
+        self.flow_state[area + "_dot"] = dot
+        return "found"
+
+    def action_click_dot(self, invalidate=(), next_area=None):
+        """Click the last found red dot
         
-        # Auto Refill
-        coords = self.get_button_screen_coords("auto_refill")
-        if not coords or not self.click_at_screen_position(coords[0], coords[1]):
-            return False
-        self.delay()
+        Args:
+            invalidate: Area names whose remembered dots become stale
+            next_area: Area the next scan will look at (for capture prefetch)
+        """
+        dot = self.flow_state["dot"]
+        if self.flow_state.get("dot_area") == "dungeon_list":
+            self.run_stats.begin_dungeon(*self.dungeon_report_key())
+        self.click_at_screen_position(dot[0], dot[1])
+        if self.flow_state.get("dot_area") == "collection_items":
+            # Each item is visited once, even if its dot survives the visit
+            area = self.collection_items_area
+            self.item_tracker.mark_visited(dot[0] - area.left, dot[1] - area.top)
+            self.skipped_dots.setdefault("collection_items", []).append(dot)
+        for area_name in invalidate:
+            self.invalidate_scan(self.area_by_name(area_name))
+        if next_area:
+            self.active_area = self.area_by_name(next_area)
+        return "ok"
+
+    def dungeon_report_key(self):
+        """(key, label) of the dungeon being opened, for the cost report
         
-        # Register
-        coords = self.get_button_screen_coords("register")
-        if not coords or not self.click_at_screen_position(coords[0], coords[1]):
-            return False
-        self.delay()
+        With a row index the dungeon is identified by its row hash, so it
+        keeps its entry when the list shifts; otherwise by its page and row offset.
+        """
+        tab, page_group, page = self.dungeon_page_key()
+        dungeon = self.current_dungeon()
+        if dungeon is not None:
+            return (dungeon.row_hash, f"tab {tab} group {page_group} page {page} [{dungeon.row_hash:016x}]")
+        row_y = self.flow_state["dungeon_list_dot"][1] - self.dungeon_list_area.top
+        return ((tab, page_group, page, row_y), f"tab {tab} group {page_group} page {page} y {row_y}")
+
+    def action_scroll_items(self, direction, amount, reset=False, max_positions=None):
+        """Scroll the item panel
+        
+        With reset=True the scroll position counter restarts at 0. With
+        max_positions, returns "last" instead of scrolling once that many
+        positions have been visited.
+        """
+        if reset:
+            self.flow_state["item_position"] = 0
+        elif max_positions is not None:
+            if self.flow_state.get("item_position", 0) + 1 >= max_positions:
+                return "last"
+            self.flow_state["item_position"] = self.flow_state.get("item_position", 0) + 1
         
-        # Yes
-        coords = self.get_button_screen_coords("yes")
-        if not coords or not self.click_at_screen_position(coords[0], coords[1]):
+        self.scroll_in_item_area(direction=direction, scroll_amount=amount)
+        return "scrolled"
+
+    def action_track_items(self, reset=False):
+        """Capture the item panel and align it with the previous capture
+        
+        With reset=True the panel is taken to be at the top of a new list.
+        Returns "bottom" if the last scroll did not move the panel, "clear" if
+        no unvisited item has a red dot, otherwise "scan". Visited items of the
+        stitched map are skipped by the following scans.
+        """
+        area = self.collection_items_area
+        frame = self.capture_area(area.rect)
+        if frame is None or self.detector is None:
+            return "scan"
+        
+        tracker = self.item_tracker
+        if reset:
+            tracker.reset(frame)
+        else:
+            tracker.update(frame)
+            if tracker.at_bottom():
+                return "bottom"
+        
+        skipped = [(area.left + x, area.top + y) for x, y in tracker.visible_visited(area.height)]
+        self.skipped_dots["collection_items"] = skipped
+        
+        # The full scan seeds next_red_dot so scan_item only re-verifies
+        dots = without_near(self.detect_in_frame(area.rect, area.name, frame), skipped,
+                            self.CANDIDATE_TOLERANCE)
+        if not len(dots):
+            self.scan_candidates.pop("collection_items", None)
+            return "clear"
+        self.scan_candidates["collection_items"] = dots
+        return "scan"
+
+    def action_click_button(self, button):
+        """Click a calibrated button"""
+        if button == self.SEQUENCE_BUTTONS[0]:
+            self.run_stats.count("sequences_attempted")
+        target = self.get_button(button)
+        if target is None or not self.click_at_screen_position(*target.position, heavy=target.heavy):
+            if button in self.SEQUENCE_BUTTONS:
+                self.run_stats.count("sequences_failed")
+            return "failed"
+        return "ok"
+
+    def action_probe_button(self, button):
+        """Probe a button against its calibrated reference patch"""
+        return self.probe_button(button)
+
+    def action_skip_dot(self):
+        """Remember the last found dot as futile so scans of its area pass over it"""
+        self.skipped_dots.setdefault(self.flow_state["dot_area"], []).append(self.flow_state["dot"])
+        self.counters["skipped_items"] += 1
+        return "ok"
+
+    def action_mark_registered(self):
+        """Record that an item was registered in this dungeon, page and tab"""
+        self.flow_state["dungeon_progress"] = True
+        self.flow_state["page_progress"] = True
+        self.flow_state["tab_progress"] = True
+        self.flow_state["tab_registered"] += 1
+        self.counters["registered"] += 1
+        self.run_stats.count("registered")
+        dungeon = self.current_dungeon()
+        if dungeon is not None:
+            dungeon.registered += 1
+        return "ok"
+
+    def action_finish_dungeon(self):
+        """End a dungeon visit; a dungeon that yielded nothing is skipped on this page"""
+        self.counters["dungeons"] += 1
+        self.run_stats.end_dungeon()
+        dungeon = self.current_dungeon()
+        if dungeon is not None:
+            dungeon.visits += 1
+        if not self.flow_state.get("dungeon_progress"):
+            self.skipped_dots.setdefault("dungeon_list", []).append(
+                self.flow_state["dungeon_list_dot"])
+            if dungeon is not None:
+                dungeon.stuck = True
+        self.flow_state["dungeon_progress"] = False
+        return "ok"
+
+    def action_next_page(self, pages):
+        """Move to the next dungeon list page
+        
+        Stays on the current page group (outcome "reset") if the page yielded
+        items. After the last page of a group, the arrow button moves to the
+        next group. Pages the row index knows to be clear are not opened.
+        """
+        state = self.flow_state
+        if state.get("page_progress"):
+            state["page"] = 1
+            state["page_progress"] = False
+            return "reset"
+        
+        state["page"] += 1
+        index = self.dungeon_index
+        while (index is not None and state["page"] <= pages and
+               index.is_page_clear(self.dungeon_page_key(state["page"]))):
+            state["page"] += 1
+        
+        state["previous_signature"] = state.get("page_signature")
+        state["previous_page"] = state.get("visible_page", 1)
+        if state["page"] <= pages:
+            coords = self.get_button_screen_coords(f"page_{state['page']}")
+            if not coords:
+                return "skipped"
+            self.click_at_screen_position(coords[0], coords[1])
+            self.invalidate_scan(self.dungeon_list_area)
+            state["visible_page"] = state["page"]
+            state["last_paging"] = "page"
+            self.run_stats.count("pages")
+            return "paged"
+        
+        coords = self.get_button_screen_coords("arrow_right")
+        if coords and self.click_at_screen_position(coords[0], coords[1]):
+            self.invalidate_scan(self.dungeon_list_area)
+            state["page"] = 1
+            state["page_group"] += 1
+            state["visible_page"] = 1
+            state["last_paging"] = "arrow"
+            self.run_stats.count("pages")
+            return "paged"
+        return "exhausted"
+
+    def action_wait(self):
+        """Do nothing; used for nodes that only wait"""
+        return "ok"
+
+    def condition_dot_cleared(self, tolerance=4):
+        """Wait condition: the last clicked red dot is gone"""
+        dot = self.flow_state.get("dot")
+        if dot is None:
+            return True
+        window = self.dot_window(self.area_by_name(self.flow_state["dot_area"]), dot, tolerance)
+        if window[2] <= 0 or window[3] <= 0:
+            return True
+        return not len(self.scan(window, first_only=True))
+
+    def dot_window(self, area, position, tolerance):
+        """Small capture rectangle around a dot position, clipped to area
+        
+        Covers every template placement whose center is within tolerance of
+        the position.
+        """
+        extent_left, extent_top, extent_right, extent_bottom = self.dot_extent
+        x, y = position
+        return area.clip(x - tolerance - extent_left, y - tolerance - extent_top,
+                         x + tolerance + extent_right, y + tolerance + extent_bottom)
+
+    def tab_check_area(self, tab_position):
+        """Capture rectangle for tab_still_has_red_dot, cached per tab position"""
+        cached_position, cached_area = self.tab_check_cache
+        if cached_position == tab_position and cached_area is not None:
+            return cached_area
+        
+        area = self.dot_window(self.collection_tabs_area, tab_position, self.TAB_DOT_TOLERANCE)
+        self.tab_check_cache = (tab_position, area)
+        return area
+
+    def next_red_dot(self, area):
+        """Find the next red dot to process in area, scanning incrementally
+        
+        A full scan remembers the remaining dots as candidates. Later calls only
+        re-verify a small window around each candidate and fall back to a full
+        scan once the candidates run out. Call invalidate_scan() whenever the
+        area's content moves (scrolling, paging, switching tab or dungeon).
+        
+        Returns:
+            (x, y) screen position of a red dot, or None if the area has none
+        """
+        region = area.name
+        candidates = self.scan_candidates.get(region)
+        skipped = self.skipped_dots.get(region, ())
+        
+        while candidates is not None and len(candidates) and self.running:
+            candidate = dot_tuple(candidates)
+            candidates = self.scan_candidates[region] = candidates[1:]
+            if self.is_skipped(candidate, skipped):
+                continue
+            window = self.dot_window(area, candidate, self.CANDIDATE_TOLERANCE)
+            if window[2] <= 0 or window[3] <= 0:
+                continue
+            dots = self.scan(window, first_only=True)
+            if len(dots):
+                return dot_tuple(dots)
+        
+        dots = without_near(self.find_red_dots_in_area(area), skipped, self.CANDIDATE_TOLERANCE)
+        if not len(dots):
+            self.scan_candidates.pop(region, None)
+            return None
+        self.scan_candidates[region] = dots[1:]
+        return dot_tuple(dots)
+
+    def is_skipped(self, dot, skipped):
+        """Check if a dot lies within CANDIDATE_TOLERANCE of a skipped dot"""
+        tolerance_sq = self.CANDIDATE_TOLERANCE * self.CANDIDATE_TOLERANCE
+        return any((dot[0] - other[0])**2 + (dot[1] - other[1])**2 <= tolerance_sq
+                   for other in skipped)
+
+    def invalidate_scan(self, area=None):
+        """Forget remembered and skipped dots for one area (or all areas)"""
+        if area is None:
+            self.scan_candidates.clear()
+            self.skipped_dots.clear()
+        else:
+            self.scan_candidates.pop(area.name, None)
+            self.skipped_dots.pop(area.name, None)
+
+    def tab_still_has_red_dot(self, original_tab_position):
+        """Check if the specific tab we clicked still has a red dot
+        
+        Only the small window around the remembered dot is captured and matched
+        """
+        if self.detector is None:
             return False
-        self.delay()
+        check_area = self.tab_check_area(original_tab_position)
+        if check_area[2] <= 0 or check_area[3] <= 0:
+            return False
+        tab_red_dots = self.scan(check_area)
         
-        return True
+        # Check if any red dot is close to our original tab position
+        return any_near(tab_red_dots, original_tab_position, self.TAB_DOT_TOLERANCE)
 
     def stop(self):
         """Stop the automation"""
-        self.running = False
+        self.stop_requested_at = time.perf_counter()
+        self.cancel()
         self.update_status("Stopping collection automation...")
 
     def emergency_stop(self):
         """Emergency stop the automation"""
-        self.running = False
-        self.update_status("🚨 Collection automation emergency stopped!")
\ No newline at end of file
+        self.stop_requested_at = time.perf_counter()
+        self.cancel()
+        self.update_status("🚨 Collection automation emergency stopped!")
+        self.request_frame_dump("emergency_stop")
\ No newline at end of file
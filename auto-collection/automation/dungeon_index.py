@@ -0,0 +1,141 @@
+# Perceptual-hash index of dungeon list rows
+# The dungeon list area is split into equal rows and each row's pixels are
+# reduced to a 64-bit difference hash (dHash). Hashes are compared by Hamming
+# distance, so the small red dot or a selection highlight does not change a
+# row's identity. This lets paging skip pages already known to be clear,
+# detect when the arrow button no longer changes the list, and report results
+# per dungeon.
+
+import cv2
+import numpy as np
+
+# Bit weights for packing the 8x8 dHash comparison grid into one integer
+HASH_BITS = 1 << np.arange(64, dtype=np.uint64)
+
+
+class DungeonRow:
+    def __init__(self, row_hash, page):
+        """State of one dungeon list entry"""
+        self.row_hash = row_hash
+        self.page = page          # (tab key, page group, page) where it was last seen
+        self.has_dot = False
+        self.visits = 0
+        self.registered = 0
+        self.stuck = False
+
+    def to_dict(self):
+        """Plain representation for reports"""
+        return {
+            "row_hash": f"{self.row_hash:016x}",
+            "tab": self.page[0],
+            "page_group": self.page[1],
+            "page": self.page[2],
+            "has_dot": self.has_dot,
+            "visits": self.visits,
+            "registered": self.registered,
+            "stuck": self.stuck
+        }
+
+
+class DungeonIndex:
+    # Max differing bits for two row hashes to count as the same dungeon
+    MAX_HAMMING = 6
+
+    def __init__(self, rows):
+        """Initialize an index for a dungeon list showing `rows` entries per page"""
+        if rows <= 0:
+            raise ValueError("Dungeon list row count must be positive")
+        self.rows = rows
+        self.entries = []
+        self.page_rows = {}   # page key -> [DungeonRow, ...] in display order
+
+    @staticmethod
+    def row_hash(row_image):
+        """64-bit difference hash of a BGR or grayscale row image"""
+        if row_image.ndim == 3:
+            row_image = cv2.cvtColor(row_image, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(row_image, (9, 8), interpolation=cv2.INTER_AREA)
+        bits = (small[:, 1:] > small[:, :-1]).ravel()
+        return int(np.sum(HASH_BITS[bits]))
+
+    @staticmethod
+    def hamming(hash_a, hash_b):
+        """Number of differing bits between two hashes"""
+        return bin(hash_a ^ hash_b).count("1")
+
+    def row_height(self, frame_height):
+        """Height in pixels of one list row"""
+        return frame_height / self.rows
+
+    def row_of(self, frame_height, y):
+        """Row number for a y coordinate relative to the list area"""
+        return min(self.rows - 1, max(0, int(y / self.row_height(frame_height))))
+
+    def find(self, row_hash, tab_key):
+        """Closest known entry of the same tab within MAX_HAMMING bits, or None"""
+        best = None
+        best_distance = self.MAX_HAMMING + 1
+        for entry in self.entries:
+            if entry.page[0] != tab_key:
+                continue
+            distance = self.hamming(entry.row_hash, row_hash)
+            if distance < best_distance:
+                best, best_distance = entry, distance
+        return best
+
+    def signature(self, frame):
+        """Row hashes of a dungeon list frame, in display order"""
+        row_height = self.row_height(frame.shape[0])
+        hashes = []
+        for row in range(self.rows):
+            top = int(round(row * row_height))
+            bottom = int(round((row + 1) * row_height))
+            if bottom - top < 1:
+                continue
+            hashes.append(self.row_hash(frame[top:bottom]))
+        return tuple(hashes)
+
+    def index_page(self, page, signature, dot_rows):
+        """Update the state of every row shown on a page
+
+        Args:
+            page: Page key (tab key, page group, page)
+            signature: Row hashes from signature()
+            dot_rows: Row numbers that have a red dot
+        """
+        rows = []
+        for row, row_hash in enumerate(signature):
+            entry = self.find(row_hash, page[0])
+            if entry is None:
+                entry = DungeonRow(row_hash, page)
+                self.entries.append(entry)
+            entry.page = page
+            entry.has_dot = row in dot_rows
+            rows.append(entry)
+        self.page_rows[page] = rows
+
+    def same_signature(self, signature_a, signature_b):
+        """Check if two page signatures show the same rows"""
+        if not signature_a or not signature_b or len(signature_a) != len(signature_b):
+            return False
+        return all(self.hamming(a, b) <= self.MAX_HAMMING
+                   for a, b in zip(signature_a, signature_b))
+
+    def is_page_clear(self, page):
+        """Check if a page was indexed and none of its rows had a red dot"""
+        rows = self.page_rows.get(page)
+        return bool(rows) and not any(entry.has_dot for entry in rows)
+
+    def entry_at(self, page, frame_height, y):
+        """Entry shown at y (relative to the list area) on an indexed page, or None"""
+        rows = self.page_rows.get(page)
+        if not rows:
+            return None
+        row = self.row_of(frame_height, y)
+        return rows[row] if row < len(rows) else None
+
+    def report(self):
+        """All visited dungeons as dicts, most registered first"""
+        visited = [entry for entry in self.entries if entry.visits]
+        visited.sort(key=lambda entry: (-entry.registered, entry.page))
+        return [entry.to_dict() for entry in visited]
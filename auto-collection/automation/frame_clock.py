@@ -0,0 +1,148 @@
+# Estimates when the game presents frames, to time captures after input
+# The D3D client reads input at the start of a frame and shows the result when
+# that frame is presented, so a capture taken too soon after a click still
+# shows the old pixels. The clock samples a small region that changes every
+# frame (by default the 3D scene at the center of the client area), fits the
+# times the pixels changed to a frame period and phase, and predicts the first
+# present that can reflect an input: input at time t is read by the frame
+# starting at the next boundary and presented one period later.
+#
+# All times are time.perf_counter() seconds.
+
+import math
+import time
+import numpy as np
+
+
+class FrameClock:
+    # Fewest observed frame changes for a usable estimate
+    MIN_CHANGES = 8
+    # Plausible frame periods (360 fps .. 4 fps)
+    MIN_PERIOD_S = 1.0 / 360
+    MAX_PERIOD_S = 0.25
+    # Safety margin after the predicted present, as a fraction of a period
+    MARGIN_RATIO = 0.25
+    # Phase predictions are trusted while their uncertainty is below this fraction of a period
+    MAX_PHASE_ERROR_RATIO = 0.25
+
+    def __init__(self):
+        """Initialize an uncalibrated clock"""
+        self.period = None        # Seconds per presented frame
+        self.phase = None         # Time of a frame boundary (the last observed change)
+        self.period_error = 0.0   # Standard error of the period
+        self.jitter = 0.0         # Standard deviation of observed change times around the fit
+        self.last_input = None    # Time the last input was sent
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clear the wait counters"""
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.calibrations = 0
+
+    @property
+    def calibrated(self):
+        return self.period is not None
+
+    def calibrate(self, grab_func, area, duration_s=0.5, stop_event=None):
+        """Sample area for duration_s and fit the frame period; returns True if calibrated
+
+        Args:
+            grab_func: Captures an area and returns an array (or None)
+            area: Small screen region that changes every frame
+            duration_s: Sampling time
+            stop_event: Optional threading.Event that aborts sampling
+        """
+        previous = grab_func(area)
+        if previous is None:
+            return False
+        changes = []
+        end = time.perf_counter() + duration_s
+        while time.perf_counter() < end:
+            if stop_event is not None and stop_event.is_set():
+                return False
+            frame = grab_func(area)
+            now = time.perf_counter()
+            if frame is None:
+                return False
+            if not np.array_equal(frame, previous):
+                changes.append(now)
+                previous = frame
+        self.calibrations += 1
+        return self.fit(changes)
+
+    def fit(self, changes):
+        """Fit period and phase to times at which the sampled pixels changed"""
+        self.period = None
+        if len(changes) < self.MIN_CHANGES:
+            return False
+        times = np.asarray(changes, dtype=np.float64)
+        intervals = np.diff(times)
+
+        # Unchanged frames make some intervals multiples of the period
+        base = float(np.percentile(intervals, 25))
+        if not self.MIN_PERIOD_S <= base <= self.MAX_PERIOD_S:
+            return False
+        frame_numbers = np.concatenate(([0.0], np.cumsum(np.maximum(1.0, np.round(intervals / base)))))
+
+        period, phase = np.polyfit(frame_numbers, times, 1)
+        if not self.MIN_PERIOD_S <= period <= self.MAX_PERIOD_S:
+            return False
+        residuals = times - (phase + period * frame_numbers)
+        spread = float(np.sum((frame_numbers - frame_numbers.mean()) ** 2))
+
+        self.period = float(period)
+        self.phase = float(phase + period * frame_numbers[-1])
+        self.jitter = float(np.std(residuals))
+        self.period_error = self.jitter / math.sqrt(spread) if spread > 0 else self.period
+        return True
+
+    def phase_error(self, at_time):
+        """Uncertainty of the predicted frame boundaries around at_time"""
+        frames = abs(at_time - self.phase) / self.period
+        return frames * self.period_error + self.jitter
+
+    def needs_refresh(self, at_time):
+        """Check if the phase has drifted too far to predict boundaries"""
+        return (not self.calibrated or
+                self.phase_error(at_time) >= self.period * self.MAX_PHASE_ERROR_RATIO)
+
+    def mark_input(self):
+        """Record that an input was just sent"""
+        self.last_input = time.perf_counter()
+
+    def fresh_frame_time(self, input_time):
+        """First time a capture can show the effect of an input sent at input_time"""
+        period = self.period
+        if period is None:
+            return input_time
+        if self.needs_refresh(input_time):
+            # Phase unknown: two periods after the input always include the present
+            target = input_time + 2 * period
+        else:
+            target = self.phase + (math.floor((input_time - self.phase) / period) + 2) * period
+        return target + period * self.MARGIN_RATIO
+
+    def wait_needed(self, now=None):
+        """Seconds to wait before a capture shows the last input (0 if already fresh)"""
+        if self.period is None or self.last_input is None:
+            return 0.0
+        now = time.perf_counter() if now is None else now
+        return max(0.0, self.fresh_frame_time(self.last_input) - now)
+
+    def record_wait(self, seconds):
+        """Count a wait made before a capture"""
+        self.waits += 1
+        self.wait_seconds += seconds
+
+    def stats(self):
+        """Period estimate and wait counters"""
+        return {
+            "calibrated": self.calibrated,
+            "fps": round(1.0 / self.period, 1) if self.period else None,
+            "period_ms": round(self.period * 1000, 3) if self.period else None,
+            "jitter_ms": round(self.jitter * 1000, 3),
+            "calibrations": self.calibrations,
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 3)
+        }
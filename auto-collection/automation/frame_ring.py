@@ -0,0 +1,146 @@
+# Fixed-size ring buffer of recently captured region frames for debugging
+# All storage is allocated once; writes copy into a preallocated slot so the
+# steady state does no per-frame allocation. With a file path the buffer is a
+# memory-mapped file and can still be dumped after a crash (see open_file):
+# the header marks the ring as in use until close(), and create() reopens an
+# existing file instead of truncating it, so the next start can tell that the
+# previous run was interrupted and dump its frames first; begin() then empties it.
+
+import os
+import time
+
+import cv2
+import numpy as np
+
+# Region names stored as small integer codes in the slot metadata
+REGION_NAMES = ("custom", "collection_tabs", "dungeon_list", "collection_items")
+
+# Metadata columns: sequence number (0 = empty), timestamp, height, width, region code
+META_COLUMNS = 5
+
+
+class FrameRingBuffer:
+    def __init__(self, capacity, max_height, max_width, path=None):
+        """Preallocate capacity frames of up to max_height x max_width BGR pixels"""
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive")
+
+        self.capacity = capacity
+        self.max_height = max_height
+        self.max_width = max_width
+        self.path = path
+
+        frame_shape = (capacity, max_height, max_width, 3)
+        # Row 0 of the metadata is a header: capacity, max_height, max_width, next sequence,
+        # in use (1 from begin() until close())
+        meta_shape = (capacity + 1, META_COLUMNS)
+        if path:
+            self.frames = np.memmap(path, dtype=np.uint8, mode="w+", shape=frame_shape)
+            self.meta = np.memmap(path + ".meta", dtype=np.float64, mode="w+", shape=meta_shape)
+        else:
+            self.frames = np.zeros(frame_shape, dtype=np.uint8)
+            self.meta = np.zeros(meta_shape, dtype=np.float64)
+
+        self.meta[0, :4] = (capacity, max_height, max_width, 1)
+        self.next_sequence = 1
+
+    @classmethod
+    def create(cls, capacity, max_height, max_width, path=None):
+        """Ring buffer for a run; an existing file of the same size is reopened, not truncated"""
+        if path and os.path.exists(path) and os.path.exists(path + ".meta"):
+            try:
+                ring = cls.open_file(path)
+            except (OSError, ValueError):
+                ring = None
+            if ring is not None and (ring.capacity, ring.max_height, ring.max_width) == \
+                    (capacity, max_height, max_width):
+                return ring
+            del ring  # Release the mapping before the file is truncated
+        return cls(capacity, max_height, max_width, path)
+
+    @classmethod
+    def open_file(cls, path):
+        """Reopen a memory-mapped ring buffer left behind by a previous run"""
+        header = np.memmap(path + ".meta", dtype=np.float64, mode="r", shape=(1, META_COLUMNS))
+        capacity, max_height, max_width, next_sequence = (int(v) for v in header[0, :4])
+        del header
+
+        ring = cls.__new__(cls)
+        ring.capacity = capacity
+        ring.max_height = max_height
+        ring.max_width = max_width
+        ring.path = path
+        ring.frames = np.memmap(path, dtype=np.uint8, mode="r+",
+                                shape=(capacity, max_height, max_width, 3))
+        ring.meta = np.memmap(path + ".meta", dtype=np.float64, mode="r+",
+                              shape=(capacity + 1, META_COLUMNS))
+        ring.next_sequence = next_sequence
+        return ring
+
+    def write(self, frame, region="custom"):
+        """Copy a BGR frame into the next slot, cropping it to the slot size"""
+        sequence = self.next_sequence
+        slot = (sequence - 1) % self.capacity
+        height = min(frame.shape[0], self.max_height)
+        width = min(frame.shape[1], self.max_width)
+
+        np.copyto(self.frames[slot, :height, :width], frame[:height, :width])
+
+        row = self.meta[slot + 1]
+        row[0] = sequence
+        row[1] = time.time()
+        row[2] = height
+        row[3] = width
+        row[4] = REGION_NAMES.index(region) if region in REGION_NAMES else 0
+
+        self.next_sequence = sequence + 1
+        self.meta[0, 3] = self.next_sequence
+
+    @property
+    def interrupted(self):
+        """The ring was still in use when it was last written (its run did not end cleanly)"""
+        return bool(self.meta[0, 4])
+
+    def begin(self):
+        """Empty the ring and mark it as in use by a run
+
+        Frames of an earlier run (e.g. of a reopened file, after it has been
+        dumped) would otherwise show up in this run's dumps.
+        """
+        self.meta[1:] = 0
+        self.next_sequence = 1
+        self.meta[0, 3] = self.next_sequence
+        self.meta[0, 4] = 1
+        self.flush()
+
+    def close(self):
+        """Mark the end of the run that used the ring"""
+        self.meta[0, 4] = 0
+        self.flush()
+
+    def __len__(self):
+        return min(self.next_sequence - 1, self.capacity)
+
+    def dump(self, directory):
+        """Write the buffered frames to PNG files, oldest first
+
+        Returns the number of files written
+        """
+        os.makedirs(directory, exist_ok=True)
+        slots = [slot for slot in range(self.capacity) if self.meta[slot + 1, 0] > 0]
+        slots.sort(key=lambda slot: self.meta[slot + 1, 0])
+
+        for order, slot in enumerate(slots):
+            sequence, timestamp, height, width, region_code = self.meta[slot + 1]
+            stamp = time.strftime("%H%M%S", time.localtime(timestamp))
+            name = f"{order:03d}_{stamp}_{REGION_NAMES[int(region_code)]}.png"
+            cv2.imwrite(os.path.join(directory, name),
+                        self.frames[slot, :int(height), :int(width)])
+
+        return len(slots)
+
+    def flush(self):
+        """Flush a memory-mapped buffer to disk"""
+        if isinstance(self.frames, np.memmap):
+            self.frames.flush()
+            self.meta.flush()
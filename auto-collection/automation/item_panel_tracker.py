@@ -0,0 +1,96 @@
+# Scroll offset tracking and stitched item map for the collection item panel
+# Consecutive captures of the panel are aligned by finding the top band of
+# the new frame inside the previous one. The accumulated shift is the panel's
+# scroll offset, so item positions can be kept in content coordinates (y from
+# the top of the whole list) and every item is visited exactly once, however
+# the scroll steps line up with the item rows.
+
+import cv2
+
+
+class ItemPanelTracker:
+    # Height of the band matched between frames, as a share of the frame height
+    BAND_RATIO = 0.15
+    MIN_BAND_ROWS = 12
+
+    # Min TM_CCOEFF_NORMED score for the band to count as found
+    MIN_OVERLAP_SCORE = 0.8
+
+    # Max distance in pixels between a dot and a visited item position
+    VISIT_TOLERANCE = 6
+
+    def __init__(self):
+        """Initialize an empty tracker; call reset() with the first frame"""
+        self.previous = None
+        self.offset = 0
+        self.last_shift = None
+        self.lost_overlaps = 0
+        self.visited = []   # (x, content y) of visited items
+
+    @staticmethod
+    def to_gray(frame):
+        """Grayscale copy of a BGR frame (or the frame itself if already gray)"""
+        if frame.ndim == 3:
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return frame.copy()
+
+    def reset(self, frame):
+        """Start tracking a new list at offset 0 with no visited items"""
+        self.previous = self.to_gray(frame)
+        self.offset = 0
+        self.last_shift = None
+        self.lost_overlaps = 0
+        self.visited = []
+
+    def measure_shift(self, previous, current):
+        """Rows the content moved up between two gray frames, or None if they do not overlap"""
+        height = current.shape[0]
+        band = min(height, max(self.MIN_BAND_ROWS, int(height * self.BAND_RATIO)))
+        if previous.shape != current.shape or band >= height:
+            return None
+
+        top_band = current[:band]
+        if float(top_band.std()) < 1.0:
+            # A flat band matches anywhere; only an unchanged frame is meaningful
+            return 0 if cv2.absdiff(previous, current).max() == 0 else None
+
+        result = cv2.matchTemplate(previous, top_band, cv2.TM_CCOEFF_NORMED)
+        _, score, _, location = cv2.minMaxLoc(result)
+        if score < self.MIN_OVERLAP_SCORE:
+            return None
+        return location[1]
+
+    def update(self, frame):
+        """Align a new frame with the previous one and advance the offset
+
+        Returns:
+            Rows scrolled since the previous frame (0 = the list did not move).
+            When the frames do not overlap the whole frame height is assumed.
+        """
+        current = self.to_gray(frame)
+        if self.previous is None:
+            self.previous = current
+            self.last_shift = None
+            return None
+
+        shift = self.measure_shift(self.previous, current)
+        if shift is None:
+            self.lost_overlaps += 1
+            shift = current.shape[0]
+        self.offset += shift
+        self.last_shift = shift
+        self.previous = current
+        return shift
+
+    def at_bottom(self):
+        """Check if the last scroll left the panel where it was"""
+        return self.last_shift == 0
+
+    def mark_visited(self, x, y):
+        """Remember an item at frame-relative (x, y) as visited"""
+        self.visited.append((x, self.offset + y))
+
+    def visible_visited(self, frame_height):
+        """Visited items inside the current frame as frame-relative (x, y)"""
+        return [(x, content_y - self.offset) for x, content_y in self.visited
+                if -self.VISIT_TOLERANCE <= content_y - self.offset < frame_height + self.VISIT_TOLERANCE]
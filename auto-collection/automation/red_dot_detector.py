@@ -0,0 +1,154 @@
+# Red dot detection on captured frames
+# Kept free of any window/capture code so it can run offline on saved frames
+
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# Available detector modes:
+#   color - match the BGR template against the BGR frame (original behaviour)
+#   gray  - match on single-channel images, roughly 3x less work per scan
+DETECTOR_MODES = ("color", "gray")
+
+# Shared result of a detection without dots (read-only)
+NO_DOTS = np.empty((0, 2), dtype=np.int32)
+NO_DOTS.setflags(write=False)
+
+
+class RedDotDetector:
+    # Frames are only split into tiles if each tile gets at least this many score rows
+    MIN_TILE_ROWS = 32
+
+    def __init__(self, template, confidence=0.9, mode="color", min_distance=10, workers=1):
+        """Initialize the detector with a BGR template image
+        
+        With workers > 1, tall frames are matched as horizontal tiles on a
+        thread pool (cv2.matchTemplate releases the GIL).
+        """
+        if mode not in DETECTOR_MODES:
+            raise ValueError(f"Unknown detector mode: {mode}")
+
+        self.confidence = confidence
+        self.mode = mode
+        self.min_distance = min_distance
+        self.workers = max(1, int(workers))
+        self.executor = None
+
+        self.template = template
+        self.template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+        self.template_height, self.template_width = template.shape[:2]
+        # Offset from a template placement to the dot center it detects
+        self.template_center = np.array((self.template_width // 2, self.template_height // 2),
+                                        dtype=np.int32)
+
+    def prepare_frame(self, frame_bgr):
+        """Convert a BGR frame into the representation used by the current mode"""
+        if self.mode == "gray" and frame_bgr.ndim == 3:
+            return cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+        return frame_bgr
+
+    def get_executor(self):
+        """Thread pool shared by all matches of this detector, created on first use"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers,
+                                               thread_name_prefix="red-dot-match")
+        return self.executor
+
+    def close(self):
+        """Shut down the thread pool, if one was started"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def tile_bounds(self, frame_height):
+        """Split the score map rows of a frame into contiguous (start, stop) ranges"""
+        result_rows = frame_height - self.template_height + 1
+        tiles = min(self.workers, result_rows // self.MIN_TILE_ROWS)
+        if tiles <= 1:
+            return [(0, result_rows)]
+        step = -(-result_rows // tiles)  # ceil division
+        return [(start, min(start + step, result_rows))
+                for start in range(0, result_rows, step)]
+
+    def match(self, frame_bgr):
+        """Run template matching and return the raw score map
+        
+        Tiles overlap by template height - 1 frame rows, so the stitched score
+        map covers exactly the positions of a single matchTemplate call over
+        the whole frame, in the same order.
+        """
+        frame = self.prepare_frame(frame_bgr)
+        template = self.template_gray if self.mode == "gray" else self.template
+
+        bounds = self.tile_bounds(frame.shape[0]) if self.workers > 1 else [(0, None)]
+        if len(bounds) == 1:
+            return cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+
+        overlap = self.template_height - 1
+        tiles = [frame[start:stop + overlap] for start, stop in bounds]
+        results = self.get_executor().map(
+            lambda tile: cv2.matchTemplate(tile, template, cv2.TM_CCOEFF_NORMED), tiles)
+        return np.vstack(list(results))
+
+    def detect(self, frame_bgr, confidence=None, first_only=False):
+        """Find red dots in a BGR frame
+
+        Args:
+            frame_bgr: Frame as a NumPy array in BGR order
+            confidence: Matching confidence threshold, defaults to self.confidence
+            first_only: If True, only return the single best match (faster)
+        Returns:
+            List of (x, y) dot centers relative to the frame
+        """
+        return [(x, y) for x, y in self.detect_array(frame_bgr, confidence, first_only).tolist()]
+
+    def detect_array(self, frame_bgr, confidence=None, first_only=False):
+        """Like detect(), but returns an (N, 2) int32 array of (x, y) dot centers
+
+        The array is new on every call unless it is the shared, read-only
+        empty result.
+        """
+        if confidence is None:
+            confidence = self.confidence
+
+        if (frame_bgr.shape[0] < self.template_height or
+                frame_bgr.shape[1] < self.template_width):
+            return NO_DOTS
+
+        result = self.match(frame_bgr)
+
+        if first_only:
+            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+            if max_val >= confidence:
+                return np.array([max_loc], dtype=np.int32) + self.template_center
+            return NO_DOTS
+
+        ys, xs = np.nonzero(result >= confidence)
+        if len(ys) == 0:
+            return NO_DOTS
+
+        # Row-major order, as np.where returns the score map positions
+        positions = np.column_stack((xs, ys)).astype(np.int32)
+        positions += self.template_center
+        return self.filter_duplicates(positions)
+
+    def filter_duplicates(self, positions):
+        """Drop detections closer than min_distance to an earlier kept detection
+
+        Same result as checking each position against all kept ones in order:
+        the first remaining position is always kept, and everything within
+        min_distance of it is dropped.
+        """
+        if len(positions) <= 1:
+            return positions
+
+        min_distance_sq = self.min_distance * self.min_distance
+        keep = []
+        remaining = np.arange(len(positions))
+        while len(remaining):
+            first, remaining = remaining[0], remaining[1:]
+            keep.append(first)
+            offsets = positions[remaining] - positions[first]
+            remaining = remaining[np.einsum("ij,ij->i", offsets, offsets) >= min_distance_sq]
+        return positions[keep]
@@ -0,0 +1,173 @@
+# Per-tab and per-dungeon cost report of a collection run
+# The automation adds the time of every capture, match, click and sleep, and
+# counts registrations, register sequences, pages and scrolls. Each sample is
+# added to the whole run and to the tab and dungeon being visited, so the
+# report shows which parts of the collection dominate the runtime. Time not
+# covered by the four categories (graph overhead, condition polling, bookkeeping)
+# is reported as "other".
+#
+# All times are time.perf_counter() seconds.
+
+import csv
+import json
+import time
+
+TIME_CATEGORIES = ("capture", "match", "click", "sleep")
+# A register sequence starts with the Auto Refill click and succeeds when the item
+# is registered; it fails when one of its clicks does not go through
+COUNTERS = ("registered", "sequences_attempted", "sequences_failed", "pages", "scrolls")
+
+CSV_FIELDS = (("scope", "key", "visits", "wall_s") +
+              tuple(category + "_s" for category in TIME_CATEGORIES) + ("other_s",) + COUNTERS)
+
+
+class CostEntry:
+    def __init__(self, scope, key, label):
+        """Counters and time split of one tab, dungeon or the whole run"""
+        self.scope = scope
+        self.key = key
+        self.label = label
+        self.visits = 0
+        self.wall = 0.0
+        self.started = None
+        self.times = dict.fromkeys(TIME_CATEGORIES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def begin(self, now):
+        """Start a visit"""
+        self.visits += 1
+        self.started = now
+
+    def end(self, now):
+        """End the current visit"""
+        if self.started is not None:
+            self.wall += now - self.started
+            self.started = None
+
+    def wall_time(self, now):
+        """Wall time of all visits, including an unfinished one"""
+        return self.wall + (now - self.started if self.started is not None else 0.0)
+
+    def to_dict(self, now):
+        """Plain representation for reports"""
+        wall = self.wall_time(now)
+        entry = {"scope": self.scope, "key": self.label, "visits": self.visits,
+                 "wall_s": round(wall, 3)}
+        for category in TIME_CATEGORIES:
+            entry[category + "_s"] = round(self.times[category], 3)
+        entry["other_s"] = round(max(0.0, wall - sum(self.times.values())), 3)
+        entry.update(self.counters)
+        return entry
+
+
+class RunStats:
+    def __init__(self):
+        """Initialize empty statistics; begin() starts the run"""
+        self.run = CostEntry("run", "run", "run")
+        self.tabs = {}        # tab key -> CostEntry
+        self.dungeons = {}    # dungeon key -> CostEntry
+        self.tab = None       # Entries being visited
+        self.dungeon = None
+
+    def begin(self):
+        """Start the run clock"""
+        self.run.begin(time.perf_counter())
+
+    def finish(self):
+        """Stop the run clock, ending an open tab or dungeon visit"""
+        self.end_dungeon()
+        self.end_tab()
+        self.run.end(time.perf_counter())
+
+    def begin_tab(self, key, label):
+        """Start a tab visit (ends the previous one)"""
+        self.end_tab()
+        entry = self.tabs.get(key)
+        if entry is None:
+            entry = self.tabs[key] = CostEntry("tab", key, label)
+        entry.begin(time.perf_counter())
+        self.tab = entry
+
+    def end_tab(self):
+        """End the current tab visit"""
+        self.end_dungeon()
+        if self.tab is not None:
+            self.tab.end(time.perf_counter())
+            self.tab = None
+
+    def begin_dungeon(self, key, label):
+        """Start a dungeon visit within the current tab (ends the previous one)"""
+        self.end_dungeon()
+        entry = self.dungeons.get(key)
+        if entry is None:
+            entry = self.dungeons[key] = CostEntry("dungeon", key, label)
+        entry.begin(time.perf_counter())
+        self.dungeon = entry
+
+    def end_dungeon(self):
+        """End the current dungeon visit"""
+        if self.dungeon is not None:
+            self.dungeon.end(time.perf_counter())
+            self.dungeon = None
+
+    def add_time(self, category, seconds):
+        """Add seconds spent in a TIME_CATEGORIES category to the run, tab and dungeon"""
+        self.run.times[category] += seconds
+        if self.tab is not None:
+            self.tab.times[category] += seconds
+        if self.dungeon is not None:
+            self.dungeon.times[category] += seconds
+
+    def count(self, counter, amount=1):
+        """Add to a COUNTERS counter of the run, tab and dungeon"""
+        self.run.counters[counter] += amount
+        if self.tab is not None:
+            self.tab.counters[counter] += amount
+        if self.dungeon is not None:
+            self.dungeon.counters[counter] += amount
+
+    def report(self):
+        """Run totals plus tabs and dungeons, most expensive first"""
+        now = time.perf_counter()
+        by_wall = lambda entry: -entry.wall_time(now)
+        return {
+            "run": self.run.to_dict(now),
+            "tabs": [entry.to_dict(now) for entry in sorted(self.tabs.values(), key=by_wall)],
+            "dungeons": [entry.to_dict(now) for entry in sorted(self.dungeons.values(), key=by_wall)]
+        }
+
+    @staticmethod
+    def write_json(report, path):
+        """Write a report() as JSON"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    @staticmethod
+    def write_csv(report, path):
+        """Write a report() as CSV, one row per run, tab and dungeon entry"""
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            writer.writerow(report["run"])
+            writer.writerows(report["tabs"])
+            writer.writerows(report["dungeons"])
+
+    @staticmethod
+    def format_summary(report, limit=5):
+        """Human-readable summary of a report() for the run report dialog"""
+        run = report["run"]
+        lines = [f"{run['registered']} items registered in {run['wall_s']:.1f}s "
+                 f"({run['registered']}/{run['sequences_attempted']} register sequences succeeded, "
+                 f"{run['sequences_failed']} failed, "
+                 f"{run['pages']} pages, {run['scrolls']} scrolls)",
+                 "Time: " + ", ".join(f"{category} {run[category + '_s']:.1f}s"
+                                      for category in TIME_CATEGORIES + ("other",))]
+        for scope, title in (("tabs", "Slowest tabs"), ("dungeons", "Slowest dungeons")):
+            entries = report[scope][:limit]
+            if entries:
+                lines.append(f"{title}:")
+                lines.extend(f"  {entry['key']}: {entry['wall_s']:.1f}s, {entry['registered']} registered, "
+                             f"capture {entry['capture_s']:.1f}s, match {entry['match_s']:.1f}s, "
+                             f"click {entry['click_s']:.1f}s, sleep {entry['sleep_s']:.1f}s"
+                             for entry in entries)
+        return "\n".join(lines)
@@ -0,0 +1,92 @@
+# Compact runtime model of the calibration used by the hot loop
+# start() resolves the stored calibration once into ScreenArea and
+# ScreenButton objects (slotted, so attribute reads are cheap and instances
+# small). Everything the loop derives from an area or button - edges, center,
+# probe rectangle, input budget - is computed here instead of on every scan.
+#
+# Detected dots are (N, 2) int32 arrays of (x, y) screen positions; positions
+# kept across steps (flow state, skipped dots) stay plain (x, y) tuples so they
+# remain JSON-friendly.
+
+import numpy as np
+
+
+class ScreenArea:
+    __slots__ = ("name", "rect", "left", "top", "width", "height", "right", "bottom",
+                 "center", "origin")
+
+    def __init__(self, name, rect):
+        """Detection area resolved to screen pixels
+
+        Args:
+            name: Area name used in settings, logs and traces
+            rect: Screen (left, top, width, height)
+        """
+        left, top, width, height = (int(value) for value in rect)
+        self.name = name
+        self.rect = (left, top, width, height)
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.right = left + width
+        self.bottom = top + height
+        self.center = (left + width // 2, top + height // 2)
+        self.origin = np.array((left, top), dtype=np.int32)
+
+    def clip(self, left, top, right, bottom):
+        """Screen (left, top, width, height) of a rectangle clipped to the area"""
+        left = left if left > self.left else self.left
+        top = top if top > self.top else self.top
+        right = right if right < self.right else self.right
+        bottom = bottom if bottom < self.bottom else self.bottom
+        return (left, top, right - left, bottom - top)
+
+    def __repr__(self):
+        return f"ScreenArea({self.name!r}, {self.rect})"
+
+
+class ScreenButton:
+    __slots__ = ("name", "position", "probe_rect", "heavy")
+
+    def __init__(self, name, position, probe_size, heavy=False):
+        """Button resolved to screen pixels
+
+        Args:
+            name: Button name used in settings
+            position: Screen (x, y) of the click
+            probe_size: (width, height) of the patch sampled to probe the button's state
+            heavy: Clicks use the heavy input budget of the rate limiter
+        """
+        x, y = int(position[0]), int(position[1])
+        width, height = probe_size
+        self.name = name
+        self.position = (x, y)
+        self.probe_rect = (x - width // 2, y - height // 2, width, height)
+        self.heavy = heavy
+
+    def __repr__(self):
+        return f"ScreenButton({self.name!r}, {self.position})"
+
+
+def dot_tuple(dots, index=0):
+    """Plain (x, y) tuple of one row of a dot array"""
+    x, y = dots[index].tolist()
+    return (x, y)
+
+
+def without_near(dots, positions, tolerance):
+    """Rows of a dot array farther than tolerance from every (x, y) in positions"""
+    if not len(positions) or not len(dots):
+        return dots
+    offsets = dots[:, None, :] - np.asarray(positions, dtype=np.int32)[None, :, :]
+    distances_sq = np.einsum("ijk,ijk->ij", offsets, offsets)
+    return dots[(distances_sq > tolerance * tolerance).all(axis=1)]
+
+
+def any_near(dots, position, tolerance):
+    """Check if any row of a dot array is within tolerance of position"""
+    if not len(dots):
+        return False
+    offsets = dots - np.asarray(position, dtype=np.int32)
+    return bool((np.einsum("ij,ij->i", offsets, offsets) <= tolerance * tolerance).any())
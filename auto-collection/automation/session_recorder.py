@@ -0,0 +1,157 @@
+# Session recorder for reproducing automation runs offline
+# Captured frames are deduplicated by content hash and appended to a raw
+# "<trace>.frames" file as they arrive, so a long run does not keep them in
+# memory. save() writes the trace itself: an .npz container with the JSON event
+# log (monotonic timestamps), the frame index (byte offset and shape of every
+# frame in the frames file) and the template. Replays memory-map the frames
+# file and read only the frames they use.
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+TRACE_VERSION = 2
+FRAMES_SUFFIX = ".frames"
+
+
+class SessionRecorder:
+    def __init__(self, path):
+        """Start a recording; frames go to path + ".frames" at once, the trace to path on save()"""
+        self.path = path
+        self.frames_path = path + FRAMES_SUFFIX
+        self.frames_file = open(self.frames_path, "wb")
+        self.frames_size = 0
+        self.start_time = time.monotonic()
+        self.frame_index = []   # Per frame id: (byte offset, height, width, channels)
+        self.frame_ids = {}
+        self.events = []
+        self.metadata = {}
+        self.template = None
+        self.lock = threading.Lock()
+
+    def timestamp(self):
+        """Seconds since the recording started"""
+        return time.monotonic() - self.start_time
+
+    def set_metadata(self, **fields):
+        """Store run-level information such as detector settings"""
+        self.metadata.update(fields)
+
+    def set_template(self, template):
+        """Store the red dot template so replays match against the same image"""
+        self.template = template
+
+    def record_capture(self, region, area, frame):
+        """Record a captured BGR frame and return its frame id"""
+        frame = np.ascontiguousarray(frame)
+        digest = hashlib.blake2b(memoryview(frame), digest_size=16)
+        digest.update(repr(frame.shape).encode())
+        key = digest.hexdigest()
+
+        with self.lock:
+            frame_id = self.frame_ids.get(key)
+            if frame_id is None:
+                frame_id = len(self.frame_index)
+                height, width = frame.shape[:2]
+                channels = frame.shape[2] if frame.ndim == 3 else 1
+                self.frames_file.write(memoryview(frame.astype(np.uint8, copy=False)))
+                self.frame_index.append((self.frames_size, height, width, channels))
+                self.frames_size += height * width * channels
+                self.frame_ids[key] = frame_id
+            self.events.append({
+                "t": self.timestamp(),
+                "type": "capture",
+                "region": region,
+                "area": list(area),
+                "frame": frame_id
+            })
+        return frame_id
+
+    def record_detection(self, region, frame_id, dots, latency_s, confidence, first_only):
+        """Record a detection result for a previously recorded frame"""
+        with self.lock:
+            self.events.append({
+                "t": self.timestamp(),
+                "type": "detect",
+                "region": region,
+                "frame": frame_id,
+                "dots": [list(dot) for dot in dots],
+                "latency": latency_s,
+                "confidence": confidence,
+                "first_only": first_only
+            })
+
+    def record_input(self, kind, **fields):
+        """Record a click, cursor move or scroll"""
+        event = {"t": self.timestamp(), "type": "input", "kind": kind}
+        event.update(fields)
+        with self.lock:
+            self.events.append(event)
+
+    def flush_frames(self):
+        """Push buffered frames to the frames file"""
+        with self.lock:
+            if not self.frames_file.closed:
+                self.frames_file.flush()
+
+    def save(self):
+        """Close the frames file and write the trace to disk"""
+        with self.lock:
+            if not self.frames_file.closed:
+                self.frames_file.close()
+            header = {"version": TRACE_VERSION, "metadata": self.metadata,
+                      "frame_count": len(self.frame_index),
+                      "frames_file": os.path.basename(self.frames_path)}
+            arrays = {
+                "header": np.array(json.dumps(header)),
+                "events": np.array(json.dumps(self.events)),
+                "frame_index": np.array(self.frame_index, dtype=np.int64).reshape(-1, 4)
+            }
+            if self.template is not None:
+                arrays["template"] = self.template
+            with open(self.path, "wb") as f:
+                np.savez_compressed(f, **arrays)
+
+
+class SessionTrace:
+    def __init__(self, path):
+        """Open a trace written by SessionRecorder; frames are memory-mapped and read lazily"""
+        self.archive = np.load(path)
+        header = json.loads(str(self.archive["header"]))
+        self.version = header.get("version")
+        if self.version not in (1, TRACE_VERSION):
+            raise ValueError(f"Unsupported trace version: {self.version}")
+        self.metadata = header.get("metadata", {})
+        self.frame_count = header.get("frame_count", 0)
+        self.events = json.loads(str(self.archive["events"]))
+        self.template = self.archive["template"] if "template" in self.archive.files else None
+
+        # Version 1 traces kept every frame inside the archive
+        self.frame_index = None
+        self.frames = None
+        if self.version == TRACE_VERSION:
+            self.frame_index = self.archive["frame_index"]
+            frames_path = os.path.join(os.path.dirname(os.path.abspath(path)), header["frames_file"])
+            if self.frame_count:
+                self.frames = np.memmap(frames_path, dtype=np.uint8, mode="r")
+
+    def frame(self, frame_id):
+        """One recorded frame (a read-only view of the memory-mapped frames file)"""
+        if self.frame_index is None:
+            return self.archive[f"frame_{frame_id}"]
+        offset, height, width, channels = (int(value) for value in self.frame_index[frame_id])
+        frame = self.frames[offset:offset + height * width * channels]
+        return frame.reshape((height, width, channels) if channels > 1 else (height, width))
+
+    def detections(self):
+        """Iterate over recorded detection events"""
+        return (event for event in self.events if event["type"] == "detect")
+
+    def close(self):
+        """Close the underlying archive and frames file"""
+        self.archive.close()
+        self.frames = None  # The mapping closes once no frame view refers to it
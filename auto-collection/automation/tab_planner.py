@@ -0,0 +1,56 @@
+# Orders the tabs found by one tab strip scan into a work plan
+# Tabs are identified by the horizontal offset of their red dot inside the
+# tab strip area, so their history survives moving the game window.
+#
+# Policies:
+#   fixed    - left to right
+#   yield    - most items registered per second in earlier runs first
+#   shortest - shortest average tab pass in earlier runs first
+# Tabs without history go first under every policy, so they get measured.
+
+TAB_POLICIES = ("fixed", "yield", "shortest")
+
+
+class TabPlanner:
+    def __init__(self, policy="fixed", history=None, tolerance=20):
+        """Initialize the planner
+
+        Args:
+            policy: One of TAB_POLICIES
+            history: {"<x offset>": {"registered": n, "seconds": s, "passes": p}}
+            tolerance: Max offset difference in pixels for the same tab
+        """
+        if policy not in TAB_POLICIES:
+            raise ValueError(f"Unknown tab policy '{policy}' (expected one of {', '.join(TAB_POLICIES)})")
+        self.policy = policy
+        self.history = history if history is not None else {}
+        self.tolerance = tolerance
+
+    def history_key(self, offset):
+        """History key of a tab offset, reusing a known key within tolerance"""
+        for key in self.history:
+            if abs(int(key) - offset) <= self.tolerance:
+                return key
+        return str(int(offset))
+
+    def sort_key(self, offset):
+        """Sort key of a tab under the current policy (lower goes first)"""
+        stats = self.history.get(self.history_key(offset))
+        if self.policy == "fixed" or not stats or not stats.get("passes"):
+            return (0, 0.0, offset)
+        if self.policy == "yield":
+            seconds = max(stats.get("seconds", 0.0), 1e-3)
+            return (1, -stats.get("registered", 0) / seconds, offset)
+        return (1, stats.get("seconds", 0.0) / stats["passes"], offset)
+
+    def plan(self, tab_dots, strip_left):
+        """Order screen positions of tab dots into a work plan"""
+        return sorted(tab_dots, key=lambda dot: self.sort_key(dot[0] - strip_left))
+
+    def record(self, offset, registered, seconds):
+        """Add one finished tab pass to the history"""
+        stats = self.history.setdefault(self.history_key(offset),
+                                        {"registered": 0, "seconds": 0.0, "passes": 0})
+        stats["registered"] += registered
+        stats["seconds"] = round(stats["seconds"] + seconds, 3)
+        stats["passes"] += 1
@@ -0,0 +1,89 @@
+# Screen capture backend interface and an array-backed implementation
+# A backend copies a screen rectangle (left, top, width, height) into a
+# caller-provided BGR uint8 buffer of shape (height, width, 3) and returns the
+# time.perf_counter() timestamp of the frame, or None if the capture failed.
+# Capturing into a caller buffer lets a loop reuse one allocation per area size;
+# capture() allocates a fresh buffer for callers that keep their frames.
+#
+# The Windows backends (GDI BitBlt and PrintWindow) are in core/gdi_capture.py.
+# ArrayCaptureBackend serves frames from arrays or image files, so detection
+# and the benchmarks can run without a game window.
+
+import time
+
+import cv2
+import numpy as np
+
+# Window backends selectable in settings (implemented in core/gdi_capture.py)
+CAPTURE_BACKENDS = ("bitblt", "printwindow")
+
+
+def new_frame_buffer(area):
+    """Uninitialized BGR buffer sized for a (left, top, width, height) area"""
+    return np.empty((int(area[3]), int(area[2]), 3), dtype=np.uint8)
+
+
+class CaptureBackend:
+    name = "base"
+
+    def capture_into(self, area, buffer):
+        """Copy a screen area into buffer; returns the frame timestamp or None on failure"""
+        raise NotImplementedError
+
+    def capture(self, area):
+        """Capture a screen area into a new buffer; returns (frame, timestamp) or (None, None)"""
+        buffer = new_frame_buffer(area)
+        timestamp = self.capture_into(area, buffer)
+        if timestamp is None:
+            return None, None
+        return buffer, timestamp
+
+    def close(self):
+        """Release resources held by the backend"""
+
+
+class ArrayCaptureBackend(CaptureBackend):
+    name = "array"
+
+    def __init__(self, frames, origin=(0, 0), period_s=None):
+        """Serve captures from BGR screen images
+
+        Args:
+            frames: A BGR image or a list of them, all showing the screen at origin
+            origin: Screen (x, y) of the top-left pixel of the images
+            period_s: Without a period every capture shows the next frame (cycling);
+                with one the frames advance with time like a game running at 1/period_s fps
+        """
+        self.frames = [frames] if isinstance(frames, np.ndarray) else list(frames)
+        self.origin = (int(origin[0]), int(origin[1]))
+        self.period_s = period_s
+        self.started = time.perf_counter()
+        self.index = 0
+
+    @classmethod
+    def from_files(cls, paths, origin=(0, 0), period_s=None):
+        """Backend serving image files (None if one cannot be read)"""
+        frames = [cv2.imread(path, cv2.IMREAD_COLOR) for path in paths]
+        if not frames or any(frame is None for frame in frames):
+            return None
+        return cls(frames, origin, period_s)
+
+    def next_frame(self):
+        """Frame to show now and its timestamp"""
+        now = time.perf_counter()
+        if self.period_s:
+            tick = int((now - self.started) / self.period_s)
+            return self.frames[tick % len(self.frames)], self.started + tick * self.period_s
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return frame, now
+
+    def capture_into(self, area, buffer):
+        """Copy a screen area out of the current frame; None if it is outside the frame"""
+        frame, timestamp = self.next_frame()
+        left, top, width, height = area
+        x, y = left - self.origin[0], top - self.origin[1]
+        if x < 0 or y < 0 or x + width > frame.shape[1] or y + height > frame.shape[0]:
+            return None
+        np.copyto(buffer, frame[y:y + height, x:x + width])
+        return timestamp
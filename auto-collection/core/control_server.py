@@ -0,0 +1,114 @@
+# Local HTTP control and metrics endpoint
+# Lets an orchestration script drive several instances of the tool:
+#   GET  /state    current automation state (tab, page, scroll position, ...)
+#   GET  /metrics  throughput counters, input and per-step timings
+#   POST /start, /stop, /pause, /resume
+# Responses are JSON. The server only binds to localhost and uses the standard
+# library alone, so it runs anywhere (GUI, headless, or a simulated backend).
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from core.run_log import log_exception
+
+DEFAULT_CONTROL_PORT = 8765
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+def to_json(value):
+    """json.dumps fallback for NumPy scalars and other objects"""
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class ControlRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        """Serve /state and /metrics"""
+        control = self.server.control
+        queries = {"/state": control.state_func, "/metrics": control.metrics_func}
+        if self.path not in queries:
+            if self.path.strip("/") in control.commands:
+                self.send_json(405, {"error": "use POST for commands"})
+            else:
+                self.send_json(404, {"error": f"unknown path {self.path}"})
+            return
+        try:
+            payload = queries[self.path]()
+        except Exception as e:
+            log_exception("control_query_failed", e, path=self.path)
+            self.send_json(500, {"path": self.path, "error": str(e)})
+            return
+        self.send_json(200, payload)
+
+    def do_POST(self):
+        """Run a command"""
+        control = self.server.control
+        command = self.path.strip("/")
+        if command not in control.commands:
+            self.send_json(404, {"error": f"unknown command {command}"})
+            return
+        try:
+            accepted = control.commands[command]()
+        except Exception as e:
+            log_exception("control_command_failed", e, command=command)
+            self.send_json(500, {"command": command, "ok": False, "error": str(e)})
+            return
+        self.send_json(200 if accepted is not False else 409,
+                       {"command": command, "ok": accepted is not False})
+
+    def send_json(self, status, payload):
+        """Write a JSON response"""
+        body = json.dumps(payload, default=to_json).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Keep request logging off the console"""
+        pass
+
+
+class ControlServer:
+    def __init__(self, state_func, metrics_func, commands, port=DEFAULT_CONTROL_PORT, host="127.0.0.1"):
+        """Initialize the server
+
+        Args:
+            state_func: Returns the state dict for GET /state
+            metrics_func: Returns the metrics dict for GET /metrics
+            commands: {"start": callable, ...}; a callable returning False answers 409
+            port: TCP port (0 = pick a free one)
+            host: Must be a loopback address
+        """
+        if host not in LOCAL_HOSTS:
+            raise ValueError("The control server only binds to localhost")
+        self.state_func = state_func
+        self.metrics_func = metrics_func
+        self.commands = commands
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    def start(self):
+        """Start serving in a background thread; returns the bound port"""
+        if self.httpd is not None:
+            return self.port
+        self.httpd = ThreadingHTTPServer((self.host, self.port), ControlRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.control = self
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self.port
+
+    def stop(self):
+        """Stop serving"""
+        if self.httpd is None:
+            return
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.httpd = None
+        self.thread = None
@@ -0,0 +1,107 @@
+# Coordinate model for calibration data
+# Areas and buttons are stored relative to the game window's client area,
+# either in client pixels ("client") or as fractions of the client size
+# ("normalized", survives resizing the window). Settings written before this
+# model ("legacy") hold areas in screen pixels and buttons relative to the
+# window's outer rectangle; they are still understood and can be migrated.
+#
+# A ClientTransform is built once from the current window geometry. The
+# automation resolves the calibration to screen pixels with it at the start of
+# a run, so the hot path only subtracts the client origin for window messages
+# and never queries the window again.
+
+COORDINATE_SPACES = ("client", "normalized")
+LEGACY_SPACE = "legacy"
+
+# Decimals kept for normalized coordinates (sub-pixel up to 10000 px)
+NORMALIZED_DECIMALS = 5
+
+
+class ClientTransform:
+    def __init__(self, client_left, client_top, client_width, client_height,
+                 window_left=None, window_top=None):
+        """Initialize from the client rectangle in screen pixels
+
+        Args:
+            client_left, client_top: Screen position of the client area's origin
+            client_width, client_height: Client area size
+            window_left, window_top: Screen position of the outer window (legacy buttons)
+        """
+        self.left = int(client_left)
+        self.top = int(client_top)
+        self.width = max(1, int(client_width))
+        self.height = max(1, int(client_height))
+        self.window_left = self.left if window_left is None else int(window_left)
+        self.window_top = self.top if window_top is None else int(window_top)
+
+    @classmethod
+    def from_rects(cls, client_rect, window_rect=None):
+        """Build from a (left, top, right, bottom) client rect and an optional window origin"""
+        left, top, right, bottom = client_rect
+        window_left, window_top = window_rect if window_rect else (None, None)
+        return cls(left, top, right - left, bottom - top, window_left, window_top)
+
+    def same_geometry(self, other):
+        """Check if another transform describes the same client rectangle"""
+        return (other is not None and (self.left, self.top, self.width, self.height) ==
+                (other.left, other.top, other.width, other.height))
+
+    # Hot path: screen <-> client pixels
+
+    def to_client(self, screen_x, screen_y):
+        """Client pixel position of a screen position"""
+        return (screen_x - self.left, screen_y - self.top)
+
+    def to_screen(self, client_x, client_y):
+        """Screen position of a client pixel position"""
+        return (self.left + client_x, self.top + client_y)
+
+    # Calibration values (stored in a coordinate space) <-> screen pixels
+
+    def point_to_screen(self, point, space):
+        """Screen position of a stored button position"""
+        x, y = point[0], point[1]
+        if space == "normalized":
+            return (self.left + round(x * self.width), self.top + round(y * self.height))
+        if space == LEGACY_SPACE:
+            return (self.window_left + x, self.window_top + y)
+        return (self.left + x, self.top + y)
+
+    def area_to_screen(self, area, space):
+        """Screen (left, top, width, height) of a stored area"""
+        left, top, width, height = area
+        if space == "normalized":
+            return (self.left + round(left * self.width), self.top + round(top * self.height),
+                    max(1, round(width * self.width)), max(1, round(height * self.height)))
+        if space == LEGACY_SPACE:
+            return (left, top, width, height)
+        return (self.left + left, self.top + top, width, height)
+
+    def point_from_screen(self, screen_x, screen_y, space):
+        """Stored form of a screen position"""
+        x, y = screen_x - self.left, screen_y - self.top
+        if space == "normalized":
+            return (round(x / self.width, NORMALIZED_DECIMALS), round(y / self.height, NORMALIZED_DECIMALS))
+        if space == LEGACY_SPACE:
+            return (screen_x - self.window_left, screen_y - self.window_top)
+        return (x, y)
+
+    def area_from_screen(self, area, space):
+        """Stored form of a screen (left, top, width, height) area"""
+        left, top, width, height = area
+        if space == "normalized":
+            return (round((left - self.left) / self.width, NORMALIZED_DECIMALS),
+                    round((top - self.top) / self.height, NORMALIZED_DECIMALS),
+                    round(width / self.width, NORMALIZED_DECIMALS),
+                    round(height / self.height, NORMALIZED_DECIMALS))
+        if space == LEGACY_SPACE:
+            return (left, top, width, height)
+        return (left - self.left, top - self.top, width, height)
+
+    def convert_point(self, point, from_space, to_space):
+        """Re-express a stored button position in another coordinate space"""
+        return self.point_from_screen(*self.point_to_screen(point, from_space), to_space)
+
+    def convert_area(self, area, from_space, to_space):
+        """Re-express a stored area in another coordinate space"""
+        return self.area_from_screen(self.area_to_screen(area, from_space), to_space)
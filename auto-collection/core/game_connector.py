@@ -1,18 +1,26 @@
-# Unified game connector with BitBlt capture functionality
+# Unified game connector with pluggable screen capture (GDI BitBlt by default)
 
 from pywinauto import Application
 import win32gui
 import win32con
-import win32ui
 import win32api
-from ctypes import windll
-from PIL import Image
+from core.capture_backend import CaptureBackend
+from core.gdi_capture import GdiBitBltBackend, create_capture_backend
+from core.input_scheduler import InputScheduler
+from core.coordinates import ClientTransform
+from core.run_log import log_event, log_exception
 
 class GameConnector:
     def __init__(self, status_callback=None):
         """Initialize the unified game connector"""
         self.game_window = None
         self.status_callback = status_callback
+        
+        # Every input goes through the rate limiter (unlimited until configured)
+        self.input_scheduler = InputScheduler()
+
+        # Screen captures of the game window
+        self.capture_backend = GdiBitBltBackend(self.get_window_handle)
 
     def update_status(self, message):
         """Update status via callback if available"""
@@ -50,17 +58,62 @@ class GameConnector:
                 raise Exception("Found window but it's not visible or enabled")
 
         except Exception as e:
+            log_exception("connect_failed", e)
             self.update_status(f"Could not connect to the game. Make sure it's running. Error: {str(e)}")
             return False
 
-    def click_at_position(self, coords, adjust_for_client_area=True):
-        """Click at the specified coordinates in the game window using Windows API only"""
+    def configure_input_limits(self, limits):
+        """Set input rate limits: {"light": {"rate": r, "burst": b}, "heavy": {...}}"""
+        for kind, limit in limits.items():
+            self.input_scheduler.configure(kind, limit.get("rate", 0), limit.get("burst", 1))
+
+    def set_input_cancel_event(self, cancel_event):
+        """Abort inputs waiting for the rate limiter once cancel_event is set"""
+        self.input_scheduler.cancel_event = cancel_event
+
+    def input_stats(self):
+        """Rate limiter counters (sent, throttled, queue depth)"""
+        return self.input_scheduler.stats()
+
+    def move_cursor(self, screen_x, screen_y):
+        """Move the mouse cursor to screen coordinates (rate limited as a light input)"""
+        if not self.input_scheduler.acquire("light"):
+            return False
+        try:
+            win32api.SetCursorPos((int(screen_x), int(screen_y)))
+            return True
+        except Exception as e:
+            log_exception("input_failed", e, input="cursor", x=screen_x, y=screen_y)
+            self.update_status(f"Cursor move failed: {str(e)}")
+            return False
+
+    def scroll_wheel(self, screen_x, screen_y, notches):
+        """Send mouse wheel notches at screen coordinates (negative = down, light input)"""
+        if not self.input_scheduler.acquire("light"):
+            return False
+        try:
+            win32api.mouse_event(win32con.MOUSEEVENTF_WHEEL, int(screen_x), int(screen_y),
+                                 int(notches) * 120, 0)
+            return True
+        except Exception as e:
+            log_exception("input_failed", e, input="wheel", x=screen_x, y=screen_y, notches=notches)
+            self.update_status(f"Scroll failed: {str(e)}")
+            return False
+
+    def click_at_position(self, coords, adjust_for_client_area=True, heavy=False):
+        """Click at the specified coordinates in the game window using Windows API only
+        
+        Rate limited as a heavy input if heavy is True, otherwise as a light one
+        """
         if not self.game_window:
             return False
+        if not self.input_scheduler.acquire("heavy" if heavy else "light"):
+            return False
         try:
             # Exclusively use Windows API for clicking - no fallbacks to other methods
             return self.fast_click_at_position(coords, adjust_for_client_area)
         except Exception as e:
+            log_exception("input_failed", e, input="click", x=coords[0], y=coords[1])
             self.update_status(f"Click failed: {str(e)}")
             return False
 
@@ -87,6 +140,7 @@ class GameConnector:
             
             # Check if window is valid (removed foreground window check for speed)
             if not win32gui.IsWindow(hwnd):
+                log_event("input_dropped", input="click", x=click_x, y=click_y, reason="window_gone")
                 return False
             
             # Send mouse down and up messages directly - much faster than pywinauto
@@ -95,6 +149,7 @@ class GameConnector:
             
             return True
         except Exception as e:
+            log_exception("input_failed", e, input="click", x=coords[0], y=coords[1])
             self.update_status(f"Fast click failed: {str(e)}")
             return False
 
@@ -104,7 +159,8 @@ class GameConnector:
             return None
         try:
             return self.game_window.rectangle()
-        except Exception:
+        except Exception as e:
+            log_exception("window_rect_failed", e)
             return None
 
     def get_client_rect(self):
@@ -122,6 +178,7 @@ class GameConnector:
                 client_pos[1] + client_rect[3]
             )
         except Exception as e:
+            log_exception("client_rect_failed", e)
             self.update_status(f"Failed to get client rect: {str(e)}")
             return None
 
@@ -141,6 +198,14 @@ class GameConnector:
             self.update_status(f"Failed to calculate window-client offset: {str(e)}")
             return None
 
+    def get_client_transform(self):
+        """Snapshot of the current window geometry as a ClientTransform (or None)"""
+        window_rect = self.get_window_rect()
+        client_rect = self.get_client_rect()
+        if not window_rect or not client_rect:
+            return None
+        return ClientTransform.from_rects(client_rect, (window_rect.left, window_rect.top))
+
     def convert_to_window_coords(self, screen_x, screen_y):
         """Convert screen coordinates to window-relative coordinates"""
         if not self.game_window:
@@ -157,68 +222,33 @@ class GameConnector:
         """Check if connected to game window"""
         return self.game_window is not None
 
-    def capture_area_bitblt(self, area):
-        """
-        Capture a specific area using BitBlt method - works even with background windows
-        Args:
-            area: Tuple of (left, top, width, height) in screen coordinates
-        Returns:
-            PIL Image or None if capture failed
-        """
+    def is_window_available(self):
+        """Check if the connected window still exists and is not minimized"""
         if not self.game_window:
-            return None
-
+            return False
         try:
             hwnd = self.game_window.handle
+            return bool(win32gui.IsWindow(hwnd)) and not win32gui.IsIconic(hwnd)
+        except Exception as e:
+            log_exception("window_check_failed", e)
+            return False
 
-            if win32gui.IsIconic(hwnd):
-                return None
-
-            left, top, right, bottom = win32gui.GetWindowRect(hwnd)
-            width = right - left
-            height = bottom - top
-
-            hwndDC = win32gui.GetWindowDC(hwnd)
-            mfcDC = win32ui.CreateDCFromHandle(hwndDC)
-            saveDC = mfcDC.CreateCompatibleDC()
-
-            saveBitMap = win32ui.CreateBitmap()
-            saveBitMap.CreateCompatibleBitmap(mfcDC, width, height)
-            saveDC.SelectObject(saveBitMap)
-
-            result = windll.gdi32.BitBlt(saveDC.GetSafeHdc(), 0, 0, width, height,
-                                       hwndDC, 0, 0, win32con.SRCCOPY)
-
-            if result:
-                bmpinfo = saveBitMap.GetInfo()
-                bmpstr = saveBitMap.GetBitmapBits(True)
-                full_image = Image.frombuffer('RGB', (bmpinfo['bmWidth'], bmpinfo['bmHeight']),
-                                            bmpstr, 'raw', 'BGRX', 0, 1)
-
-                area_left, area_top, area_width, area_height = area
-                rel_left = area_left - left
-                rel_top = area_top - top
-
-                cropped = full_image.crop((rel_left, rel_top,
-                                         rel_left + area_width,
-                                         rel_top + area_height))
-
-                win32gui.DeleteObject(saveBitMap.GetHandle())
-                saveDC.DeleteDC()
-                mfcDC.DeleteDC()
-                win32gui.ReleaseDC(hwnd, hwndDC)
-
-                return cropped
-
-        except Exception:
-            pass
-
-        try:
-            win32gui.DeleteObject(saveBitMap.GetHandle())
-            saveDC.DeleteDC()
-            mfcDC.DeleteDC()
-            win32gui.ReleaseDC(hwnd, hwndDC)
-        except:
-            pass
-
-        return None
+    def get_window_handle(self):
+        """Handle of the connected game window (or None)"""
+        return self.game_window.handle if self.game_window else None
+
+    def set_capture_backend(self, backend):
+        """Select the capture backend by name (see CAPTURE_BACKENDS) or as a CaptureBackend"""
+        if not isinstance(backend, CaptureBackend):
+            backend = create_capture_backend(backend, self.get_window_handle)
+        if backend is not self.capture_backend:
+            self.capture_backend.close()
+            self.capture_backend = backend
+
+    def capture_into(self, area, buffer):
+        """Capture a screen area into a BGR buffer; returns the frame timestamp or None"""
+        return self.capture_backend.capture_into(area, buffer)
+
+    def capture_frame(self, area):
+        """Capture a screen area as a new BGR NumPy array; returns (frame, timestamp) or (None, None)"""
+        return self.capture_backend.capture(area)
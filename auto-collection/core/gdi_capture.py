@@ -0,0 +1,120 @@
+# Windows capture backends: GDI BitBlt and PrintWindow
+# Both read the game window through a GDI memory bitmap and copy the BGRX
+# pixels straight into the caller's BGR buffer, without a PIL round trip.
+# Device contexts are created per capture, so the automation thread and the
+# capture prefetcher can capture concurrently through one backend.
+#
+# BitBlt copies only the requested area out of the window DC; it is the
+# fastest, but shows black for windows whose content is composed off-screen.
+# PrintWindow asks the window to render its full content into a window-sized
+# bitmap (PW_RENDERFULLCONTENT) and crops the area from it; it is slower but
+# also works for hardware-accelerated and covered windows.
+
+import time
+
+import numpy as np
+import win32con
+import win32gui
+import win32ui
+from ctypes import windll
+from core.capture_backend import CaptureBackend
+from core.run_log import log_event, log_exception
+
+PW_RENDERFULLCONTENT = 0x2
+
+
+class GdiBitBltBackend(CaptureBackend):
+    name = "bitblt"
+
+    def __init__(self, get_hwnd):
+        """Initialize the backend for the window returned by get_hwnd() (None = not connected)"""
+        self.get_hwnd = get_hwnd
+
+    def bitmap_layout(self, offset, size, window_size):
+        """Size of the memory bitmap and position of the area within it"""
+        return size, (0, 0)
+
+    def render(self, hwnd, window_dc, memory_dc, offset, size):
+        """Draw the window into the memory bitmap; returns False on failure"""
+        return bool(windll.gdi32.BitBlt(memory_dc.GetSafeHdc(), 0, 0, size[0], size[1],
+                                        window_dc, offset[0], offset[1], win32con.SRCCOPY))
+
+    def capture_into(self, area, buffer):
+        """Copy a screen area of the game window into buffer; returns the frame timestamp or None"""
+        hwnd = self.get_hwnd()
+        if not hwnd:
+            return None
+
+        window_dc = mfc_dc = memory_dc = bitmap = None
+        try:
+            if win32gui.IsIconic(hwnd):
+                log_event("capture_failed", area=area, reason="minimized")
+                return None
+
+            left, top, right, bottom = win32gui.GetWindowRect(hwnd)
+            area_left, area_top, width, height = area
+            offset = (area_left - left, area_top - top)
+            (bitmap_width, bitmap_height), (crop_x, crop_y) = self.bitmap_layout(
+                offset, (width, height), (right - left, bottom - top))
+            if crop_x < 0 or crop_y < 0 or crop_x + width > bitmap_width or crop_y + height > bitmap_height:
+                log_event("capture_failed", area=area, reason="outside_window")
+                return None
+
+            window_dc = win32gui.GetWindowDC(hwnd)
+            mfc_dc = win32ui.CreateDCFromHandle(window_dc)
+            memory_dc = mfc_dc.CreateCompatibleDC()
+            bitmap = win32ui.CreateBitmap()
+            bitmap.CreateCompatibleBitmap(mfc_dc, bitmap_width, bitmap_height)
+            memory_dc.SelectObject(bitmap)
+
+            if not self.render(hwnd, window_dc, memory_dc, offset, (width, height)):
+                log_event("capture_failed", area=area, reason=self.name)
+                return None
+            timestamp = time.perf_counter()
+
+            pixels = np.frombuffer(bitmap.GetBitmapBits(True), dtype=np.uint8)
+            pixels = pixels.reshape(bitmap_height, bitmap_width, 4)
+            np.copyto(buffer, pixels[crop_y:crop_y + height, crop_x:crop_x + width, :3])
+            return timestamp
+        except Exception as e:
+            log_exception("capture_failed", e, area=area, backend=self.name)
+            return None
+        finally:
+            self.release(hwnd, window_dc, mfc_dc, memory_dc, bitmap)
+
+    @staticmethod
+    def release(hwnd, window_dc, mfc_dc, memory_dc, bitmap):
+        """Free the GDI objects of one capture"""
+        try:
+            if bitmap is not None:
+                win32gui.DeleteObject(bitmap.GetHandle())
+            if memory_dc is not None:
+                memory_dc.DeleteDC()
+            if mfc_dc is not None:
+                mfc_dc.DeleteDC()
+            if window_dc is not None:
+                win32gui.ReleaseDC(hwnd, window_dc)
+        except Exception as e:
+            log_exception("capture_release_failed", e)
+
+
+class PrintWindowBackend(GdiBitBltBackend):
+    name = "printwindow"
+
+    def bitmap_layout(self, offset, size, window_size):
+        """The whole window is rendered, the area is cropped at its window offset"""
+        return window_size, offset
+
+    def render(self, hwnd, window_dc, memory_dc, offset, size):
+        """Let the window render its full content into the memory bitmap"""
+        return bool(windll.user32.PrintWindow(hwnd, memory_dc.GetSafeHdc(), PW_RENDERFULLCONTENT))
+
+
+WINDOW_BACKENDS = {backend.name: backend for backend in (GdiBitBltBackend, PrintWindowBackend)}
+
+
+def create_capture_backend(name, get_hwnd):
+    """Window capture backend by name (see core.capture_backend.CAPTURE_BACKENDS)"""
+    if name not in WINDOW_BACKENDS:
+        raise ValueError(f"Unknown capture backend: {name}")
+    return WINDOW_BACKENDS[name](get_hwnd)
@@ -0,0 +1,104 @@
+# Token bucket rate limiting for game input
+# Every click, cursor move and wheel event reserves a token from the bucket of
+# its kind before it is sent. Light inputs (cursor moves, scrolls, navigation
+# clicks) and heavy inputs (register/confirm clicks the client needs time to
+# process) have separate budgets. A rate of 0 means unlimited.
+
+import threading
+import time
+
+INPUT_KINDS = ("light", "heavy")
+
+
+class TokenBucket:
+    def __init__(self, rate=0.0, burst=1):
+        """Initialize a bucket refilling `rate` tokens per second, holding at most `burst`"""
+        self.rate = max(0.0, float(rate or 0.0))
+        self.burst = max(1, int(burst or 1))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        """Take one token; returns how many seconds to wait before using it
+
+        Tokens may go negative, so concurrent callers are served in order.
+        """
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(float(self.burst), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1.0
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class InputScheduler:
+    def __init__(self):
+        """Initialize with unlimited light and heavy budgets"""
+        self.lock = threading.Lock()
+        self.buckets = {kind: TokenBucket() for kind in INPUT_KINDS}
+        self.cancel_event = None   # Optional threading.Event that aborts waiting inputs
+        self.reset_stats()
+
+    def configure(self, kind, rate, burst=1):
+        """Set the rate (inputs per second, 0 = unlimited) and burst of one input kind"""
+        if kind not in INPUT_KINDS:
+            raise ValueError(f"Unknown input kind '{kind}' (expected one of {', '.join(INPUT_KINDS)})")
+        with self.lock:
+            self.buckets[kind] = TokenBucket(rate, burst)
+
+    def reset_stats(self):
+        """Clear the counters"""
+        with self.lock:
+            self.sent = {kind: 0 for kind in INPUT_KINDS}
+            self.throttled = {kind: 0 for kind in INPUT_KINDS}
+            self.throttle_seconds = {kind: 0.0 for kind in INPUT_KINDS}
+            self.cancelled = 0
+            self.queue_depth = 0
+            self.max_queue_depth = 0
+
+    def acquire(self, kind="light"):
+        """Wait for a token of the given kind; returns False if cancelled while waiting"""
+        with self.lock:
+            wait_s = self.buckets[kind].reserve()
+            if wait_s > 0:
+                self.throttled[kind] += 1
+                self.throttle_seconds[kind] += wait_s
+                self.queue_depth += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+        if wait_s > 0:
+            cancel_event = self.cancel_event
+            if cancel_event is not None:
+                cancelled = cancel_event.wait(wait_s)
+            else:
+                time.sleep(wait_s)
+                cancelled = False
+            with self.lock:
+                self.queue_depth -= 1
+                if cancelled:
+                    self.cancelled += 1
+                    return False
+        elif self.cancel_event is not None and self.cancel_event.is_set():
+            with self.lock:
+                self.cancelled += 1
+            return False
+
+        with self.lock:
+            self.sent[kind] += 1
+        return True
+
+    def stats(self):
+        """Counters per input kind plus queue depth"""
+        with self.lock:
+            return {
+                "sent": dict(self.sent),
+                "throttled": dict(self.throttled),
+                "throttle_seconds": {kind: round(seconds, 3)
+                                     for kind, seconds in self.throttle_seconds.items()},
+                "cancelled": self.cancelled,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "limits": {kind: {"rate": bucket.rate, "burst": bucket.burst}
+                           for kind, bucket in self.buckets.items()}
+            }
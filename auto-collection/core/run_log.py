@@ -0,0 +1,106 @@
+# Structured run log
+# Components log events to the "cabal.run" logger with log_event() and
+# log_exception(); nothing is written until a RunLog is started by the entry
+# point (GUI or headless). Records are formatted as one JSON object per line
+# and handed to a QueueHandler, so the automation thread never waits on disk;
+# a QueueListener thread writes them through a size-rotated file handler.
+#
+# Line format: {"ts": unix time, "level": "info", "event": "scan", ...fields}
+# Exceptions add {"error": {"type", "message", "traceback"}}.
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+
+RUN_LOGGER_NAME = "cabal.run"
+DEFAULT_LOG_FILE = os.path.join("logs", "run.jsonl")
+
+run_logger = logging.getLogger(RUN_LOGGER_NAME)
+run_logger.addHandler(logging.NullHandler())
+run_logger.propagate = False
+
+
+def log_event(event, **fields):
+    """Log a structured event (no-op until a RunLog is started)"""
+    if run_logger.isEnabledFor(logging.INFO):
+        run_logger.info(event, extra={"fields": fields})
+
+
+def log_exception(event, error, **fields):
+    """Log an exception that was handled instead of raised, with its traceback"""
+    if run_logger.isEnabledFor(logging.WARNING):
+        run_logger.warning(event, exc_info=(type(error), error, error.__traceback__),
+                           extra={"fields": fields})
+
+
+def to_json(value):
+    """json.dumps fallback for NumPy scalars, tuples of them and other objects"""
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record):
+        """One JSON object per record"""
+        entry = {"ts": round(record.created, 3), "level": record.levelname.lower(),
+                 "event": record.getMessage()}
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            error_type, error, _ = record.exc_info
+            entry["error"] = {"type": error_type.__name__, "message": str(error),
+                              "traceback": self.formatException(record.exc_info)}
+        return json.dumps(entry, ensure_ascii=False, default=to_json)
+
+
+class RunLog:
+    def __init__(self, path=DEFAULT_LOG_FILE, max_bytes=5 * 1024 * 1024, backup_count=3):
+        """Initialize the log writer
+
+        Args:
+            path: JSON-lines file; rotated copies are path.1 ... path.N
+            max_bytes: Size at which the file is rotated
+            backup_count: Number of rotated files kept
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.queue_handler = None
+        self.listener = None
+
+    def start(self):
+        """Attach the queue handler and start the writer thread"""
+        if self.listener is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        file_handler = logging.handlers.RotatingFileHandler(
+            self.path, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding="utf-8")
+        file_handler.setFormatter(JsonLineFormatter())
+
+        # Records are formatted on the writer thread; the queue only holds references
+        log_queue = queue.SimpleQueue()
+        self.queue_handler = logging.handlers.QueueHandler(log_queue)
+        self.queue_handler.prepare = lambda record: record
+        self.listener = logging.handlers.QueueListener(log_queue, file_handler)
+        self.listener.start()
+        run_logger.addHandler(self.queue_handler)
+        run_logger.setLevel(logging.INFO)
+
+    def stop(self):
+        """Flush pending records, stop the writer thread and close the file"""
+        if self.listener is None:
+            return
+        run_logger.removeHandler(self.queue_handler)
+        run_logger.setLevel(logging.NOTSET)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+        self.listener = None
+        self.queue_handler = None
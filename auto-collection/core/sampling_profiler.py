@@ -0,0 +1,93 @@
+# Low-overhead sampling profiler for a running thread
+# Periodically samples the target thread's stack from a separate thread, so it
+# can be attached to the automation loop while it runs. Output uses the folded
+# stack format ("outer;inner;leaf count") read by flamegraph.pl and speedscope.
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    def __init__(self, interval_ms=5, output_dir="profiles"):
+        """Initialize the profiler (sampling interval in milliseconds)"""
+        self.interval_ms = interval_ms
+        self.output_dir = output_dir
+        self.samples = Counter()
+        self.sample_count = 0
+        self.target_thread_id = None
+        self.started_at = None
+        self.stop_event = threading.Event()
+        self.sampler_thread = None
+
+    def is_running(self):
+        """Check if a profile is open: started and not yet written by stop()
+
+        Stays True after the target thread has ended and sampling has stopped,
+        so the next stop() still writes the collected samples.
+        """
+        return self.sampler_thread is not None
+
+    def start(self, target_thread):
+        """Start sampling the given thread"""
+        if self.is_running():
+            return False
+        if target_thread is None or not target_thread.is_alive():
+            return False
+
+        self.samples = Counter()
+        self.sample_count = 0
+        self.target_thread_id = target_thread.ident
+        self.started_at = time.time()
+        self.stop_event.clear()
+        self.sampler_thread = threading.Thread(target=self._sample_loop, daemon=True)
+        self.sampler_thread.start()
+        return True
+
+    def stop(self):
+        """Stop sampling and write the folded stacks
+
+        Returns the path of the written file, or None if nothing was sampled
+        """
+        if self.sampler_thread is None:
+            return None
+        self.stop_event.set()
+        self.sampler_thread.join()
+        self.sampler_thread = None
+
+        if not self.samples:
+            return None
+        return self.write_folded()
+
+    def _sample_loop(self):
+        """Sample the target thread's stack until stopped or the thread exits"""
+        interval = self.interval_ms / 1000.0
+        while not self.stop_event.wait(interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                break
+            self.samples[self._collapse(frame)] += 1
+            self.sample_count += 1
+
+    @staticmethod
+    def _collapse(frame):
+        """Turn a frame chain into a root-first folded stack string"""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        names.reverse()
+        return ";".join(names)
+
+    def write_folded(self):
+        """Write samples to profiles/profile_<timestamp>.folded"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(self.started_at))
+        path = os.path.join(self.output_dir, f"profile_{stamp}.folded")
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
@@ -1,13 +1,19 @@
 # Settings manager for saving/loading configuration
 import json
 import os
+from contextlib import contextmanager
 from typing import Dict, Any, Optional, Tuple
+from core.coordinates import LEGACY_SPACE
 
 class SettingsManager:
     def __init__(self, settings_file: str = "settings.json"):
         """Initialize settings manager"""
         self.settings_file = settings_file
         self.settings = {}
+        
+        # Nesting depth of batch_update(); saves are deferred while > 0
+        self.batch_depth = 0
+        self.batch_dirty = False
         self.load_settings()
     
     def load_settings(self) -> None:
@@ -23,16 +29,34 @@ class SettingsManager:
             self.settings = self._get_default_settings()
     
     def save_settings(self) -> None:
-        """Save settings to file"""
+        """Save settings to file (deferred to the end of a batch_update)"""
+        if self.batch_depth > 0:
+            self.batch_dirty = True
+            return
         try:
             with open(self.settings_file, 'w') as f:
                 json.dump(self.settings, f, indent=2)
         except Exception as e:
             print(f"Error saving settings: {e}")
     
+    @contextmanager
+    def batch_update(self):
+        """Group several setter calls into a single settings file write"""
+        self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.batch_depth -= 1
+            if self.batch_depth == 0 and self.batch_dirty:
+                self.batch_dirty = False
+                self.save_settings()
+    
     def _get_default_settings(self) -> Dict[str, Any]:
         """Get default settings"""
         return {
+            "coordinates": {
+                "space": "client"
+            },
             "areas": {
                 "collection_tabs": None,
                 "dungeon_list": None,
@@ -48,10 +72,85 @@ class SettingsManager:
                 "arrow_right": None
             },
             "speed": {
-                "delay_ms": 1000
+                "delay_ms": 1000,
+                "prefetch": False
+            },
+            "frame_sync": {
+                "enabled": False,
+                "probe_area": None,
+                "calibrate_ms": 500
+            },
+            "detector": {
+                "mode": "color",
+                "confidence": 0.9,
+                "min_distance": 10,
+                "workers": 1
+            },
+            "dungeon_index": {
+                "rows": 0
+            },
+            "input": {
+                "light": {"rate": 0, "burst": 1},
+                "heavy": {"rate": 0, "burst": 1}
+            },
+            "control": {
+                "enabled": False,
+                "port": 8765
+            },
+            "tabs": {
+                "policy": "fixed",
+                "history": {}
+            },
+            "log": {
+                "enabled": True,
+                "file": "logs/run.jsonl",
+                "max_bytes": 5242880,
+                "backup_count": 3
+            },
+            "report": {
+                "enabled": True,
+                "dir": "reports"
+            },
+            "capture": {
+                "backend": "bitblt"
+            },
+            "debug": {
+                "frame_ring_size": 0,
+                "frame_ring_file": None
             }
         }
     
+    def get_coordinate_space(self) -> str:
+        """Get the space areas and buttons are stored in ("client", "normalized" or "legacy")"""
+        return self.settings.get("coordinates", {}).get("space", LEGACY_SPACE)
+    
+    def migrate_coordinates(self, transform, space: str = "client") -> bool:
+        """Convert all stored areas and buttons to another coordinate space
+        
+        Args:
+            transform: ClientTransform of the current game window geometry
+            space: Target space, "client" or "normalized"
+        Returns:
+            True if the settings were changed
+        """
+        current_space = self.get_coordinate_space()
+        if current_space == space:
+            return False
+        with self.batch_update():
+            for area_name, area in list(self.get_all_areas().items()):
+                if area:
+                    self.set_area(area_name, transform.convert_area(area, current_space, space))
+            for button_name, coords in list(self.get_all_buttons().items()):
+                if coords:
+                    self.set_button(button_name, transform.convert_point(coords, current_space, space))
+            probe_area = self.settings.get("frame_sync", {}).get("probe_area")
+            if probe_area:
+                self.settings["frame_sync"]["probe_area"] = transform.convert_area(probe_area,
+                                                                                   current_space, space)
+            self.settings["coordinates"] = {"space": space}
+            self.save_settings()
+        return True
+    
     def set_area(self, area_name: str, area_coords: Tuple[int, int, int, int]) -> None:
         """Set area coordinates"""
         if "areas" not in self.settings:
@@ -74,6 +173,21 @@ class SettingsManager:
         """Get button coordinates"""
         return self.settings.get("buttons", {}).get(button_name)
     
+    def set_button_reference_path(self, button_name: str, path: str) -> None:
+        """Set the file holding a button's reference patch"""
+        if "button_references" not in self.settings:
+            self.settings["button_references"] = {}
+        self.settings["button_references"][button_name] = path
+        self.save_settings()
+    
+    def get_button_reference_paths(self) -> Dict[str, str]:
+        """Get reference patch files by button name"""
+        return self.settings.get("button_references", {})
+    
+    def get_button_reference_dir(self) -> str:
+        """Directory for button reference patches, next to the settings file"""
+        return os.path.join(os.path.dirname(os.path.abspath(self.settings_file)), "button_references")
+    
     def set_delay_ms(self, delay_ms: int) -> None:
         """Set delay in milliseconds"""
         if "speed" not in self.settings:
@@ -94,6 +208,142 @@ class SettingsManager:
         else:
             return 1000  # Default 1 second
     
+    def set_prefetch_enabled(self, enabled: bool) -> None:
+        """Set whether captures are prefetched during delays"""
+        if "speed" not in self.settings:
+            self.settings["speed"] = {}
+        self.settings["speed"]["prefetch"] = enabled
+        self.save_settings()
+    
+    def get_prefetch_enabled(self) -> bool:
+        """Get whether captures are prefetched during delays"""
+        return self.settings.get("speed", {}).get("prefetch", False)
+    
+    def set_frame_sync_enabled(self, enabled: bool) -> None:
+        """Set whether captures after input wait for the game's next frame"""
+        if "frame_sync" not in self.settings:
+            self.settings["frame_sync"] = {}
+        self.settings["frame_sync"]["enabled"] = enabled
+        self.save_settings()
+    
+    def get_frame_sync_settings(self) -> Dict[str, Any]:
+        """Get frame sync settings (enabled, probe_area, calibrate_ms)"""
+        frame_sync = {"enabled": False, "probe_area": None, "calibrate_ms": 500}
+        frame_sync.update(self.settings.get("frame_sync", {}))
+        return frame_sync
+    
+    def set_detector_settings(self, detector_settings: Dict[str, Any]) -> None:
+        """Set red dot detector settings"""
+        if "detector" not in self.settings:
+            self.settings["detector"] = {}
+        self.settings["detector"].update(detector_settings)
+        self.save_settings()
+    
+    def get_detector_settings(self) -> Dict[str, Any]:
+        """Get red dot detector settings (mode, confidence, min_distance, workers)"""
+        detector_settings = {"mode": "color", "confidence": 0.9, "min_distance": 10, "workers": 1}
+        detector_settings.update(self.settings.get("detector", {}))
+        return detector_settings
+    
+    def set_dungeon_list_rows(self, rows: int) -> None:
+        """Set the number of entries shown per dungeon list page (0 = no row index)"""
+        if "dungeon_index" not in self.settings:
+            self.settings["dungeon_index"] = {}
+        self.settings["dungeon_index"]["rows"] = rows
+        self.save_settings()
+    
+    def get_dungeon_list_rows(self) -> int:
+        """Get the number of entries shown per dungeon list page (0 = no row index)"""
+        return self.settings.get("dungeon_index", {}).get("rows", 0)
+    
+    def set_input_limit(self, kind: str, rate: float, burst: int) -> None:
+        """Set the input rate (per second, 0 = unlimited) and burst for light or heavy inputs"""
+        if "input" not in self.settings:
+            self.settings["input"] = {}
+        self.settings["input"][kind] = {"rate": rate, "burst": burst}
+        self.save_settings()
+    
+    def get_input_limits(self) -> Dict[str, Dict[str, float]]:
+        """Get input rate limits for light and heavy inputs"""
+        limits = {"light": {"rate": 0, "burst": 1}, "heavy": {"rate": 0, "burst": 1}}
+        for kind, limit in self.settings.get("input", {}).items():
+            if kind in limits:
+                limits[kind].update(limit)
+        return limits
+    
+    def set_control_settings(self, enabled: bool, port: int) -> None:
+        """Set whether the local control API runs and on which port"""
+        self.settings["control"] = {"enabled": enabled, "port": port}
+        self.save_settings()
+    
+    def get_control_settings(self) -> Tuple[bool, int]:
+        """Get whether the local control API runs and on which port"""
+        control_settings = self.settings.get("control", {})
+        return (control_settings.get("enabled", False), control_settings.get("port", 8765))
+    
+    def set_tab_policy(self, policy: str) -> None:
+        """Set the tab order policy (fixed, yield or shortest)"""
+        if "tabs" not in self.settings:
+            self.settings["tabs"] = {}
+        self.settings["tabs"]["policy"] = policy
+        self.save_settings()
+    
+    def get_tab_policy(self) -> str:
+        """Get the tab order policy"""
+        return self.settings.get("tabs", {}).get("policy", "fixed")
+    
+    def set_tab_history(self, history: Dict[str, Any]) -> None:
+        """Set per-tab yield and duration history"""
+        if "tabs" not in self.settings:
+            self.settings["tabs"] = {}
+        self.settings["tabs"]["history"] = history
+        self.save_settings()
+    
+    def get_tab_history(self) -> Dict[str, Any]:
+        """Get per-tab yield and duration history"""
+        return self.settings.get("tabs", {}).get("history", {})
+    
+    def get_frame_ring_settings(self) -> Tuple[int, Optional[str]]:
+        """Get debug frame ring size and optional memory-mapped file path"""
+        debug_settings = self.settings.get("debug", {})
+        return (debug_settings.get("frame_ring_size", 0),
+                debug_settings.get("frame_ring_file"))
+    
+    def get_log_settings(self) -> Dict[str, Any]:
+        """Get run log settings (enabled, file, max_bytes, backup_count)
+        
+        A relative file is resolved next to the settings file.
+        """
+        log_settings = {"enabled": True, "file": "logs/run.jsonl",
+                        "max_bytes": 5242880, "backup_count": 3}
+        log_settings.update(self.settings.get("log", {}))
+        if not os.path.isabs(log_settings["file"]):
+            log_settings["file"] = os.path.join(os.path.dirname(os.path.abspath(self.settings_file)),
+                                                log_settings["file"])
+        return log_settings
+    
+    def get_report_dir(self) -> Optional[str]:
+        """Get the directory run cost reports are written to (None = disabled)
+        
+        A relative directory is resolved next to the settings file.
+        """
+        report_settings = {"enabled": True, "dir": "reports"}
+        report_settings.update(self.settings.get("report", {}))
+        if not report_settings["enabled"] or not report_settings["dir"]:
+            return None
+        return os.path.join(os.path.dirname(os.path.abspath(self.settings_file)), report_settings["dir"])
+    
+    def set_capture_backend(self, backend: str) -> None:
+        """Set the screen capture backend ("bitblt" or "printwindow")"""
+        if "capture" not in self.settings:
+            self.settings["capture"] = {}
+        self.settings["capture"]["backend"] = backend
+        self.save_settings()
+    
+    def get_capture_backend(self) -> str:
+        """Get the screen capture backend ("bitblt" or "printwindow")"""
+        return self.settings.get("capture", {}).get("backend", "bitblt")
+    
     def get_all_areas(self) -> Dict[str, Any]:
         """Get all area settings"""
         return self.settings.get("areas", {})
@@ -0,0 +1,192 @@
+# Collection traversal as a declarative action graph
+#
+# CollectionAutomation runs this graph with automation/action_graph.py. Each
+# node names an action implemented by CollectionAutomation as action_<name>,
+# and maps every outcome of that action to the next node ("end" stops the run).
+#
+# Node fields:
+#   action      - action name (required)
+#   args        - keyword arguments passed to the action
+#   wait        - user delays applied after the action: a number, or a
+#                 {outcome: number} mapping ("*" = any other outcome)
+#   until       - condition polled after the action (condition_<name>), with
+#   until_args    optional keyword arguments
+#   timeout_ms  - how long `until` may take; the outcome becomes "timeout"
+#   next        - {outcome: node name}; "*" matches any outcome not listed
+#   pause       - False to defer a pause request until a later node (the run
+#                 only pauses between self-contained steps)
+#
+# A collection_flow.json file with the same structure in the working directory
+# replaces this default, so steps can be reordered for a game patch without
+# touching the code.
+
+import copy
+import json
+import os
+
+COLLECTION_FLOW_FILE = "collection_flow.json"
+
+COLLECTION_FLOW = {
+    "start": "scan_tabs",
+    "nodes": {
+        # Tabs
+        "scan_tabs": {
+            # One scan plans all tabs with a red dot (see automation/tab_planner.py)
+            "action": "scan_tabs",
+            "next": {"found": "open_tab", "empty": "end"}
+        },
+        "open_tab": {
+            "action": "click_tab",
+            "wait": 1,
+            "next": {"*": "check_tab"}
+        },
+        "check_tab": {
+            "action": "check_tab",
+            "next": {"yes": "index_page", "no": "finish_tab"}
+        },
+        "finish_tab": {
+            # Work through the planned tabs, then re-scan the strip to confirm
+            "action": "finish_tab",
+            "wait": {"next": 1, "continue": 1},
+            "next": {"next": "open_tab", "continue": "scan_tabs", "stuck": "end"}
+        },
+
+        # Dungeon list and pagination
+        "index_page": {
+            # Row index of the visible page (a no-op unless dungeon list rows are set)
+            "action": "index_page",
+            "next": {"scan": "scan_dungeon", "clear": "next_page", "unchanged": "finish_tab"}
+        },
+        "scan_dungeon": {
+            "action": "find_dot",
+            "args": {"area": "dungeon_list"},
+            "next": {"found": "open_dungeon", "empty": "next_page"}
+        },
+        "open_dungeon": {
+            "action": "click_dot",
+            "args": {"invalidate": ["collection_items"], "next_area": "collection_items"},
+            "wait": 1,
+            "next": {"*": "scroll_items_top"}
+        },
+        "next_page": {
+            "action": "next_page",
+            "args": {"pages": 4},
+            "wait": {"paged": 1},
+            "next": {"reset": "check_tab", "paged": "check_tab",
+                     "skipped": "check_tab", "exhausted": "finish_tab"}
+        },
+
+        # Collection items of the selected dungeon
+        "scroll_items_top": {
+            "action": "scroll_items",
+            "args": {"direction": "up", "amount": 20, "reset": True},
+            "wait": 1,
+            "next": {"*": "track_items_top"}
+        },
+        "track_items_top": {
+            "action": "track_items",
+            "args": {"reset": True},
+            "next": {"scan": "scan_item", "clear": "scroll_items_down", "bottom": "scan_item"}
+        },
+        "scan_item": {
+            "action": "find_dot",
+            "args": {"area": "collection_items"},
+            "next": {"found": "open_item", "empty": "scroll_items_down"}
+        },
+        "scroll_items_down": {
+            # max_positions only guards against a panel that never settles
+            "action": "scroll_items",
+            "args": {"direction": "down", "amount": 8, "max_positions": 30},
+            "wait": 1,
+            "next": {"scrolled": "track_items", "last": "finish_dungeon"}
+        },
+        "track_items": {
+            # Stop once a scroll no longer moves the panel
+            "action": "track_items",
+            "next": {"scan": "scan_item", "clear": "scroll_items_down", "bottom": "finish_dungeon"}
+        },
+        "restore_position": {
+            # Entered on resume when the view changed while paused
+            "action": "restore_position",
+            "wait": {"restored": 1},
+            "next": {"restored": "index_page", "rescan": "scan_tabs"}
+        },
+        "finish_dungeon": {
+            "action": "finish_dungeon",
+            "next": {"*": "scan_dungeon"}
+        },
+
+        # Register sequence for the selected item
+        "open_item": {
+            "action": "click_dot",
+            "wait": 1,
+            "next": {"*": "auto_refill"}
+        },
+        "auto_refill": {
+            "action": "click_button",
+            "pause": False,
+            "args": {"button": "auto_refill"},
+            "wait": {"ok": 1},
+            "next": {"ok": "probe_register", "failed": "item_done"}
+        },
+        "probe_register": {
+            # Register greyed out (materials missing): leave the item alone
+            "action": "probe_button",
+            "pause": False,
+            "args": {"button": "register"},
+            "next": {"differs": "skip_item", "*": "register"}
+        },
+        "register": {
+            "action": "click_button",
+            "pause": False,
+            "args": {"button": "register"},
+            "wait": {"ok": 1},
+            "next": {"ok": "probe_confirm", "failed": "item_done"}
+        },
+        "probe_confirm": {
+            # No confirmation dialog: skip the Yes click
+            "action": "probe_button",
+            "pause": False,
+            "args": {"button": "yes"},
+            "next": {"differs": "item_done", "*": "confirm"}
+        },
+        "confirm": {
+            "action": "click_button",
+            "pause": False,
+            "args": {"button": "yes"},
+            "next": {"ok": "item_registered", "failed": "item_done"}
+        },
+        "item_registered": {
+            # Move on as soon as the item's dot is gone instead of after a fixed
+            # delay; a dot that survives the registration times out
+            "action": "mark_registered",
+            "pause": False,
+            "until": "dot_cleared",
+            "timeout_ms": 2000,
+            "next": {"*": "item_done"}
+        },
+        "skip_item": {
+            "action": "skip_dot",
+            "next": {"*": "scan_item"}
+        },
+        "item_done": {
+            "action": "wait",
+            "wait": 1,
+            "next": {"*": "scan_item"}
+        }
+    }
+}
+
+
+def get_collection_flow(path=COLLECTION_FLOW_FILE):
+    """Get the collection action graph, preferring a JSON override file if present
+
+    Raises OSError or ValueError if the override file cannot be read or parsed.
+    """
+    if path and os.path.exists(path):
+        with open(path, "r") as f:
+            flow = json.load(f)
+        if not isinstance(flow, dict):
+            raise ValueError(f"{path} does not contain a JSON object")
+        return flow
+    return copy.deepcopy(COLLECTION_FLOW)
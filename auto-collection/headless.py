@@ -0,0 +1,265 @@
+# Headless command-line runner for unattended collection runs
+# Usage (from the auto-collection directory):
+#   python -m headless --settings settings.json --delay 300 --time-budget 1800
+#
+# Progress is written to stdout as one JSON object per line. No Tk, keyboard
+# or mouse hooks are loaded.
+
+import argparse
+import json
+import sys
+import threading
+import time
+
+from core.settings_manager import SettingsManager
+from core.capture_backend import CAPTURE_BACKENDS
+from core.game_connector import GameConnector
+from core.control_server import ControlServer
+from core.run_log import RunLog
+from automation.red_dot_detector import DETECTOR_MODES
+from automation.tab_planner import TAB_POLICIES
+from automation.collection_automation import (
+    CollectionAutomation,
+    RESULT_COMPLETE,
+    RESULT_STUCK,
+    RESULT_WINDOW_LOST,
+    RESULT_STOPPED,
+)
+
+# Process exit codes
+EXIT_COMPLETE = 0
+EXIT_SETUP_FAILED = 1
+EXIT_STUCK = 2
+EXIT_WINDOW_LOST = 3
+EXIT_ERROR = 4
+EXIT_INTERRUPTED = 130
+
+RESULT_EXIT_CODES = {
+    RESULT_COMPLETE: EXIT_COMPLETE,
+    RESULT_STUCK: EXIT_STUCK,
+    RESULT_WINDOW_LOST: EXIT_WINDOW_LOST,
+    RESULT_STOPPED: EXIT_INTERRUPTED,
+}
+
+
+class ProgressWriter:
+    def __init__(self, stream=None):
+        """Write structured progress lines to a stream (stdout by default)"""
+        self.stream = stream or sys.stdout
+        self.start_time = time.monotonic()
+
+    def emit(self, event, **fields):
+        """Write one JSON progress line"""
+        record = {"t": round(time.monotonic() - self.start_time, 3), "event": event}
+        record.update(fields)
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def status(self, message):
+        """Status callback for GameConnector and CollectionAutomation"""
+        self.emit("status", message=message)
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(
+        prog="headless",
+        description="Run the collection automation without the GUI")
+    parser.add_argument("--settings", default="settings.json",
+                        help="settings file written by the GUI (default: settings.json)")
+    parser.add_argument("--delay", type=int, default=None, metavar="MS",
+                        help="delay between actions in milliseconds (default: from settings)")
+    parser.add_argument("--detector", choices=DETECTOR_MODES, default=None,
+                        help="red dot detector mode (default: from settings)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="threads used for template matching (default: from settings)")
+    parser.add_argument("--tab-policy", choices=TAB_POLICIES, default=None,
+                        help="order of tabs within a tab strip scan (default: from settings)")
+    parser.add_argument("--light-rate", type=float, default=None, metavar="PER_SECOND",
+                        help="max cursor moves, scrolls and navigation clicks per second, 0 = unlimited")
+    parser.add_argument("--heavy-rate", type=float, default=None, metavar="PER_SECOND",
+                        help="max register/confirm clicks per second, 0 = unlimited")
+    parser.add_argument("--capture-backend", choices=CAPTURE_BACKENDS, default=None,
+                        help="screen capture method (default: from settings)")
+    parser.add_argument("--time-budget", type=float, default=None, metavar="SECONDS",
+                        help="stop as stuck after this many seconds (default: unlimited)")
+    parser.add_argument("--prefetch", action="store_true", default=None,
+                        help="capture the next region in the background during delays")
+    parser.add_argument("--frame-sync", action="store_true", default=None,
+                        help="time captures after input to the game's measured frame rate")
+    parser.add_argument("--control-port", type=int, default=None, metavar="PORT",
+                        help="serve the local control API on this port (0 = any free port)")
+    parser.add_argument("--wait-start", action="store_true",
+                        help="with --control-port, wait for POST /start before running")
+    parser.add_argument("--log-file", default=None, metavar="RUN.jsonl",
+                        help="structured run log (default: from settings, \"\" = off)")
+    parser.add_argument("--report-dir", default=None, metavar="DIR",
+                        help="write the run cost report as JSON and CSV here (default: from settings, \"\" = off)")
+    parser.add_argument("--record", default=None, metavar="TRACE.npz",
+                        help="record captures, detections and inputs for tools.replay_session")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run one collection pass and return a process exit code"""
+    args = parse_args(argv)
+    progress = ProgressWriter()
+
+    settings = SettingsManager(args.settings)
+    if not settings.is_setup_complete():
+        progress.emit("result", result="setup_incomplete", settings=args.settings)
+        return EXIT_SETUP_FAILED
+
+    run_log = start_run_log(settings, args.log_file, progress)
+    try:
+        return run(args, settings, progress)
+    finally:
+        if run_log is not None:
+            run_log.stop()
+
+
+def start_run_log(settings, log_file, progress):
+    """Start the structured run log from settings, or log_file if given ("" = off)"""
+    log_settings = settings.get_log_settings()
+    if log_file is not None:
+        log_settings.update(enabled=bool(log_file), file=log_file)
+    if not log_settings["enabled"]:
+        return None
+    run_log = RunLog(log_settings["file"], log_settings["max_bytes"], log_settings["backup_count"])
+    try:
+        run_log.start()
+    except OSError as e:
+        progress.emit("log", error=str(e))
+        return None
+    progress.emit("log", file=log_settings["file"])
+    return run_log
+
+
+def run(args, settings, progress):
+    """Connect, configure and run the automation; returns a process exit code"""
+    game_connector = GameConnector(progress.status)
+    if not game_connector.connect_to_game():
+        progress.emit("result", result="not_connected")
+        return EXIT_SETUP_FAILED
+
+    automation = CollectionAutomation(game_connector, progress.status)
+    automation.load_settings(settings)
+    if args.delay is not None:
+        automation.set_delay_ms(args.delay)
+    automation.configure_detector(mode=args.detector, workers=args.workers)
+    if args.capture_backend:
+        game_connector.set_capture_backend(args.capture_backend)
+    input_limits = settings.get_input_limits()
+    if args.light_rate is not None:
+        input_limits["light"]["rate"] = args.light_rate
+    if args.heavy_rate is not None:
+        input_limits["heavy"]["rate"] = args.heavy_rate
+    game_connector.configure_input_limits(input_limits)
+    if args.tab_policy:
+        automation.set_tab_policy(args.tab_policy, settings.get_tab_history(), settings.set_tab_history)
+    if args.prefetch:
+        automation.set_prefetch_enabled(True)
+    if args.frame_sync:
+        automation.set_frame_sync(**dict(settings.get_frame_sync_settings(), enabled=True))
+    automation.set_time_budget(args.time_budget)
+    if args.report_dir is not None:
+        automation.set_report_dir(args.report_dir)
+    if args.record and not automation.start_recording(args.record):
+        progress.emit("result", result="record_failed", path=args.record)
+        return EXIT_SETUP_FAILED
+
+    if automation.detector is None:
+        progress.emit("result", result="template_missing")
+        return EXIT_SETUP_FAILED
+
+    control_server = None
+    start_requested = threading.Event()
+    abort_requested = threading.Event()
+    if args.control_port is not None:
+        control_server = start_control_server(automation, args.control_port, start_requested,
+                                              abort_requested, progress)
+        if control_server is None:
+            return EXIT_SETUP_FAILED
+    if control_server is None or not args.wait_start:
+        start_requested.set()
+
+    try:
+        return run_automation(automation, game_connector, args, start_requested,
+                              abort_requested, progress)
+    finally:
+        if control_server is not None:
+            control_server.stop()
+
+
+def start_control_server(automation, port, start_requested, abort_requested, progress):
+    """Serve the local control API; POST /start releases start_requested"""
+    def start_command():
+        if start_requested.is_set():
+            return False
+        start_requested.set()
+        return True
+
+    def stop_command():
+        if not start_requested.is_set():
+            abort_requested.set()
+            start_requested.set()
+            return True
+        automation.stop()
+        return True
+
+    commands = {"start": start_command, "stop": stop_command,
+                "pause": automation.pause, "resume": automation.resume}
+    try:
+        control_server = ControlServer(automation.get_state, automation.get_metrics, commands, port)
+        bound_port = control_server.start()
+    except OSError as e:
+        progress.emit("result", result="control_port_unavailable", port=port, error=str(e))
+        return None
+    progress.emit("control", port=bound_port)
+    return control_server
+
+
+def run_automation(automation, game_connector, args, start_requested, abort_requested, progress):
+    """Run one collection pass once started and report the outcome"""
+    try:
+        while not start_requested.wait(0.2):
+            pass
+    except KeyboardInterrupt:
+        progress.emit("result", result="stopped")
+        return EXIT_INTERRUPTED
+    if abort_requested.is_set():
+        progress.emit("result", result="stopped")
+        return EXIT_INTERRUPTED
+
+    progress.emit("start", delay_ms=automation.delay_ms, detector=automation.detector_settings,
+                  capture=game_connector.capture_backend.name, time_budget=args.time_budget)
+    if not automation.start():
+        progress.emit("result", result="setup_incomplete")
+        return EXIT_SETUP_FAILED
+
+    try:
+        while automation.thread.is_alive():
+            automation.thread.join(0.2)
+    except KeyboardInterrupt:
+        automation.stop()
+        automation.thread.join()
+
+    if automation.flow_engine is not None:
+        progress.emit("timings", nodes=[{"node": name, "visits": visits, "seconds": round(seconds, 3)}
+                                        for name, visits, seconds in automation.flow_engine.report()])
+    progress.emit("input", **game_connector.input_stats())
+    if automation.dungeon_index is not None:
+        progress.emit("dungeons", dungeons=automation.dungeon_index.report())
+    if automation.last_report is not None:
+        progress.emit("report", files=automation.last_report_files, run=automation.last_report["run"],
+                      tabs=automation.last_report["tabs"], dungeons=automation.last_report["dungeons"])
+    if automation.stop_latency_ms is not None:
+        progress.emit("result", result=automation.result,
+                      stop_latency_ms=round(automation.stop_latency_ms, 2))
+    else:
+        progress.emit("result", result=automation.result)
+    return RESULT_EXIT_CODES.get(automation.result, EXIT_ERROR)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+# Shared test fixtures: the automation against an in-memory game screen
+# Run from the auto-collection directory:
+#   python -m pytest tests
+#
+# The automation runs on tools/fake_game.py's FakeGameConnector, over a static
+# screen with red dots in the tab strip, dungeon list and items panel.
+
+import os
+import sys
+
+import cv2
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from automation.collection_automation import CollectionAutomation
+from tools import fake_game
+from tools.fake_game import FakeGameConnector
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "red-dot.png")
+AREAS = {"collection_tabs": (20, 10, 400, 40),
+         "dungeon_list": (20, 80, 200, 400),
+         "collection_items": (300, 80, 300, 300)}
+BUTTONS = {"auto_refill": (700, 100), "register": (700, 150), "yes": (700, 200),
+           "page_2": (60, 500), "page_3": (100, 500), "page_4": (140, 500), "arrow_right": (180, 500)}
+
+
+def make_screen(template):
+    """Screen with one red dot in every detection area and the calibrated buttons"""
+    template_height, template_width = template.shape[:2]
+    dots = [(left + width - template_width - 10, top + (min(height, 40) - template_height) // 2)
+            for left, top, width, height in AREAS.values()]
+    return fake_game.make_screen(template, dots, BUTTONS.values())
+
+
+@pytest.fixture
+def automation():
+    """Calibrated automation on a FakeGameConnector; a running run is stopped afterwards"""
+    template = cv2.imread(TEMPLATE_PATH, cv2.IMREAD_COLOR)
+    automation = CollectionAutomation(FakeGameConnector(make_screen(template)))
+    for name, area in AREAS.items():
+        automation.set_area_calibration(name, area)
+    for name, position in BUTTONS.items():
+        automation.set_button_calibration(name, position)
+    automation.set_report_dir(None)
+    yield automation
+    automation.stop()
+    if automation.thread is not None:
+        automation.thread.join(5)
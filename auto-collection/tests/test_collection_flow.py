@@ -0,0 +1,24 @@
+# collection_flow.json overrides of the built-in action graph
+
+import json
+
+import numpy as np
+import pytest
+
+from automation.collection_automation import CollectionAutomation
+from data.collection_flow import COLLECTION_FLOW, COLLECTION_FLOW_FILE
+from tools.fake_game import FakeGameConnector, SCREEN_SIZE
+
+
+@pytest.mark.parametrize("content", ["{not json", "[1, 2]", json.dumps({"start": "missing", "nodes": {}})])
+def test_broken_override_falls_back_to_built_in_flow(tmp_path, monkeypatch, content):
+    """An unreadable or invalid override is reported and the built-in graph is used"""
+    (tmp_path / COLLECTION_FLOW_FILE).write_text(content)
+    monkeypatch.chdir(tmp_path)
+    messages = []
+    screen = np.zeros((SCREEN_SIZE[1], SCREEN_SIZE[0], 3), dtype=np.uint8)
+
+    automation = CollectionAutomation(FakeGameConnector(screen), messages.append)
+
+    assert automation.collection_flow == COLLECTION_FLOW
+    assert any(COLLECTION_FLOW_FILE in message for message in messages)
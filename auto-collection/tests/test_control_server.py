@@ -0,0 +1,83 @@
+# Control API against a run on the simulated game
+
+import json
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from core.control_server import ControlServer
+
+
+def request(port, method, path):
+    """(status, JSON body) of a request to the control server"""
+    req = urllib.request.Request(f"http://127.0.0.1:{port}{path}", method=method,
+                                 data=b"" if method == "POST" else None)
+    try:
+        with urllib.request.urlopen(req, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.fixture
+def control(automation):
+    """Port of a ControlServer driving the automation fixture"""
+    commands = {"start": automation.start, "stop": automation.stop,
+                "pause": automation.pause, "resume": automation.resume}
+    server = ControlServer(automation.get_state, automation.get_metrics, commands, port=0)
+    port = server.start()
+    yield port
+    server.stop()
+
+
+def test_state_metrics_and_commands(automation, control):
+    """GET /state and /metrics and POST start, pause and resume during a run"""
+    automation.set_delay_ms(100)
+
+    status, state = request(control, "GET", "/state")
+    assert status == 200 and state["running"] is False
+
+    status, body = request(control, "POST", "/start")
+    assert status == 200 and body["ok"]
+    time.sleep(0.3)
+
+    for _ in range(20):
+        status, metrics = request(control, "GET", "/metrics")
+        assert status == 200
+        assert metrics["elapsed_s"] > 0 and "nodes" in metrics and "input" in metrics
+
+    status, body = request(control, "POST", "/pause")
+    assert status == 200 and body["ok"]
+    status, state = request(control, "GET", "/state")
+    assert state["running"] is True and state["paused"] is True
+    status, body = request(control, "POST", "/pause")
+    assert status == 409
+
+    status, body = request(control, "POST", "/resume")
+    assert status == 200 and body["ok"]
+    status, state = request(control, "GET", "/state")
+    assert state["paused"] is False
+
+    status, body = request(control, "POST", "/stop")
+    assert status == 200
+    automation.thread.join(5)
+    status, state = request(control, "GET", "/state")
+    assert state["running"] is False
+
+
+def test_failing_query_answers_500():
+    """An exception in a state or metrics function is answered instead of dropping the connection"""
+    def broken():
+        raise RuntimeError("state unavailable")
+
+    server = ControlServer(broken, broken, {}, port=0)
+    port = server.start()
+    try:
+        for path in ("/state", "/metrics"):
+            status, body = request(port, "GET", path)
+            assert status == 500 and "state unavailable" in body["error"]
+        assert request(port, "GET", "/unknown")[0] == 404
+    finally:
+        server.stop()
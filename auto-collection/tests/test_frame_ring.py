@@ -0,0 +1,31 @@
+# Frame ring file reopened after an interrupted run
+
+import numpy as np
+
+from automation.frame_ring import FrameRingBuffer
+
+
+def test_reopened_ring_is_emptied_by_begin(tmp_path):
+    """An interrupted run's frames can be dumped once, then begin() starts the ring afresh"""
+    path = str(tmp_path / "frame_ring.bin")
+    frame = np.full((10, 12, 3), 200, dtype=np.uint8)
+
+    ring = FrameRingBuffer.create(4, 10, 12, path)
+    ring.begin()
+    for _ in range(6):
+        ring.write(frame, "dungeon_list")
+    ring.flush()
+    del ring  # The run ended without close()
+
+    ring = FrameRingBuffer.create(4, 10, 12, path)
+    assert ring.interrupted
+    assert len(ring) == 4
+    assert ring.dump(str(tmp_path / "interrupted")) == 4
+
+    ring.begin()
+    assert len(ring) == 0
+    assert ring.dump(str(tmp_path / "after_begin")) == 0
+    ring.write(frame)
+    assert len(ring) == 1 and ring.meta[0, 3] == 2
+    ring.close()
+    assert not FrameRingBuffer.open_file(path).interrupted
@@ -0,0 +1,33 @@
+# Session traces: frames streamed to disk and memory-mapped on replay
+
+import numpy as np
+
+from automation.session_recorder import SessionRecorder, SessionTrace
+
+
+def test_frames_round_trip_through_frames_file(tmp_path):
+    """Unique frames are written once as they arrive and read back unchanged"""
+    path = str(tmp_path / "trace.npz")
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (20 + i, 30, 3), dtype=np.uint8) for i in range(3)]
+
+    recorder = SessionRecorder(path)
+    ids = [recorder.record_capture("collection_items", (0, 0, 30, 20 + i), frame)
+           for i, frame in enumerate(frames)]
+    assert recorder.record_capture("collection_items", (0, 0, 30, 20), frames[0].copy()) == ids[0]
+    recorder.record_detection("collection_items", ids[0], [(5, 6)], 0.001, 0.9, False)
+    recorder.flush_frames()
+    assert (tmp_path / "trace.npz.frames").stat().st_size == sum(frame.nbytes for frame in frames)
+    recorder.save()
+
+    trace = SessionTrace(path)
+    try:
+        assert trace.frame_count == 3
+        assert len(trace.events) == 5
+        for frame_id, frame in zip(ids, frames):
+            replayed = trace.frame(frame_id)
+            assert isinstance(replayed, np.memmap)
+            assert np.array_equal(replayed, frame)
+        assert [event["frame"] for event in trace.detections()] == [ids[0]]
+    finally:
+        trace.close()
@@ -0,0 +1,45 @@
+# Stop latency of a run that is waiting out its input delay
+
+import threading
+import time
+
+STOP_LATENCY_LIMIT_MS = 20
+
+
+def test_stop_during_delay_is_immediate(automation):
+    """stop() wakes a 500 ms delay at once and no click follows it"""
+    automation.set_delay_ms(500)
+    in_delay = threading.Event()
+    delay = automation.delay
+
+    def observed_delay(custom_ms=None):
+        in_delay.set()
+        delay(custom_ms)
+
+    automation.delay = observed_delay
+    assert automation.start()
+    assert in_delay.wait(5), "the run never reached a delay"
+    time.sleep(0.05)  # Well inside the 500 ms wait
+
+    stop_requested = time.perf_counter()
+    automation.stop()
+    automation.thread.join(5)
+
+    assert not automation.thread.is_alive()
+    assert automation.stop_latency_ms is not None
+    assert automation.stop_latency_ms < STOP_LATENCY_LIMIT_MS
+    assert automation.game_connector.clicks_after(stop_requested) == []
+
+
+def test_start_refused_while_previous_run_unwinds(automation):
+    """start() returns False while the previous run thread is still alive"""
+    release = threading.Event()
+    automation.thread = threading.Thread(target=release.wait, daemon=True)
+    automation.thread.start()
+    try:
+        assert not automation.start()
+        assert not automation.running
+    finally:
+        release.set()
+        automation.thread.join(5)
+    assert automation.start()
@@ -0,0 +1,135 @@
+# Benchmark of the screen capture backends
+# Usage (from the auto-collection directory):
+#   python -m tools.bench_capture [--frames 300] [--area LEFT TOP WIDTH HEIGHT]
+#                                 [--window] [--image screen.png]
+#
+# Captures the same area repeatedly into one reused buffer with every backend
+# and prints frames per second, latency per capture (median, p95, max) and how
+# many captures showed a new picture. Without --window only the array backend
+# runs, on a synthetic screen or --image, which measures the copy cost alone;
+# with --window (Windows, game running) the BitBlt and PrintWindow backends
+# capture the game window as well, by default a 400x300 area at its center.
+
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from core.capture_backend import ArrayCaptureBackend, CAPTURE_BACKENDS, new_frame_buffer
+from tools.bench_stats import percentile
+
+SCREEN_SIZE = (1280, 800)
+DEFAULT_AREA_SIZE = (400, 300)
+
+
+def centered_area(left, top, width, height):
+    """Default benchmark area at the center of a (left, top, width, height) rectangle"""
+    area_width, area_height = min(DEFAULT_AREA_SIZE[0], width), min(DEFAULT_AREA_SIZE[1], height)
+    return (left + (width - area_width) // 2, top + (height - area_height) // 2, area_width, area_height)
+
+
+def synthetic_frames(count=4, seed=0):
+    """Noise screens that differ from each other, so every capture shows a new picture"""
+    rng = np.random.default_rng(seed)
+    width, height = SCREEN_SIZE
+    return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def time_backend(backend, area, frames):
+    """Capture frames times into one buffer
+
+    Returns:
+        (latencies, failures, changed, capture_time) with latencies in seconds
+        per successful capture, changed the number of captures whose pixels
+        differ from the previous one and capture_time the seconds spent in
+        all captures (the comparison is not timed)
+    """
+    buffer = new_frame_buffer(area)
+    previous = new_frame_buffer(area)
+    latencies = []
+    failures = 0
+    changed = 0
+    capture_time = 0.0
+    for _ in range(frames):
+        start = time.perf_counter()
+        timestamp = backend.capture_into(area, buffer)
+        latency = time.perf_counter() - start
+        capture_time += latency
+        if timestamp is None:
+            failures += 1
+            continue
+        if not latencies or not np.array_equal(buffer, previous):
+            changed += 1
+            np.copyto(previous, buffer)
+        latencies.append(latency)
+    return latencies, failures, changed, capture_time
+
+
+def window_backends():
+    """Window capture backends for the running game and the default area, or ([], None)"""
+    from core.game_connector import GameConnector
+    from core.gdi_capture import create_capture_backend
+
+    game_connector = GameConnector(print)
+    if not game_connector.connect_to_game():
+        return [], None
+    transform = game_connector.get_client_transform()
+    area = centered_area(transform.left, transform.top, transform.width, transform.height) \
+        if transform is not None else None
+    return [create_capture_backend(name, game_connector.get_window_handle) for name in CAPTURE_BACKENDS], area
+
+
+def main(argv=None):
+    """Run the benchmark and print one line per backend"""
+    parser = argparse.ArgumentParser(prog="tools.bench_capture",
+                                     description="Benchmark the screen capture backends")
+    parser.add_argument("--frames", type=int, default=300, help="captures per backend")
+    parser.add_argument("--area", type=int, nargs=4, default=None, metavar=("LEFT", "TOP", "WIDTH", "HEIGHT"),
+                        help="screen area to capture (default: center of the game window or screen)")
+    parser.add_argument("--window", action="store_true",
+                        help="also benchmark the BitBlt and PrintWindow backends on the game window")
+    parser.add_argument("--image", nargs="+", default=None, metavar="PNG",
+                        help="screen images served by the array backend (default: synthetic noise)")
+    args = parser.parse_args(argv)
+
+    if args.image:
+        array_backend = ArrayCaptureBackend.from_files(args.image)
+        if array_backend is None:
+            print(f"Could not read {' '.join(args.image)}", file=sys.stderr)
+            return 1
+    else:
+        array_backend = ArrayCaptureBackend(synthetic_frames())
+    screen_height, screen_width = array_backend.frames[0].shape[:2]
+
+    backends = []
+    area = None
+    if args.window:
+        backends, area = window_backends()
+        if not backends:
+            print("Game window not found, benchmarking the array backend only", file=sys.stderr)
+        elif area is not None:
+            # Let the array backend serve the same area out of the middle of its images
+            array_backend.origin = (area[0] - (screen_width - area[2]) // 2,
+                                    area[1] - (screen_height - area[3]) // 2)
+    area = tuple(args.area) if args.area else area or centered_area(0, 0, screen_width, screen_height)
+    backends.append(array_backend)
+
+    print(f"Area {area}, {args.frames} captures per backend")
+    for backend in backends:
+        latencies, failures, changed, capture_time = time_backend(backend, area, args.frames)
+        backend.close()
+        if not latencies:
+            print(f"{backend.name:12s} all {failures} captures failed")
+            continue
+        latencies.sort()
+        print(f"{backend.name:12s} {len(latencies) / capture_time:8.1f} fps  "
+              f"latency median {statistics.median(latencies) * 1000:7.3f} ms  "
+              f"p95 {percentile(latencies, 0.95) * 1000:7.3f} ms  max {latencies[-1] * 1000:7.3f} ms  "
+              f"{changed} new pictures, {failures} failed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
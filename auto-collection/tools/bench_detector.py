@@ -0,0 +1,86 @@
+# Benchmark parallel red dot matching against the number of worker threads
+# Usage (from the auto-collection directory):
+#   python -m tools.bench_detector [--height 900] [--width 300] [--runs 50]
+#
+# Builds a synthetic tall frame with the real template pasted into it, checks
+# that every worker count finds the same dots, and prints the speed-up.
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from automation.red_dot_detector import RedDotDetector, DETECTOR_MODES
+
+DEFAULT_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "data", "red-dot.png")
+
+
+def make_frame(template, height, width, dots, seed=0):
+    """Noise frame with the template pasted at random non-overlapping rows"""
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 80, size=(height, width, 3), dtype=np.uint8)
+    template_height, template_width = template.shape[:2]
+    rows = np.linspace(0, height - template_height, num=dots, dtype=int)
+    for row in rows:
+        col = int(rng.integers(0, width - template_width))
+        frame[row:row + template_height, col:col + template_width] = template
+    return frame
+
+
+def time_detector(detector, frame, runs):
+    """Median seconds per detect() call"""
+    detector.detect(frame)  # Warm up the pool and OpenCV
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        detector.detect(frame)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    """Run the benchmark and print one line per worker count"""
+    parser = argparse.ArgumentParser(prog="tools.bench_detector",
+                                     description="Benchmark parallel template matching")
+    parser.add_argument("--template", default=DEFAULT_TEMPLATE)
+    parser.add_argument("--height", type=int, default=900)
+    parser.add_argument("--width", type=int, default=300)
+    parser.add_argument("--dots", type=int, default=12)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--mode", choices=DETECTOR_MODES, default="color")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    template = cv2.imread(os.path.normpath(args.template), cv2.IMREAD_COLOR)
+    if template is None:
+        print(f"Template not found: {args.template}", file=sys.stderr)
+        return 1
+
+    frame = make_frame(template, args.height, args.width, args.dots)
+    print(f"Frame {args.width}x{args.height}, template {template.shape[1]}x{template.shape[0]}, "
+          f"mode={args.mode}, {os.cpu_count()} CPUs")
+
+    baseline_time = None
+    baseline_dots = None
+    for workers in range(1, max(1, args.max_workers) + 1):
+        detector = RedDotDetector(template, mode=args.mode, workers=workers)
+        dots = detector.detect(frame)
+        elapsed = time_detector(detector, frame, args.runs)
+        detector.close()
+
+        if baseline_time is None:
+            baseline_time, baseline_dots = elapsed, dots
+        status = "ok" if dots == baseline_dots else "MISMATCH"
+        print(f"workers={workers:2d}  {elapsed * 1000:8.3f} ms  "
+              f"speed-up {baseline_time / elapsed:5.2f}x  dots={len(dots)} {status}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
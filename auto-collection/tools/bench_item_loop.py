@@ -0,0 +1,167 @@
+# Micro-benchmark of the per-item overhead of the collection loop
+# Usage (from the auto-collection directory, on Windows like the app):
+#   python -m tools.bench_item_loop [--items 8] [--passes 200] [--top 5]
+#
+# Runs the per-item actions of the collection flow (find the next dot, open
+# the item, Auto Refill / Register / Yes with their button probes, mark
+# registered) against an in-memory screen (tools/fake_game.py), so captures and
+# input cost no game time and no delays are applied. Prints the time per item split into capture,
+# match, input and the remaining Python overhead, then repeats the run under
+# tracemalloc to report the memory allocated and released within each item
+# (the transient peak) and the blocks a pass leaves behind.
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import cv2
+
+from automation.collection_automation import CollectionAutomation
+from automation.red_dot_detector import DETECTOR_MODES
+from automation.run_stats import RunStats
+from tools import fake_game
+
+ITEMS_AREA = (600, 100, 160, 600)
+BUTTONS = {"auto_refill": (820, 120), "register": (820, 160), "yes": (820, 200)}
+ITEM_SPACING = 60
+
+# Per-item actions of data/collection_flow.py, without the waits between them
+ITEM_STEPS = (("click_dot", {}), ("click_button", {"button": "auto_refill"}),
+              ("probe_button", {"button": "register"}), ("click_button", {"button": "register"}),
+              ("probe_button", {"button": "yes"}), ("click_button", {"button": "yes"}),
+              ("mark_registered", {}))
+
+
+def make_screen(template, items):
+    """Screen with one red dot per item in the items area and the sequence buttons"""
+    template_width = template.shape[1]
+    left, top, width = ITEMS_AREA[:3]
+    dots = [(left + width - template_width - 10, top + 10 + item * ITEM_SPACING) for item in range(items)]
+    return fake_game.make_screen(template, dots, BUTTONS.values())
+
+
+def make_automation(screen, mode):
+    """Automation calibrated for the in-memory screen, ready to run item steps"""
+    automation = CollectionAutomation(fake_game.FakeGameConnector(screen, record_inputs=False))
+    if automation.detector is None:
+        return None
+    automation.configure_detector(mode=mode)
+    automation.set_delay_ms(0)
+    automation.set_collection_items_area(ITEMS_AREA)
+    for name, coords in BUTTONS.items():
+        automation.set_button_calibration(name, coords)
+    automation.resolve_coordinates()
+    for name in BUTTONS:
+        automation.button_references[name] = automation.grab_area(automation.button_probe_area(name))
+    automation.running = True
+    automation.counters = {"registered": 0, "skipped_items": 0, "dungeons": 0, "tabs": 0}
+    automation.flow_state = {"tab_registered": 0}
+    return automation
+
+
+def start_pass(automation):
+    """Make every item unvisited again"""
+    automation.invalidate_scan()
+    automation.item_tracker.visited = []
+
+
+def run_item(automation):
+    """Per-item actions for the next red dot; returns False once the pass is done"""
+    if automation.action_find_dot("collection_items") != "found":
+        return False
+    for action, args in ITEM_STEPS:
+        getattr(automation, "action_" + action)(**args)
+    return True
+
+
+def time_items(automation, passes):
+    """Seconds of each item, plus the time split of all passes (including their end-of-pass scans)"""
+    automation.run_stats = RunStats()
+    automation.run_stats.begin()
+    timings = []
+    for _ in range(passes):
+        start_pass(automation)
+        while True:
+            start = time.perf_counter()
+            if not run_item(automation):
+                break
+            timings.append(time.perf_counter() - start)
+    automation.run_stats.finish()
+    return timings, automation.run_stats.report()["run"]
+
+
+def trace_items(automation, passes, top):
+    """Transient peak bytes per item, blocks left behind by all passes and top allocation sites"""
+    tracemalloc.start()
+    start_pass(automation)
+    while run_item(automation):
+        pass  # Warm up lazily created state outside the measurement
+    before = tracemalloc.take_snapshot()
+    peaks = []
+    for _ in range(passes):
+        start_pass(automation)
+        while True:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            if not run_item(automation):
+                break
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    differences = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    retained_blocks = sum(difference.count_diff for difference in differences)
+    return peaks, retained_blocks, [difference for difference in differences if difference.count_diff][:top]
+
+
+def main(argv=None):
+    """Run the benchmark and print per-item timings and allocations"""
+    parser = argparse.ArgumentParser(prog="tools.bench_item_loop",
+                                     description="Benchmark the per-item overhead of the collection loop")
+    parser.add_argument("--items", type=int, default=8, help="red dots per pass (max 9)")
+    parser.add_argument("--passes", type=int, default=200)
+    parser.add_argument("--mode", choices=DETECTOR_MODES, default="color")
+    parser.add_argument("--top", type=int, default=5, help="allocation sites to list")
+    args = parser.parse_args(argv)
+
+    template = cv2.imread(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                       "..", "data", "red-dot.png"), cv2.IMREAD_COLOR)
+    if template is None:
+        print("Template data/red-dot.png not found", file=sys.stderr)
+        return 1
+    items = max(1, min(args.items, ITEMS_AREA[3] // ITEM_SPACING - 1))
+    automation = make_automation(make_screen(template, items), args.mode)
+    if automation is None:
+        print("Detector could not be created", file=sys.stderr)
+        return 1
+
+    timings, split = time_items(automation, args.passes)
+    if not timings:
+        print("No red dots found on the in-memory screen", file=sys.stderr)
+        return 1
+    count = len(timings)
+    per_item_us = {category: split[category + "_s"] / count * 1e6
+                   for category in ("capture", "match", "click")}
+    total_us = split["wall_s"] / count * 1e6
+    overhead_us = total_us - sum(per_item_us.values())
+    print(f"{count} items in {args.passes} passes, mode={args.mode}")
+    print(f"Per item: {total_us:8.1f} us mean (with full scans at pass boundaries), "
+          f"{statistics.median(timings) * 1e6:8.1f} us median")
+    print(f"  capture {per_item_us['capture']:8.1f} us   match {per_item_us['match']:8.1f} us   "
+          f"input {per_item_us['click']:8.1f} us   overhead {overhead_us:8.1f} us")
+
+    peaks, retained_blocks, sites = trace_items(automation, args.passes, args.top)
+    print(f"Allocations: transient peak {statistics.median(peaks) / 1024:.1f} KiB median per item "
+          f"(max {max(peaks) / 1024:.1f} KiB), {retained_blocks:+d} blocks retained after "
+          f"{args.passes} passes (including interpreter free lists)")
+    for site in sites:
+        print(f"  {site}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# Calibrate red dot detector settings against labelled frames
+# Usage (from the auto-collection directory):
+#   python -m tools.calibrate_detector frames/ [--recall 0.99] [--write settings.json]
+#
+# The frames folder holds region captures (e.g. PNGs dumped by the frame ring)
+# and a labels.json mapping each file name to its dot centers:
+#   {"000_120301_collection_items.png": [[14, 22], [14, 87]], ...}
+# Every combination of threshold, duplicate radius and detector mode is scored
+# for precision/recall and per-scan latency. The fastest configuration that
+# reaches the target recall (and precision) can be written to settings.json.
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+
+import cv2
+
+from automation.red_dot_detector import RedDotDetector, DETECTOR_MODES
+from core.settings_manager import SettingsManager
+
+DEFAULT_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "data", "red-dot.png")
+DEFAULT_THRESHOLDS = [0.70, 0.75, 0.80, 0.85, 0.88, 0.90, 0.92, 0.94, 0.96]
+DEFAULT_RADII = [5, 10, 15, 20]
+
+
+def load_labelled_frames(folder):
+    """Load (name, frame, dots) for every labelled frame in folder"""
+    with open(os.path.join(folder, "labels.json"), "r") as f:
+        labels = json.load(f)
+
+    frames = []
+    for name, dots in sorted(labels.items()):
+        frame = cv2.imread(os.path.join(folder, name), cv2.IMREAD_COLOR)
+        if frame is None:
+            print(f"Skipping unreadable frame: {name}", file=sys.stderr)
+            continue
+        frames.append((name, frame, [tuple(dot) for dot in dots]))
+    return frames
+
+
+def score_detections(detected, expected, tolerance):
+    """Greedy one-to-one matching; returns (true positives, false positives, false negatives)"""
+    remaining = list(expected)
+    true_positives = 0
+    for x, y in detected:
+        best = None
+        best_distance = tolerance * tolerance
+        for index, (ex, ey) in enumerate(remaining):
+            distance = (x - ex)**2 + (y - ey)**2
+            if distance <= best_distance:
+                best, best_distance = index, distance
+        if best is not None:
+            remaining.pop(best)
+            true_positives += 1
+    return true_positives, len(detected) - true_positives, len(remaining)
+
+
+def evaluate(template, frames, mode, threshold, radius, tolerance, runs):
+    """Score one detector configuration over all frames"""
+    detector = RedDotDetector(template, confidence=threshold, mode=mode, min_distance=radius)
+    totals = [0, 0, 0]
+    latencies = []
+
+    for name, frame, expected in frames:
+        detected = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            detected = detector.detect(frame)
+            latencies.append(time.perf_counter() - start)
+        for index, value in enumerate(score_detections(detected, expected, tolerance)):
+            totals[index] += value
+
+    true_positives, false_positives, false_negatives = totals
+    found = true_positives + false_positives
+    labelled = true_positives + false_negatives
+    return {
+        "mode": mode,
+        "confidence": threshold,
+        "min_distance": radius,
+        "precision": true_positives / found if found else 1.0,
+        "recall": true_positives / labelled if labelled else 1.0,
+        "latency_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "false_positives": false_positives,
+        "false_negatives": false_negatives,
+    }
+
+
+def pick_best(results, target_recall, target_precision):
+    """Fastest configuration meeting both targets, ties broken by precision then recall"""
+    eligible = [result for result in results
+                if result["recall"] >= target_recall and result["precision"] >= target_precision]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda result: (round(result["latency_ms"], 2),
+                                             -result["precision"], -result["recall"]))
+
+
+def main(argv=None):
+    """Sweep detector settings and optionally save the best one"""
+    parser = argparse.ArgumentParser(prog="tools.calibrate_detector",
+                                     description="Calibrate the red dot detector on labelled frames")
+    parser.add_argument("folder", help="folder with frame PNGs and labels.json")
+    parser.add_argument("--template", default=DEFAULT_TEMPLATE)
+    parser.add_argument("--modes", nargs="+", choices=DETECTOR_MODES, default=list(DETECTOR_MODES))
+    parser.add_argument("--thresholds", nargs="+", type=float, default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--radii", nargs="+", type=int, default=DEFAULT_RADII,
+                        help="duplicate suppression radii in pixels")
+    parser.add_argument("--tolerance", type=float, default=4.0,
+                        help="max distance in pixels between a detection and its label")
+    parser.add_argument("--recall", type=float, default=1.0, help="target recall")
+    parser.add_argument("--precision", type=float, default=1.0, help="target precision")
+    parser.add_argument("--runs", type=int, default=3, help="timed runs per frame")
+    parser.add_argument("--write", metavar="SETTINGS", default=None,
+                        help="write the best configuration into this settings file")
+    args = parser.parse_args(argv)
+
+    template = cv2.imread(os.path.normpath(args.template), cv2.IMREAD_COLOR)
+    if template is None:
+        print(f"Template not found: {args.template}", file=sys.stderr)
+        return 1
+
+    frames = load_labelled_frames(args.folder)
+    if not frames:
+        print("No labelled frames found", file=sys.stderr)
+        return 1
+    labelled_dots = sum(len(expected) for _, _, expected in frames)
+    print(f"{len(frames)} frames, {labelled_dots} labelled dots")
+
+    results = [evaluate(template, frames, mode, threshold, radius, args.tolerance, max(1, args.runs))
+               for mode, threshold, radius in itertools.product(args.modes, args.thresholds, args.radii)]
+
+    print(f"{'mode':<6} {'conf':>5} {'radius':>6} {'precision':>9} {'recall':>7} {'ms/scan':>8}")
+    for result in results:
+        print(f"{result['mode']:<6} {result['confidence']:>5.2f} {result['min_distance']:>6d} "
+              f"{result['precision']:>9.3f} {result['recall']:>7.3f} {result['latency_ms']:>8.3f}")
+
+    best = pick_best(results, args.recall, args.precision)
+    if best is None:
+        print(f"No configuration reaches recall {args.recall} and precision {args.precision}")
+        return 2
+
+    print(f"Best: mode={best['mode']} confidence={best['confidence']} "
+          f"min_distance={best['min_distance']} ({best['latency_ms']:.3f} ms/scan)")
+
+    if args.write:
+        settings = SettingsManager(args.write)
+        settings.set_detector_settings({"mode": best["mode"],
+                                        "confidence": best["confidence"],
+                                        "min_distance": best["min_distance"]})
+        print(f"Saved to {args.write}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+# In-memory stand-in for the game window, shared by the tests and the benchmarks
+#
+# FakeGameConnector replaces GameConnector: captures come from an
+# ArrayCaptureBackend over a static BGR screen, and inputs pass through the
+# real InputScheduler and are recorded instead of sent to a window.
+# make_screen draws such a screen: red dot templates on a dark background and
+# flat patches where the calibrated buttons are.
+
+import threading
+import time
+
+import numpy as np
+
+from core.capture_backend import ArrayCaptureBackend
+from core.coordinates import ClientTransform
+from core.input_scheduler import InputScheduler
+
+SCREEN_SIZE = (1000, 800)
+BACKGROUND = 30
+BUTTON_COLOR = (40, 90, 160)
+BUTTON_HALF_SIZE = (8, 20)   # (height, width) / 2 of a button patch
+
+
+class FakeGameConnector:
+    def __init__(self, screen, record_inputs=True):
+        """Stands in for GameConnector: captures crop a BGR screen image, inputs are recorded
+
+        With record_inputs=False inputs are only counted by the scheduler, so
+        long benchmark runs do not grow the inputs list.
+        """
+        self.screen = screen
+        self.capture_backend = ArrayCaptureBackend(screen)
+        self.input_scheduler = InputScheduler()
+        self.record_inputs = record_inputs
+        self.inputs = []            # (time.perf_counter(), kind, (x, y))
+        self.lock = threading.Lock()
+
+    def is_connected(self):
+        return True
+
+    def is_window_available(self):
+        return True
+
+    def get_client_transform(self):
+        height, width = self.screen.shape[:2]
+        return ClientTransform(0, 0, width, height)
+
+    def capture_frame(self, area):
+        return self.capture_backend.capture(area)
+
+    def record(self, kind, x, y, heavy=False):
+        """Record an input if the rate limiter lets it through"""
+        if not self.input_scheduler.acquire("heavy" if heavy else "light"):
+            return False
+        if self.record_inputs:
+            with self.lock:
+                self.inputs.append((time.perf_counter(), kind, (x, y)))
+        return True
+
+    def move_cursor(self, x, y):
+        return self.record("cursor", x, y)
+
+    def click_at_position(self, position, adjust_for_client_area=True, heavy=False):
+        return self.record("click", position[0], position[1], heavy)
+
+    def scroll_wheel(self, x, y, distance):
+        return self.record("wheel", x, y)
+
+    def set_input_cancel_event(self, cancel_event):
+        self.input_scheduler.cancel_event = cancel_event
+
+    def input_stats(self):
+        return self.input_scheduler.stats()
+
+    def configure_input_limits(self, limits):
+        pass
+
+    def set_capture_backend(self, backend):
+        pass
+
+    def clicks_after(self, moment):
+        """Clicks recorded after a time.perf_counter() moment"""
+        with self.lock:
+            return [position for at, kind, position in self.inputs if kind == "click" and at > moment]
+
+
+def make_screen(template, dots, buttons, size=SCREEN_SIZE):
+    """Dark (width, height) screen with the template at every dot and a flat patch at every button
+
+    Args:
+        template: BGR red dot template
+        dots: (x, y) top-left corners of the dot templates
+        buttons: (x, y) button centers
+    """
+    width, height = size
+    screen = np.full((height, width, 3), BACKGROUND, dtype=np.uint8)
+    template_height, template_width = template.shape[:2]
+    for x, y in dots:
+        screen[y:y + template_height, x:x + template_width] = template
+    half_height, half_width = BUTTON_HALF_SIZE
+    for x, y in buttons:
+        screen[y - half_height:y + half_height, x - half_width:x + half_width] = BUTTON_COLOR
+    return screen
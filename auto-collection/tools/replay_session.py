@@ -0,0 +1,104 @@
+# Replay a recorded session trace through the red dot detector
+# Usage (from the auto-collection directory):
+#   python -m tools.replay_session trace.npz [--mode gray] [--repeat 5]
+#
+# Re-runs every recorded detection on its recorded frame, reports decisions
+# that differ from the live run and the offline detector latency.
+
+import argparse
+import statistics
+import sys
+import time
+
+import cv2
+
+from automation.red_dot_detector import RedDotDetector, DETECTOR_MODES
+from automation.session_recorder import SessionTrace
+from tools.bench_stats import percentile
+
+
+def replay(trace, detector, repeat=1, use_recorded_confidence=True):
+    """Run the detector over all recorded detections
+
+    Returns:
+        (mismatches, latencies) where mismatches is a list of
+        (event, replayed_dots) and latencies holds seconds per detection
+    """
+    mismatches = []
+    latencies = []
+
+    for event in trace.detections():
+        frame = trace.frame(event["frame"])
+        confidence = event["confidence"] if use_recorded_confidence else None
+
+        dots = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            dots = detector.detect(frame, confidence, event["first_only"])
+            latencies.append(time.perf_counter() - start)
+
+        recorded = [tuple(dot) for dot in event["dots"]]
+        if [tuple(dot) for dot in dots] != recorded:
+            mismatches.append((event, dots))
+
+    return mismatches, latencies
+
+
+def main(argv=None):
+    """Replay a trace and print a summary"""
+    parser = argparse.ArgumentParser(prog="tools.replay_session",
+                                     description="Replay a recorded session trace")
+    parser.add_argument("trace", help=".npz trace written by a recording run")
+    parser.add_argument("--mode", choices=DETECTOR_MODES, default=None,
+                        help="detector mode (default: the recorded one)")
+    parser.add_argument("--template", default=None,
+                        help="template image (default: the one stored in the trace)")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="run each detection this many times for latency figures")
+    args = parser.parse_args(argv)
+
+    trace = SessionTrace(args.trace)
+    metadata = trace.metadata
+
+    template = cv2.imread(args.template, cv2.IMREAD_COLOR) if args.template else trace.template
+    if template is None:
+        print("No template in trace - pass --template", file=sys.stderr)
+        return 1
+
+    detector = RedDotDetector(template,
+                              confidence=metadata.get("confidence", 0.9),
+                              mode=args.mode or metadata.get("detector_mode", "color"),
+                              min_distance=metadata.get("min_distance", 10))
+
+    mismatches, latencies = replay(trace, detector, max(1, args.repeat),
+                                   use_recorded_confidence=args.mode is None)
+
+    events = list(trace.detections())
+    inputs = sum(1 for event in trace.events if event["type"] == "input")
+    print(f"Trace: {len(trace.events)} events, {trace.frame_count} unique frames, "
+          f"{len(events)} detections, {inputs} inputs")
+    print(f"Detector: mode={detector.mode} confidence={detector.confidence} "
+          f"min_distance={detector.min_distance}")
+
+    if latencies:
+        latencies.sort()
+        print(f"Latency: mean {statistics.mean(latencies) * 1000:.3f} ms, "
+              f"p50 {percentile(latencies, 0.5) * 1000:.3f} ms, "
+              f"p95 {percentile(latencies, 0.95) * 1000:.3f} ms, "
+              f"max {latencies[-1] * 1000:.3f} ms")
+
+    recorded_latencies = sorted(event["latency"] for event in events)
+    if recorded_latencies:
+        print(f"Recorded live latency: p50 {percentile(recorded_latencies, 0.5) * 1000:.3f} ms, "
+              f"p95 {percentile(recorded_latencies, 0.95) * 1000:.3f} ms")
+
+    print(f"Decisions reproduced: {len(events) - len(mismatches)}/{len(events)}")
+    for event, dots in mismatches[:20]:
+        print(f"  t={event['t']:.3f}s {event['region']}: recorded {event['dots']} replayed {list(dots)}")
+
+    trace.close()
+    return 0 if not mismatches else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,406 @@
+# One-screenshot calibration wizard
+# Captures the game window once and shows the frozen frame in a single canvas.
+# All detection areas (drag) and buttons (click) are marked in one session,
+# with zoom and snapping to edges/button outlines found in the frame. Red dot
+# detection is previewed live on the frozen frame, and everything is written
+# to the settings file in a single save.
+
+import tkinter as tk
+from tkinter import ttk
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+from data.collection_data import get_collection_buttons
+
+CALIBRATION_AREAS = {
+    "collection_tabs": "Collection Tabs",
+    "dungeon_list": "Dungeon List",
+    "collection_items": "Collection Items"
+}
+
+CALIBRATION_BUTTONS = {**get_collection_buttons(),
+                       "page_2": "Page 2", "page_3": "Page 3",
+                       "page_4": "Page 4", "arrow_right": "Arrow Right"}
+
+ZOOM_LEVELS = (0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 4.0)
+
+
+class FeatureSnapper:
+    # Max distance in frame pixels a mark is moved when snapping
+    SNAP_RADIUS = 8
+    # Min edge pixels along a row/column for it to attract a rectangle side
+    MIN_LINE_EDGES = 20
+
+    def __init__(self, frame):
+        """Find edges and button-like outlines in a BGR frame"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        edges = cv2.Canny(gray, 50, 150)
+        self.column_strength = np.count_nonzero(edges, axis=0)
+        self.row_strength = np.count_nonzero(edges, axis=1)
+
+        outlines = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+        contours, _ = cv2.findContours(outlines, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+        self.boxes = [box for box in (cv2.boundingRect(contour) for contour in contours)
+                      if 8 <= box[2] <= 240 and 8 <= box[3] <= 80]
+
+    def snap_line(self, strength, value):
+        """Strongest edge line within SNAP_RADIUS of value, or value itself"""
+        low = max(0, value - self.SNAP_RADIUS)
+        high = min(len(strength), value + self.SNAP_RADIUS + 1)
+        if low >= high:
+            return value
+        best = low + int(np.argmax(strength[low:high]))
+        return best if strength[best] >= self.MIN_LINE_EDGES else value
+
+    def snap_rect(self, left, top, right, bottom):
+        """Move each side of a rectangle onto a nearby edge line"""
+        return (self.snap_line(self.column_strength, left), self.snap_line(self.row_strength, top),
+                self.snap_line(self.column_strength, right), self.snap_line(self.row_strength, bottom))
+
+    def snap_point(self, x, y):
+        """Center of the smallest button outline containing (x, y), or the point itself"""
+        containing = [box for box in self.boxes
+                      if box[0] <= x < box[0] + box[2] and box[1] <= y < box[1] + box[3]]
+        if not containing:
+            return x, y
+        left, top, width, height = min(containing, key=lambda box: box[2] * box[3])
+        return left + width // 2, top + height // 2
+
+
+class CalibrationWizard:
+    def __init__(self, root, game_connector, automation, settings, on_commit=None):
+        """Initialize the wizard
+
+        Args:
+            root: Tk root window
+            game_connector: Connected GameConnector used for the single capture
+            automation: CollectionAutomation whose detector previews red dots
+            settings: SettingsManager written once on save
+            on_commit: Called after the settings were saved
+        """
+        self.root = root
+        self.game_connector = game_connector
+        self.automation = automation
+        self.settings = settings
+        self.on_commit = on_commit
+
+        self.window = None
+        self.frame = None          # Frozen BGR capture of the game window
+        self.image = None          # Same capture as a PIL image for display
+        self.photo = None
+        self.window_origin = (0, 0)
+        self.transform = None      # Window geometry at capture time (see core/coordinates.py)
+        self.space = settings.get_coordinate_space()
+        self.snapper = None
+
+        # Marks in frame coordinates
+        self.areas = {}            # name -> (x, y, width, height)
+        self.buttons = {}          # name -> (x, y)
+        self.targets = list(CALIBRATION_AREAS) + list(CALIBRATION_BUTTONS)
+        self.drag_start = None
+
+    def open(self):
+        """Capture the game window and show the wizard; returns False if capture failed"""
+        rect = self.game_connector.get_window_rect()
+        self.transform = self.game_connector.get_client_transform()
+        if rect is None or self.transform is None:
+            return False
+        frame, _ = self.game_connector.capture_frame((rect.left, rect.top,
+                                                      rect.width(), rect.height()))
+        if frame is None:
+            return False
+
+        self.frame = frame
+        self.image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        self.window_origin = (rect.left, rect.top)
+        self.snapper = FeatureSnapper(self.frame)
+        self.load_existing_marks()
+        self.create_ui()
+        self.render()
+        return True
+
+    def load_existing_marks(self):
+        """Start from the saved calibration, converted to frame coordinates"""
+        origin_x, origin_y = self.window_origin
+        height, width = self.frame.shape[:2]
+        for name in CALIBRATION_AREAS:
+            area = self.settings.get_area(name)
+            if not area:
+                continue
+            left, top, area_width, area_height = self.transform.area_to_screen(area, self.space)
+            if 0 <= left - origin_x < width and 0 <= top - origin_y < height:
+                self.areas[name] = (left - origin_x, top - origin_y, area_width, area_height)
+        for name in CALIBRATION_BUTTONS:
+            coords = self.settings.get_button(name)
+            if not coords:
+                continue
+            x, y = self.transform.point_to_screen(coords, self.space)
+            if 0 <= x - origin_x < width and 0 <= y - origin_y < height:
+                self.buttons[name] = (x - origin_x, y - origin_y)
+
+    def create_ui(self):
+        """Create the wizard window"""
+        self.window = tk.Toplevel(self.root)
+        self.window.title("Calibration Wizard")
+        self.window.geometry("1100x720")
+        self.window.attributes("-topmost", True)
+
+        side = ttk.Frame(self.window, padding="5")
+        side.pack(side=tk.LEFT, fill=tk.Y)
+
+        ttk.Label(side, text="Mark:", font=("Arial", 9, "bold")).pack(anchor=tk.W)
+        self.target_list = tk.Listbox(side, height=len(self.targets), exportselection=False, width=24)
+        self.target_list.pack(fill=tk.X, pady=(2, 5))
+        self.target_list.bind("<<ListboxSelect>>", lambda event: self.update_hint())
+
+        self.hint_var = tk.StringVar()
+        ttk.Label(side, textvariable=self.hint_var, wraplength=180,
+                  foreground="blue").pack(anchor=tk.W, pady=(0, 5))
+
+        zoom_frame = ttk.Frame(side)
+        zoom_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(zoom_frame, text="Zoom:").pack(side=tk.LEFT)
+        self.zoom_var = tk.DoubleVar(value=1.0)
+        zoom_box = ttk.Combobox(zoom_frame, textvariable=self.zoom_var, values=ZOOM_LEVELS,
+                                state="readonly", width=5)
+        zoom_box.pack(side=tk.LEFT, padx=(5, 0))
+        zoom_box.bind("<<ComboboxSelected>>", lambda event: self.render())
+
+        self.snap_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(side, text="Snap to edges and buttons",
+                        variable=self.snap_var).pack(anchor=tk.W, pady=2)
+
+        ttk.Label(side, text="Red dot confidence:").pack(anchor=tk.W, pady=(5, 0))
+        self.saved_confidence = self.settings.get_detector_settings()["confidence"]
+        self.confidence_var = tk.DoubleVar(value=self.saved_confidence)
+        ttk.Scale(side, from_=0.5, to=0.99, variable=self.confidence_var,
+                  command=lambda value: self.render_dots()).pack(fill=tk.X)
+        self.dots_var = tk.StringVar()
+        ttk.Label(side, textvariable=self.dots_var).pack(anchor=tk.W)
+
+        ttk.Button(side, text="✓ Save All", command=self.commit).pack(fill=tk.X, pady=(15, 2))
+        ttk.Button(side, text="Cancel", command=self.close).pack(fill=tk.X)
+
+        canvas_frame = ttk.Frame(self.window)
+        canvas_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.canvas = tk.Canvas(canvas_frame, bg="black", cursor="crosshair")
+        x_scroll = ttk.Scrollbar(canvas_frame, orient=tk.HORIZONTAL, command=self.canvas.xview)
+        y_scroll = ttk.Scrollbar(canvas_frame, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.canvas.configure(xscrollcommand=x_scroll.set, yscrollcommand=y_scroll.set)
+        x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
+        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        self.canvas.bind("<Control-MouseWheel>", self.on_zoom_wheel)
+        self.window.bind("<Escape>", lambda event: self.close())
+
+        self.refresh_targets()
+        self.select_target(self.next_unset_target() or self.targets[0])
+
+    # Target list
+
+    def target_name(self, target):
+        """Display name of an area or button"""
+        return CALIBRATION_AREAS.get(target) or CALIBRATION_BUTTONS[target]
+
+    def is_set(self, target):
+        """Check if a target has been marked"""
+        return target in self.areas or target in self.buttons
+
+    def refresh_targets(self):
+        """Redraw the target list with ✓/❌ marks"""
+        selected = self.selected_target()
+        self.target_list.delete(0, tk.END)
+        for target in self.targets:
+            kind = "area" if target in CALIBRATION_AREAS else "button"
+            mark = "✓" if self.is_set(target) else "❌"
+            self.target_list.insert(tk.END, f"{mark} {self.target_name(target)} ({kind})")
+        if selected:
+            self.select_target(selected)
+
+    def selected_target(self):
+        """Target selected in the list, or None"""
+        selection = self.target_list.curselection()
+        return self.targets[selection[0]] if selection else None
+
+    def select_target(self, target):
+        """Select a target in the list"""
+        index = self.targets.index(target)
+        self.target_list.selection_clear(0, tk.END)
+        self.target_list.selection_set(index)
+        self.target_list.see(index)
+        self.update_hint()
+
+    def next_unset_target(self):
+        """First target not marked yet, or None"""
+        for target in self.targets:
+            if not self.is_set(target):
+                return target
+        return None
+
+    def advance(self):
+        """Move on to the next unmarked target"""
+        self.refresh_targets()
+        target = self.next_unset_target()
+        if target:
+            self.select_target(target)
+        else:
+            self.hint_var.set("All marked - check the preview and Save All")
+
+    def update_hint(self):
+        """Explain how to mark the selected target"""
+        target = self.selected_target()
+        if target is None:
+            return
+        if target in CALIBRATION_AREAS:
+            self.hint_var.set(f"Drag a rectangle around the {self.target_name(target)} area")
+        else:
+            self.hint_var.set(f"Click the {self.target_name(target)} button")
+
+    # Canvas events (event coordinates are canvas pixels at the current zoom)
+
+    def to_frame(self, event):
+        """Frame coordinates of a canvas event"""
+        zoom = self.zoom_var.get()
+        height, width = self.frame.shape[:2]
+        x = int(self.canvas.canvasx(event.x) / zoom)
+        y = int(self.canvas.canvasy(event.y) / zoom)
+        return min(max(x, 0), width - 1), min(max(y, 0), height - 1)
+
+    def on_press(self, event):
+        """Start an area drag or place a button"""
+        target = self.selected_target()
+        if target is None:
+            return
+        x, y = self.to_frame(event)
+        if target in CALIBRATION_AREAS:
+            self.drag_start = (x, y)
+            return
+
+        if self.snap_var.get():
+            x, y = self.snapper.snap_point(x, y)
+        self.buttons[target] = (x, y)
+        self.render_marks()
+        self.advance()
+
+    def on_drag(self, event):
+        """Show the area being dragged"""
+        if self.drag_start is None:
+            return
+        zoom = self.zoom_var.get()
+        x, y = self.to_frame(event)
+        self.canvas.delete("drag")
+        self.canvas.create_rectangle(self.drag_start[0] * zoom, self.drag_start[1] * zoom,
+                                     x * zoom, y * zoom, outline="yellow", width=2, tags="drag")
+
+    def on_release(self, event):
+        """Finish an area drag"""
+        if self.drag_start is None:
+            return
+        target = self.selected_target()
+        start_x, start_y = self.drag_start
+        self.drag_start = None
+        self.canvas.delete("drag")
+
+        x, y = self.to_frame(event)
+        left, right = sorted((start_x, x))
+        top, bottom = sorted((start_y, y))
+        if self.snap_var.get():
+            left, top, right, bottom = self.snapper.snap_rect(left, top, right, bottom)
+        if right - left <= 0 or bottom - top <= 0:
+            return
+        self.areas[target] = (left, top, right - left, bottom - top)
+        self.render_marks()
+        self.render_dots()
+        self.advance()
+
+    def on_zoom_wheel(self, event):
+        """Ctrl+wheel steps through the zoom levels"""
+        zoom = self.zoom_var.get()
+        index = min(range(len(ZOOM_LEVELS)), key=lambda i: abs(ZOOM_LEVELS[i] - zoom))
+        index = min(len(ZOOM_LEVELS) - 1, index + 1) if event.delta > 0 else max(0, index - 1)
+        self.zoom_var.set(ZOOM_LEVELS[index])
+        self.render()
+
+    # Drawing
+
+    def render(self):
+        """Draw the frozen frame at the current zoom with all marks"""
+        zoom = self.zoom_var.get()
+        width, height = self.image.size
+        size = (max(1, int(width * zoom)), max(1, int(height * zoom)))
+        resample = Image.NEAREST if zoom >= 1 else Image.BILINEAR
+        self.photo = ImageTk.PhotoImage(self.image.resize(size, resample))
+        self.canvas.delete("all")
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+        self.canvas.configure(scrollregion=(0, 0, size[0], size[1]))
+        self.render_marks()
+        self.render_dots()
+
+    def render_marks(self):
+        """Draw marked areas and buttons"""
+        zoom = self.zoom_var.get()
+        self.canvas.delete("mark")
+        for name, (x, y, width, height) in self.areas.items():
+            self.canvas.create_rectangle(x * zoom, y * zoom, (x + width) * zoom, (y + height) * zoom,
+                                         outline="red", width=2, tags="mark")
+            self.canvas.create_text(x * zoom + 3, y * zoom + 3, anchor=tk.NW, fill="red",
+                                    text=self.target_name(name), tags="mark")
+        for name, (x, y) in self.buttons.items():
+            cx, cy = x * zoom, y * zoom
+            self.canvas.create_line(cx - 8, cy, cx + 8, cy, fill="cyan", width=2, tags="mark")
+            self.canvas.create_line(cx, cy - 8, cx, cy + 8, fill="cyan", width=2, tags="mark")
+            self.canvas.create_text(cx + 10, cy - 10, anchor=tk.W, fill="cyan",
+                                    text=self.target_name(name), tags="mark")
+
+    def render_dots(self):
+        """Preview red dot detection inside the marked areas at the chosen confidence"""
+        self.canvas.delete("dot")
+        detector = self.automation.detector
+        if detector is None:
+            self.dots_var.set("Red dot template not found")
+            return
+
+        zoom = self.zoom_var.get()
+        confidence = self.confidence_var.get()
+        total = 0
+        for x, y, width, height in self.areas.values():
+            crop = self.frame[y:y + height, x:x + width]
+            if crop.shape[0] < detector.template_height or crop.shape[1] < detector.template_width:
+                continue
+            for dot_x, dot_y in detector.detect(crop, confidence):
+                cx, cy = (x + dot_x) * zoom, (y + dot_y) * zoom
+                radius = max(4, detector.template_width * zoom / 2 + 2)
+                self.canvas.create_oval(cx - radius, cy - radius, cx + radius, cy + radius,
+                                        outline="lime", width=2, tags="dot")
+                total += 1
+        self.dots_var.set(f"{total} red dots at {confidence:.2f}")
+
+    # Result
+
+    def commit(self):
+        """Write all marks (and the previewed confidence, if moved) in one settings save"""
+        origin_x, origin_y = self.window_origin
+        with self.settings.batch_update():
+            for name, (x, y, width, height) in self.areas.items():
+                screen_area = (origin_x + x, origin_y + y, width, height)
+                self.settings.set_area(name, self.transform.area_from_screen(screen_area, self.space))
+            for name, (x, y) in self.buttons.items():
+                self.settings.set_button(name, self.transform.point_from_screen(origin_x + x, origin_y + y,
+                                                                                self.space))
+            # An untouched slider keeps the stored confidence at its full precision
+            confidence = self.confidence_var.get()
+            if confidence != self.saved_confidence:
+                self.settings.set_detector_settings({"confidence": round(confidence, 2)})
+        self.close()
+        if self.on_commit:
+            self.on_commit()
+
+    def close(self):
+        """Close the wizard without saving"""
+        if self.window is not None:
+            self.window.destroy()
+            self.window = None
@@ -2,11 +2,15 @@
 
 import tkinter as tk
 from tkinter import ttk
+import os
 import threading
 import mouse
 from data.collection_data import get_collection_buttons
 from automation.collection_automation import CollectionAutomation
+from automation.tab_planner import TAB_POLICIES
 from core.settings_manager import SettingsManager
+from core.coordinates import LEGACY_SPACE
+from core.run_log import log_exception
 
 class CollectionTab:
     def __init__(self, parent_frame, main_window):
@@ -22,6 +26,7 @@ class CollectionTab:
             main_window.game_connector,
             main_window.update_status
         )
+        self.automation.report_callback = self.on_run_report
 
         # UI state variables
         self.button_coord_vars = {}
@@ -46,6 +51,8 @@ class CollectionTab:
         self.setup_status_label = ttk.Label(status_frame, text="⚠ Setup incomplete", 
                                            foreground="orange", font=("Arial", 10, "bold"))
         self.setup_status_label.pack()
+        ttk.Button(status_frame, text="Calibration Wizard...",
+                  command=self.open_calibration_wizard).pack(pady=(5, 0))
 
         # Areas Section
         area_frame = ttk.LabelFrame(main_frame, text="Detection Areas", padding="5")
@@ -68,6 +75,21 @@ class CollectionTab:
             status_label.pack(side=tk.RIGHT)
             self.area_status_vars[area_key] = status_label
 
+        # Entries per dungeon list page, for the row index (0 = off)
+        rows_frame = ttk.Frame(area_frame)
+        rows_frame.pack(fill=tk.X, pady=1)
+        ttk.Label(rows_frame, text="Dungeon list rows per page:").pack(side=tk.LEFT)
+        self.dungeon_rows_var = tk.IntVar(value=0)
+        ttk.Spinbox(rows_frame, from_=0, to=20, increment=1,
+                    textvariable=self.dungeon_rows_var, width=4,
+                    command=self.update_dungeon_rows).pack(side=tk.LEFT, padx=(5, 0))
+
+        # Store calibration as fractions of the window so resizing needs no recalibration
+        self.scale_coordinates_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(area_frame, text="Scale calibration with window size",
+                        variable=self.scale_coordinates_var,
+                        command=self.update_coordinate_space).pack(anchor=tk.W, pady=1)
+
         # Buttons Section
         button_frame = ttk.LabelFrame(main_frame, text="Button Coordinates", padding="5")
         button_frame.pack(fill=tk.X, pady=(0, 10))
@@ -90,6 +112,14 @@ class CollectionTab:
             ttk.Button(frame, text="Set", 
                       command=lambda k=button_key, n=button_name: self.set_button_coordinate(k, n)).pack(side=tk.RIGHT)
 
+        # Button state references (used to skip futile register sequences)
+        reference_frame = ttk.Frame(button_frame)
+        reference_frame.pack(fill=tk.X, pady=(5, 1))
+        ttk.Button(reference_frame, text="Snap Register (enabled)",
+                  command=lambda: self.capture_button_reference("register")).pack(side=tk.LEFT)
+        ttk.Button(reference_frame, text="Snap Yes (dialog open)",
+                  command=lambda: self.capture_button_reference("yes")).pack(side=tk.RIGHT)
+
         # Delay Settings
         delay_frame = ttk.LabelFrame(main_frame, text="Delay Settings", padding="5")
         delay_frame.pack(fill=tk.X, pady=(0, 10))
@@ -107,6 +137,25 @@ class CollectionTab:
         
         # Bind to variable changes to catch manual typing
         self.delay_var.trace('w', lambda *args: self.update_delay())
+        
+        self.prefetch_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(delay_frame, text="Prefetch captures during delay",
+                        variable=self.prefetch_var,
+                        command=self.update_prefetch).pack(anchor=tk.W, pady=2)
+        
+        self.frame_sync_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(delay_frame, text="Sync captures to game frames",
+                        variable=self.frame_sync_var,
+                        command=self.update_frame_sync).pack(anchor=tk.W, pady=2)
+        
+        tab_policy_frame = ttk.Frame(delay_frame)
+        tab_policy_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(tab_policy_frame, text="Tab order:").pack(side=tk.LEFT)
+        self.tab_policy_var = tk.StringVar(value="fixed")
+        tab_policy_box = ttk.Combobox(tab_policy_frame, textvariable=self.tab_policy_var,
+                                      values=TAB_POLICIES, state="readonly", width=10)
+        tab_policy_box.pack(side=tk.LEFT, padx=(5, 0))
+        tab_policy_box.bind("<<ComboboxSelected>>", lambda event: self.update_tab_policy())
 
         # Control buttons
         control_frame = ttk.Frame(main_frame)
@@ -122,53 +171,53 @@ class CollectionTab:
 
 
     def load_saved_settings(self):
-        """Load settings from file and update UI"""
-        # Load delay (convert from old multiplier format if needed)
-        delay_ms = self.settings.get_delay_ms()
-        self.delay_var.set(delay_ms)
-        self.automation.set_delay_ms(delay_ms)
+        """Load settings from file, apply them to automation and update UI"""
+        self.automation.load_settings(self.settings)
         
-        # Load and apply areas
-        areas = self.settings.get_all_areas()
-        for area_name, coords in areas.items():
-            if coords:
-                if area_name == "collection_tabs":
-                    self.automation.set_collection_tabs_area(coords)
-                elif area_name == "dungeon_list":
-                    self.automation.set_dungeon_list_area(coords)
-                elif area_name == "collection_items":
-                    self.automation.set_collection_items_area(coords)
-                
-                # Update status
-                if area_name in self.area_status_vars:
-                    self.area_status_vars[area_name].config(text="✓", foreground="green")
+        self.delay_var.set(self.settings.get_delay_ms())
+        self.prefetch_var.set(self.settings.get_prefetch_enabled())
+        self.frame_sync_var.set(self.settings.get_frame_sync_settings()["enabled"])
+        self.tab_policy_var.set(self.settings.get_tab_policy())
+        self.dungeon_rows_var.set(self.settings.get_dungeon_list_rows())
+        self.scale_coordinates_var.set(self.settings.get_coordinate_space() == "normalized")
         
-        # Load and apply buttons
-        buttons = self.settings.get_all_buttons()
-        for button_name, coords in buttons.items():
-            if coords:
-                # Set in automation
-                if button_name == "auto_refill":
-                    self.automation.set_auto_refill_button(coords)
-                elif button_name == "register":
-                    self.automation.set_register_button(coords)
-                elif button_name == "yes":
-                    self.automation.set_yes_button(coords)
-                elif button_name == "page_2":
-                    self.automation.set_page_2_button(coords)
-                elif button_name == "page_3":
-                    self.automation.set_page_3_button(coords)
-                elif button_name == "page_4":
-                    self.automation.set_page_4_button(coords)
-                elif button_name == "arrow_right":
-                    self.automation.set_arrow_right_button(coords)
-                
-                # Update UI
-                if button_name in self.button_coord_vars:
-                    self.button_coord_vars[button_name].set(f"({coords[0]}, {coords[1]})")
+        # Update area and button status
+        for area_name, coords in self.settings.get_all_areas().items():
+            if coords and area_name in self.area_status_vars:
+                self.area_status_vars[area_name].config(text="✓", foreground="green")
+        
+        for button_name, coords in self.settings.get_all_buttons().items():
+            if coords and button_name in self.button_coord_vars:
+                self.button_coord_vars[button_name].set(self.format_coords(coords))
         
         self.update_setup_status()
 
+    def format_coords(self, coords):
+        """Button position as shown in the UI (pixels or fractions of the window)"""
+        if self.settings.get_coordinate_space() == "normalized":
+            return f"({coords[0]:.3f}, {coords[1]:.3f})"
+        return f"({coords[0]}, {coords[1]})"
+
+    def get_calibration_transform(self):
+        """Current game window geometry for converting picked screen positions
+        
+        Connects to the game if needed and converts legacy calibration first.
+        Returns a ClientTransform, or None if the window is not available.
+        """
+        game_connector = self.main_window.game_connector
+        if not game_connector.is_connected():
+            if not game_connector.connect_to_game():
+                self.main_window.update_status("❌ Game not found - start the game first")
+                return None
+        
+        transform = game_connector.get_client_transform()
+        if transform is None:
+            self.main_window.update_status("❌ Could not read the game window position")
+            return None
+        if self.settings.get_coordinate_space() == LEGACY_SPACE:
+            self.load_saved_settings()
+        return transform
+
     def update_setup_status(self):
         """Update the setup status display"""
         if self.settings.is_setup_complete():
@@ -176,11 +225,39 @@ class CollectionTab:
         else:
             self.setup_status_label.config(text="⚠ Setup incomplete", foreground="orange")
 
+    def open_calibration_wizard(self):
+        """Mark all areas and buttons on a single screenshot of the game window"""
+        if self.get_calibration_transform() is None:
+            return
+
+        from ui.calibration_wizard import CalibrationWizard
+        wizard = CalibrationWizard(self.main_window.root, self.main_window.game_connector,
+                                   self.automation, self.settings, self.on_calibration_saved)
+        if not wizard.open():
+            self.main_window.update_status("❌ Could not capture the game window")
+
+    def on_calibration_saved(self):
+        """Apply the settings written by the calibration wizard"""
+        self.load_saved_settings()
+        self.main_window.update_status("✓ Calibration saved")
+
+    def on_run_report(self, report, files):
+        """Show the cost report of a finished run (called from the automation thread)"""
+        def show_report():
+            from ui.run_report_dialog import RunReportDialog
+            RunReportDialog(self.main_window.root, report, files).open()
+        self.main_window.root.after(0, show_report)
+
     def define_area(self, area_name, callback=None):
         """Define a specific area"""
-        def area_callback(area):
+        transform = self.get_calibration_transform()
+        if transform is None:
+            return
+
+        def area_callback(screen_area):
             """Callback when area is selected"""
-            # Save to settings
+            # Store relative to the game window's client area
+            area = transform.area_from_screen(screen_area, self.settings.get_coordinate_space())
             self.settings.set_area(area_name, area)
             
             # Set in automation
@@ -214,10 +291,9 @@ class CollectionTab:
     def set_button_coordinate(self, button_key, button_name, callback=None):
         """Set coordinates for an action button"""
         # Connect to game if needed
-        if not self.main_window.game_connector.is_connected():
-            if not self.main_window.game_connector.connect_to_game():
-                self.main_window.update_status("❌ Game not found - start the game first")
-                return
+        transform = self.get_calibration_transform()
+        if transform is None:
+            return
 
         self.main_window.update_status(f"Click on '{button_name}' button...")
 
@@ -231,41 +307,21 @@ class CollectionTab:
                 mouse.wait(button='left')
                 x, y = mouse.get_position()
 
-                # Convert to window-relative coordinates
-                rel_x, rel_y, success = self.main_window.game_connector.convert_to_window_coords(x, y)
-
-                if success:
-                    # Save to settings
-                    self.settings.set_button(button_key, (rel_x, rel_y))
-                    
-                    # Set coordinates in automation based on button type
-                    if button_key == "auto_refill":
-                        self.automation.set_auto_refill_button((rel_x, rel_y))
-                    elif button_key == "register":
-                        self.automation.set_register_button((rel_x, rel_y))
-                    elif button_key == "yes":
-                        self.automation.set_yes_button((rel_x, rel_y))
-                    elif button_key == "page_2":
-                        self.automation.set_page_2_button((rel_x, rel_y))
-                    elif button_key == "page_3":
-                        self.automation.set_page_3_button((rel_x, rel_y))
-                    elif button_key == "page_4":
-                        self.automation.set_page_4_button((rel_x, rel_y))
-                    elif button_key == "arrow_right":
-                        self.automation.set_arrow_right_button((rel_x, rel_y))
-                    
-                    # Update UI
-                    if button_key in self.button_coord_vars:
-                        self.button_coord_vars[button_key].set(f"({rel_x}, {rel_y})")
-                    
-                    self.main_window.update_status(f"✓ {button_name} button saved")
-                    self.update_setup_status()
-                    
-                    # Call callback if provided
-                    if callback:
-                        callback()
-                else:
-                    self.main_window.update_status("❌ Failed to convert coordinates")
+                # Store relative to the game window's client area
+                coords = transform.point_from_screen(x, y, self.settings.get_coordinate_space())
+                self.settings.set_button(button_key, coords)
+                self.automation.set_button_calibration(button_key, coords)
+                
+                # Update UI
+                if button_key in self.button_coord_vars:
+                    self.button_coord_vars[button_key].set(self.format_coords(coords))
+                
+                self.main_window.update_status(f"✓ {button_name} button saved")
+                self.update_setup_status()
+                
+                # Call callback if provided
+                if callback:
+                    callback()
 
             except Exception as e:
                 self.main_window.update_status(f"❌ Failed to capture click: {str(e)}")
@@ -276,6 +332,20 @@ class CollectionTab:
         # Start capture in thread
         threading.Thread(target=capture_click, daemon=True).start()
 
+    def capture_button_reference(self, button_key):
+        """Save how a button looks in its active state for state probing"""
+        if not self.main_window.game_connector.is_connected():
+            if not self.main_window.game_connector.connect_to_game():
+                self.main_window.update_status("❌ Game not found - start the game first")
+                return
+
+        path = os.path.join(self.settings.get_button_reference_dir(), f"{button_key}.png")
+        if self.automation.capture_button_reference(button_key, path):
+            self.settings.set_button_reference_path(button_key, path)
+            self.main_window.update_status(f"✓ {button_key.title()} reference saved")
+        else:
+            self.main_window.update_status(f"❌ Set the {button_key.title()} button before snapping it")
+
     def update_delay(self):
         """Update the delay in automation"""
         try:
@@ -286,6 +356,49 @@ class CollectionTab:
         except Exception as e:
             pass
 
+    def update_prefetch(self):
+        """Update capture prefetch in automation"""
+        prefetch = self.prefetch_var.get()
+        self.automation.set_prefetch_enabled(prefetch)
+        self.settings.set_prefetch_enabled(prefetch)
+
+    def update_frame_sync(self):
+        """Update frame-synchronized capture in automation"""
+        self.settings.set_frame_sync_enabled(self.frame_sync_var.get())
+        self.automation.set_frame_sync(**self.settings.get_frame_sync_settings())
+
+    def update_tab_policy(self):
+        """Update the tab order policy in automation"""
+        tab_policy = self.tab_policy_var.get()
+        self.automation.set_tab_policy(tab_policy, self.settings.get_tab_history(),
+                                       self.settings.set_tab_history)
+        self.settings.set_tab_policy(tab_policy)
+
+    def update_coordinate_space(self):
+        """Convert the stored calibration between client pixels and window fractions"""
+        space = "normalized" if self.scale_coordinates_var.get() else "client"
+        transform = self.get_calibration_transform()
+        if transform is None:
+            self.scale_coordinates_var.set(self.settings.get_coordinate_space() == "normalized")
+            return
+        if self.settings.migrate_coordinates(transform, space):
+            self.load_saved_settings()
+            self.main_window.update_status("✓ Calibration now scales with the window"
+                                           if space == "normalized" else
+                                           "✓ Calibration stored in window pixels")
+
+    def update_dungeon_rows(self):
+        """Update the dungeon list row index in automation"""
+        try:
+            rows = self.dungeon_rows_var.get()
+            self.automation.set_dungeon_list_rows(rows)
+            self.settings.set_dungeon_list_rows(rows)
+        except tk.TclError:
+            pass  # Spinbox text is not a number yet (e.g. while typing)
+        except Exception as e:
+            log_exception("dungeon_rows_update_failed", e)
+            self.main_window.update_status(f"❌ Could not set dungeon list rows: {str(e)}")
+
     def start_automation(self):
         """Start the collection automation"""
         # Check if automation is already running
@@ -4,6 +4,9 @@ import tkinter as tk
 from tkinter import ttk
 import keyboard
 from core.game_connector import GameConnector
+from core.sampling_profiler import SamplingProfiler
+from core.control_server import ControlServer
+from core.run_log import RunLog
 from ui.collection_tab import CollectionTab
 
 class MainWindow:
@@ -26,9 +29,24 @@ class MainWindow:
         # Set up emergency kill switch (ESC key)
         keyboard.add_hotkey('esc', self.emergency_stop)
 
+        # Pause/resume hotkey (F8) - holds the run between steps, keeping its position
+        keyboard.add_hotkey('f8', self.toggle_pause)
+
+        # Profiler hotkey (F9) - samples the running automation loop
+        self.profiler = SamplingProfiler()
+        keyboard.add_hotkey('f9', self.toggle_profiler)
+
         # Create UI
         self.create_ui()
 
+        # Structured JSON-lines run log (settings.json "log")
+        self.run_log = None
+        self.start_run_log()
+
+        # Optional local control API (settings.json "control")
+        self.control_server = None
+        self.start_control_server()
+
         # Set up window close handler
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
@@ -59,6 +77,12 @@ class MainWindow:
         emergency_label = ttk.Label(emergency_frame, text="ESC = Emergency Stop",
                                    foreground="red", font=("Arial", 9, "bold"))
         emergency_label.pack(anchor=tk.W)
+        pause_label = ttk.Label(emergency_frame, text="F8 = Pause/Resume",
+                                font=("Arial", 9))
+        pause_label.pack(anchor=tk.W)
+        profiler_label = ttk.Label(emergency_frame, text="F9 = Start/Stop Profiler",
+                                   font=("Arial", 9))
+        profiler_label.pack(anchor=tk.W)
 
     def auto_connect_to_game(self):
         """Automatically connect to the game and show connection status"""
@@ -97,8 +121,76 @@ class MainWindow:
             self.root.attributes('-topmost', True)
             self.root.attributes('-topmost', False)
 
+    def toggle_pause(self):
+        """Pause or resume the running automation (F8 key)"""
+        automation = self.collection_tab.automation
+        if automation.paused:
+            automation.resume()
+        elif not automation.pause():
+            self.update_status("⚠ Nothing to pause - automation is not running")
+
+    def toggle_profiler(self):
+        """Start or stop profiling the automation loop (F9 key)"""
+        if self.profiler.is_running():
+            path = self.profiler.stop()
+            if path:
+                self.update_status(f"Profile saved: {path}")
+            else:
+                self.update_status("Profiler stopped - no samples collected")
+            return
+
+        automation_thread = self.collection_tab.automation.thread
+        if self.profiler.start(automation_thread):
+            self.update_status("Profiling automation... press F9 to stop")
+        else:
+            self.update_status("⚠ Start the automation before profiling")
+
+    def start_control_server(self):
+        """Serve the local control API if enabled in settings"""
+        enabled, port = self.collection_tab.settings.get_control_settings()
+        if not enabled:
+            return
+        automation = self.collection_tab.automation
+        commands = {
+            "start": lambda: self.run_on_ui(self.collection_tab.start_automation),
+            "stop": lambda: self.run_on_ui(self.collection_tab.stop_automation),
+            "pause": automation.pause,
+            "resume": automation.resume
+        }
+        try:
+            self.control_server = ControlServer(automation.get_state, automation.get_metrics,
+                                                commands, port)
+            self.control_server.start()
+        except OSError as e:
+            self.control_server = None
+            self.update_status(f"❌ Control API could not listen on port {port}: {str(e)}")
+
+    def start_run_log(self):
+        """Write the structured run log if enabled in settings"""
+        log_settings = self.collection_tab.settings.get_log_settings()
+        if not log_settings["enabled"]:
+            return
+        try:
+            self.run_log = RunLog(log_settings["file"], log_settings["max_bytes"],
+                                  log_settings["backup_count"])
+            self.run_log.start()
+        except OSError as e:
+            self.run_log = None
+            self.update_status(f"❌ Run log could not be opened: {str(e)}")
+
+    def run_on_ui(self, func):
+        """Run a remote command on the Tk thread; returns True once scheduled"""
+        self.root.after(0, func)
+        return True
+
     def on_closing(self):
         """Clean up when closing the application"""
+        if self.control_server is not None:
+            self.control_server.stop()
+        if self.profiler.is_running():
+            self.profiler.stop()
+        if self.run_log is not None:
+            self.run_log.stop()
         keyboard.unhook_all()  # Remove all keyboard hooks
         self.root.destroy()
 
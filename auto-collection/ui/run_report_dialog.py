@@ -0,0 +1,65 @@
+# Summary dialog for the cost report of a finished run
+# Shows the run totals and a table of tabs and dungeons, most expensive first,
+# with the time split between capture, match, click and sleep.
+
+import os
+import tkinter as tk
+from tkinter import ttk
+from automation.run_stats import RunStats, TIME_CATEGORIES
+
+REPORT_COLUMNS = (("key", "Tab / dungeon", 230), ("visits", "Visits", 50), ("wall_s", "Wall s", 65)) + \
+    tuple((category + "_s", category.capitalize() + " s", 65) for category in TIME_CATEGORIES + ("other",)) + \
+    (("registered", "Registered", 75), ("sequences_attempted", "Sequences", 75),
+     ("pages", "Pages", 50), ("scrolls", "Scrolls", 55))
+
+
+class RunReportDialog:
+    def __init__(self, root, report, files):
+        """Initialize the dialog for a RunStats report and the files it was written to"""
+        self.root = root
+        self.report = report
+        self.files = files
+        self.window = None
+
+    def open(self):
+        """Show the dialog"""
+        self.window = tk.Toplevel(self.root)
+        self.window.title(f"Run Report - {self.report.get('result') or 'finished'}")
+        self.window.geometry("980x480")
+
+        frame = ttk.Frame(self.window, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(frame, text=RunStats.format_summary(self.report, limit=0),
+                  justify=tk.LEFT).pack(anchor=tk.W, pady=(0, 5))
+
+        table_frame = ttk.Frame(frame)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        table = ttk.Treeview(table_frame, columns=[column for column, _, _ in REPORT_COLUMNS],
+                             show="tree headings")
+        table.column("#0", width=80, stretch=False)
+        for column, title, width in REPORT_COLUMNS:
+            table.heading(column, text=title)
+            table.column(column, width=width, anchor=tk.W if column == "key" else tk.E)
+        y_scroll = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=table.yview)
+        table.configure(yscrollcommand=y_scroll.set)
+        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        table.insert("", tk.END, text="Run", values=self.row_values(self.report["run"]))
+        for scope, title in (("tabs", "Tabs"), ("dungeons", "Dungeons")):
+            if self.report[scope]:
+                group = table.insert("", tk.END, text=title, open=True)
+                for entry in self.report[scope]:
+                    table.insert(group, tk.END, values=self.row_values(entry))
+
+        if self.files:
+            ttk.Label(frame, text="Saved to " + ", ".join(os.path.basename(path) for path in self.files) +
+                      f" in {os.path.dirname(self.files[0])}", foreground="gray").pack(anchor=tk.W, pady=(5, 0))
+        ttk.Button(frame, text="Close", command=self.window.destroy).pack(anchor=tk.E, pady=(5, 0))
+        self.window.bind("<Escape>", lambda event: self.window.destroy())
+
+    @staticmethod
+    def row_values(entry):
+        """Table cells of a report entry"""
+        return [entry[column] for column, _, _ in REPORT_COLUMNS]